@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Movie, OTP, UserMovieState
+from .models import EmailOutbox, Movie, OTP, UserMovieState
 
 
 @admin.register(Movie)
@@ -41,3 +41,11 @@ class OTPAdmin(admin.ModelAdmin):
     list_display = ("email", "purpose", "code", "is_used", "created_at", "expires_at")
     list_filter = ("purpose", "is_used")
     search_fields = ("email", "code")
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ("to_email", "subject", "status", "attempts", "next_attempt_at", "sent_at", "created_at")
+    list_filter = ("status",)
+    search_fields = ("to_email", "subject")
+    readonly_fields = ("created_at", "sent_at")
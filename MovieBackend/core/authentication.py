@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+TOKEN_CACHE_KEY = "auth-token:{key}"
+
+# User fields kept in the token cache: what the views read, never secrets.
+# last_login is left out so update_last_login() doesn't have to invalidate.
+CACHED_USER_FIELDS = (
+    "id",
+    "username",
+    "email",
+    "first_name",
+    "last_name",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+    "date_joined",
+)
+
+
+def invalidate_cached_token(key):
+    cache.delete(TOKEN_CACHE_KEY.format(key=key))
+
+
+def invalidate_user_tokens(user_ids):
+    """Drop the cached tokens of ``user_ids``.
+
+    Saving or deleting a user does this through core.signals. Bulk writes such
+    as ``User.objects.filter(...).update(is_active=False)`` send no signals, so
+    they must call this themselves; otherwise the old ``is_active`` is served
+    until AUTH_TOKEN_CACHE_TTL runs out.
+    """
+    from rest_framework.authtoken.models import Token
+
+    keys = Token.objects.filter(user_id__in=user_ids).values_list("key", flat=True)
+    cache.delete_many([TOKEN_CACHE_KEY.format(key=key) for key in keys])
+
+
+def _cached_fields(user_model):
+    return [f.attname for f in user_model._meta.concrete_fields if f.attname in CACHED_USER_FIELDS]
+
+
+def user_from_cache(user_model, data):
+    """Rebuild a user from its cached fields without a query.
+
+    The instance behaves like one loaded with ``only(...)``: other fields
+    (the password hash) are deferred and fetched on access, and ``save()``
+    only writes the cached fields.
+    """
+    field_names = [name for name in _cached_fields(user_model) if name in data]
+    db = router.db_for_write(user_model)
+    return user_model.from_db(db, field_names, [data[name] for name in field_names])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that caches token -> non-secret user fields.
+
+    Saves the token/user join on every authenticated request: the user is
+    rebuilt from CACHED_USER_FIELDS, so filters, FK assignments and
+    serializers work on it without loading the row. The password hash is never
+    cached. Entries live for AUTH_TOKEN_CACHE_TTL seconds and are dropped when
+    the token is deleted (logout) or its user is saved or deleted (password
+    reset, activation, deactivation); see core.signals and
+    invalidate_user_tokens.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = TOKEN_CACHE_KEY.format(key=key)
+        model = self.get_model()
+        cached = cache.get(cache_key)
+        if cached is None:
+            try:
+                token = model.objects.select_related("user").get(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_("Invalid token."))
+            user = token.user
+            cached = {name: getattr(user, name) for name in _cached_fields(type(user))}
+            cache.set(cache_key, cached, getattr(settings, "AUTH_TOKEN_CACHE_TTL", 300))
+        else:
+            user = user_from_cache(get_user_model(), cached)
+            token = model(key=key, user_id=user.pk)
+            token.user = user
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+
+        return (user, token)
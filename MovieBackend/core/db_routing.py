@@ -0,0 +1,111 @@
+"""
+Read-replica routing.
+
+Reads only go to the replica when the code path has opted in, either through
+``ReplicaReadMixin`` on a viewset or ``read_from_replica()`` in a script.
+Everything else, including all writes, uses the primary. Once a scope has
+written anything, its later reads also go to the primary so it sees its own
+writes despite replication lag.
+
+The replica alias is ``settings.READ_REPLICA_ALIAS`` and only takes effect
+when that alias is present in ``DATABASES``.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class _RoutingState:
+    __slots__ = ("replica_reads", "pinned")
+
+    def __init__(self, replica_reads=False):
+        self.replica_reads = replica_reads
+        self.pinned = False
+
+
+_state = ContextVar("db_routing_state", default=None)
+
+
+def replica_alias():
+    alias = getattr(settings, "READ_REPLICA_ALIAS", None)
+    if alias and alias in connections.settings:
+        return alias
+    return None
+
+
+@contextmanager
+def routing_scope(replica_reads=False):
+    """Start a fresh routing state (e.g. one per request)."""
+    token = _state.set(_RoutingState(replica_reads))
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+def read_from_replica():
+    """Send reads in the current scope (or the rest of a script) to the replica."""
+    state = _state.get()
+    if state is None:
+        _state.set(_RoutingState(replica_reads=True))
+    else:
+        state.replica_reads = True
+
+
+def pin_to_primary():
+    """Send the rest of the current scope's reads to the primary, as a write would.
+
+    For a read that decides whether to write (e.g. a dedupe check), which must
+    not see a replica that is behind.
+    """
+    state = _state.get()
+    if state is not None:
+        state.pinned = True
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.replica_reads or state.pinned:
+            return None
+        return replica_alias()
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.pinned = True
+        # Explicit so instances loaded from the replica are still saved to the primary.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema through replication.
+        if db == replica_alias():
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """Serve ``replica_actions`` of a viewset from the read replica.
+
+    Authentication and permission checks still read from the primary so a
+    token created moments ago is found.
+    """
+
+    replica_actions = ("list", "retrieve")
+
+    def dispatch(self, request, *args, **kwargs):
+        with routing_scope():
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions:
+            read_from_replica()
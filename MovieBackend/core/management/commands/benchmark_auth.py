@@ -0,0 +1,88 @@
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from core.authentication import CachedTokenAuthentication, invalidate_cached_token
+from core.models import Movie, UserMovieState
+
+BACKENDS = [TokenAuthentication, CachedTokenAuthentication]
+
+ENDPOINTS = ["/api/auth/me/", "/api/user-states/", "/api/movies/"]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure full authenticated requests (time and queries) through the test client "
+        "with TokenAuthentication vs CachedTokenAuthentication"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=500,
+            help="Number of requests per endpoint and backend",
+        )
+
+    def handle(self, *args, **options):
+        n = options["requests"]
+        try:
+            # Everything happens in a transaction that is rolled back at the end,
+            # so the benchmark user, token and state never persist.
+            with transaction.atomic():
+                user = get_user_model().objects.create_user(
+                    username="benchmark-auth@example.invalid",
+                    email="benchmark-auth@example.invalid",
+                    password=None,
+                )
+                token = Token.objects.create(user=user)
+                movie = Movie.objects.create(title="benchmark-auth", year=2000)
+                UserMovieState.objects.create(user=user, movie=movie, in_my_list=True)
+                client = APIClient()
+                client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+                for backend in BACKENDS:
+                    # Views read authentication_classes at import time, so swap
+                    # the backend where DRF instantiates it.
+                    with mock.patch.object(APIView, "get_authenticators", lambda view: [backend()]), \
+                            override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+                        for path in ENDPOINTS:
+                            self._run(client, backend.__name__, path, token, n)
+                invalidate_cached_token(token.key)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, client, label, path, token, n):
+        invalidate_cached_token(token.key)
+        response = client.get(path)  # warm up (and fill the token cache)
+        if response.status_code != 200:
+            self.stderr.write(f"{label} {path}: HTTP {response.status_code}")
+            return
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(n):
+                client.get(path)
+            elapsed = time.perf_counter() - started
+        auth_queries = sum(
+            1 for query in queries.captured_queries if "authtoken_token" in query["sql"] or "auth_user" in query["sql"]
+        )
+        self.stdout.write(
+            f"{label:26s} {path:20s} {elapsed / n * 1e6:8.1f} us/request  "
+            f"{len(queries.captured_queries) / n:.2f} queries/request  "
+            f"{auth_queries / n:.2f} auth queries/request"
+        )
@@ -0,0 +1,80 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import OTP
+from core.ratelimit import RateLimiter
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare the OTP COUNT(*) rate-limit check with the cache limiter as the OTP table grows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=str,
+            default="0,10000,100000",
+            help="Comma-separated OTP table sizes to benchmark",
+        )
+        parser.add_argument(
+            "--burst",
+            type=int,
+            default=1000,
+            help="Checks per measurement (a burst from one email)",
+        )
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options["sizes"].split(",") if size.strip()]
+        burst = options["burst"]
+        email = "burst@example.invalid"
+
+        try:
+            # Rows are inserted in a transaction that is rolled back at the end.
+            with transaction.atomic():
+                inserted = 0
+                for size in sizes:
+                    expires_at = timezone.now() + timedelta(minutes=10)
+                    OTP.objects.bulk_create(
+                        (
+                            OTP(
+                                email=f"user{i}@example.invalid",
+                                code="000000",
+                                purpose="verify",
+                                expires_at=expires_at,
+                            )
+                            for i in range(inserted, size)
+                        ),
+                        batch_size=5000,
+                    )
+                    inserted = max(inserted, size)
+
+                    window_start = timezone.now() - timedelta(hours=1)
+                    started = time.perf_counter()
+                    for _ in range(burst):
+                        OTP.objects.filter(
+                            email=email, purpose="verify", created_at__gte=window_start
+                        ).count()
+                    count_us = (time.perf_counter() - started) / burst * 1e6
+
+                    limiter = RateLimiter(f"benchmark-{size}", limit=5, window_seconds=3600)
+                    limiter.reset(email)
+                    started = time.perf_counter()
+                    for _ in range(burst):
+                        limiter.hit(email)
+                    cache_us = (time.perf_counter() - started) / burst * 1e6
+                    limiter.reset(email)
+
+                    self.stdout.write(
+                        f"OTP rows={size:>8}  COUNT(*) check {count_us:8.1f} us  "
+                        f"cache limiter {cache_us:6.1f} us"
+                    )
+                raise _Rollback
+        except _Rollback:
+            pass
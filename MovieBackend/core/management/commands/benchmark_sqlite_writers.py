@@ -0,0 +1,123 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+TITLE_PREFIX = "sqlite-stress-"
+
+
+def _writer(index, ops, mode):
+    """Run ``ops`` read-then-write transactions in a separate process.
+
+    Read-then-write is the pattern that fails under DEFERRED: the read lock
+    cannot be upgraded once another process has committed a write.
+    """
+    import django
+    from django.apps import apps
+
+    if not apps.ready:  # spawned (not forked) workers start without Django
+        django.setup()
+
+    from django.db import OperationalError, connection, transaction
+
+    from core.models import Movie
+
+    if mode:
+        # Connecting re-reads OPTIONS, so override the mode afterwards.
+        connection.ensure_connection()
+        connection.transaction_mode = mode
+    latencies, errors = [], []
+    try:
+        for op in range(ops):
+            started = time.perf_counter()
+            try:
+                with transaction.atomic():
+                    Movie.objects.filter(title__startswith=f"{TITLE_PREFIX}{index}-").count()
+                    movie = Movie.objects.create(title=f"{TITLE_PREFIX}{index}-{op}", year=2000)
+                    Movie.objects.filter(pk=movie.pk).update(match_score=op)
+            except OperationalError as e:
+                errors.append(str(e))
+            else:
+                latencies.append(time.perf_counter() - started)
+    finally:
+        connection.close()
+    return latencies, errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Run parallel writer processes against a throwaway file-backed copy of the SQLite "
+        "schema (never the configured database) and count lock errors"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=8, help="Concurrent writer processes")
+        parser.add_argument("--ops", type=int, default=200, help="Transactions per writer")
+        parser.add_argument(
+            "--transaction-mode",
+            choices=["DEFERRED", "IMMEDIATE", "EXCLUSIVE"],
+            default=None,
+            help="Override the configured transaction mode (e.g. DEFERRED to reproduce lock errors)",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("This benchmark only applies to SQLite databases.")
+
+        from core.models import Movie
+
+        writers = options["writers"]
+        ops = options["ops"]
+        mode = options["transaction_mode"]
+
+        # Writers hit a temporary database file created from the models, like
+        # the test runner does, so an interrupted run can't leave rows behind
+        # in db.sqlite3. The file is removed with its directory afterwards.
+        tmpdir = tempfile.mkdtemp(prefix="sqlite-writers-")
+        connection.settings_dict.setdefault("TEST", {}).update(
+            {"NAME": os.path.join(tmpdir, "benchmark.sqlite3"), "MIGRATE": False}
+        )
+        old_name = connection.creation.create_test_db(verbosity=0, serialize=False)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode")
+                journal_mode = cursor.fetchone()[0]
+            configured_mode = connection.transaction_mode or "DEFERRED"
+            # Forked workers must not share the parent's SQLite handle.
+            connections.close_all()
+
+            # Fork so the workers inherit the switch to the temporary database.
+            started = time.perf_counter()
+            with multiprocessing.get_context("fork").Pool(writers) as pool:
+                results = pool.starmap(_writer, [(i, ops, mode) for i in range(writers)])
+            elapsed = time.perf_counter() - started
+            written = Movie.objects.filter(title__startswith=TITLE_PREFIX).count()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+        latencies = sorted(latency for worker_latencies, _ in results for latency in worker_latencies)
+        errors = [error for _, worker_errors in results for error in worker_errors]
+        committed = len(latencies)
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(committed - 1, int(committed * p))] * 1000
+
+        self.stdout.write(
+            f"journal_mode={journal_mode} transaction_mode={mode or configured_mode} "
+            f"writers={writers} ops/writer={ops}"
+        )
+        self.stdout.write(
+            f"committed {committed} in {elapsed:.2f}s ({committed / elapsed:.0f} tx/s)  "
+            f"p50 {percentile(0.50):.1f} ms  p99 {percentile(0.99):.1f} ms  "
+            f"lock errors {len(errors)}"
+        )
+        if errors:
+            self.stdout.write(f"first error: {errors[0]}")
+        self.stdout.write(f"wrote {written} rows to the throwaway database (now removed)")
@@ -0,0 +1,60 @@
+import argparse
+import math
+
+from django.core.management.base import BaseCommand
+
+from core.trending import refresh_trending
+
+
+def positive_float(value):
+    # 0, negative or NaN half-lives make the decay weights inf/NaN.
+    number = float(value)
+    if not (number > 0 and math.isfinite(number)):
+        raise argparse.ArgumentTypeError(f"must be a positive number, got {value}")
+    return number
+
+
+class Command(BaseCommand):
+    help = "Recompute time-decayed trending ranks for core movies from user activity"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=10,
+            help="Number of movies to mark as trending",
+        )
+        parser.add_argument(
+            "--half-life-hours",
+            type=positive_float,
+            default=72.0,
+            help="Hours after which an engagement event counts half as much",
+        )
+        parser.add_argument(
+            "--window-days",
+            type=int,
+            default=30,
+            help="Ignore activity older than N days",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Compute ranks without writing them",
+        )
+
+    def handle(self, *args, **options):
+        result = refresh_trending(
+            top=options["top"],
+            half_life_hours=options["half_life_hours"],
+            window_days=options["window_days"],
+            dry_run=options["dry_run"],
+        )
+        if result.kept_previous:
+            self.stdout.write(self.style.WARNING("No activity in the window; kept the current trending ranking"))
+            return
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Scored {result.scored} movies, updated {result.updated}"
+                + (" (dry run)" if options["dry_run"] else "")
+            )
+        )
@@ -0,0 +1,82 @@
+import csv
+import logging
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import OTP
+
+logger = logging.getLogger(__name__)
+
+
+def prunable_batches(cutoff):
+    """The rows to prune, as one ordered queryset per index that finds them.
+
+    Used rows come from core_otp_used_idx and expired ones from
+    core_otp_expires_idx. A single ``is_used OR expires_at < cutoff`` query
+    would scan the whole table, since SQLite can't combine the two indexes.
+    """
+    return [
+        OTP.objects.filter(is_used=True).order_by("pk"),
+        OTP.objects.filter(expires_at__lt=cutoff).order_by("expires_at"),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Delete used and expired OTP rows in small batches and record the table size"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-minutes",
+            type=int,
+            default=60,
+            help="Keep unused OTPs until they have been expired for N minutes",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows deleted per statement",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.05,
+            help="Seconds to pause between batches so writers can get the lock",
+        )
+        parser.add_argument(
+            "--metrics-file",
+            type=str,
+            default=None,
+            help="Append a CSV row (timestamp, rows_before, deleted, rows_after) to this file",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        cutoff = timezone.now() - timedelta(minutes=options["grace_minutes"])
+
+        rows_before = OTP.objects.count()
+        deleted = 0
+        for prunable in prunable_batches(cutoff):
+            while True:
+                # Each batch is its own short DELETE ... WHERE id IN (...) statement.
+                pks = list(prunable.values_list("pk", flat=True)[:batch_size])
+                if not pks:
+                    break
+                count, _ = OTP.objects.filter(pk__in=pks).delete()
+                deleted += count
+                if len(pks) < batch_size:
+                    break
+                time.sleep(options["sleep"])
+        rows_after = OTP.objects.count()
+
+        logger.info(f"otp_table_rows={rows_after} otp_pruned={deleted}")
+        if options["metrics_file"]:
+            with open(options["metrics_file"], "a", newline="") as f:
+                csv.writer(f).writerow([timezone.now().isoformat(), rows_before, deleted, rows_after])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"OTP rows: {rows_before} -> {rows_after} (deleted {deleted})")
+        )
@@ -0,0 +1,69 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from core.outbox import deliver_pending
+
+
+class Command(BaseCommand):
+    help = "Deliver queued EmailOutbox messages over a single reused SMTP connection"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and poll for new mail instead of exiting when the queue is empty",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep between polls when the queue is empty (with --loop)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Messages claimed per batch (default: EMAIL_OUTBOX_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=None,
+            help="Attempts before a message is marked failed (default: EMAIL_OUTBOX_MAX_ATTEMPTS)",
+        )
+
+    def handle(self, *args, **options):
+        connection = get_connection()
+        totals = {"sent": 0, "retried": 0, "failed": 0}
+        try:
+            while True:
+                result = deliver_pending(
+                    connection=connection,
+                    batch_size=options["batch_size"],
+                    max_attempts=options["max_attempts"],
+                )
+                totals["sent"] += result.sent
+                totals["retried"] += result.retried
+                totals["failed"] += result.failed
+                if result.sent or result.retried or result.failed:
+                    self.stdout.write(
+                        f"Batch: sent={result.sent} retried={result.retried} failed={result.failed}"
+                    )
+                    continue
+                if not options["loop"]:
+                    break
+                # Idle: release the SMTP session rather than letting the server time it out.
+                connection.close()
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done: sent={totals['sent']} retried={totals['retried']} failed={totals['failed']}"
+            )
+        )
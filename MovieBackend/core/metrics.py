@@ -0,0 +1,118 @@
+"""
+In-process request metrics.
+
+RequestMetricsMiddleware (core.middleware) records one observation per request
+into the histograms below, labelled by resolved view name and HTTP method.
+``render()`` exports them in the Prometheus text format for /api/_metrics.
+
+Every worker process keeps its own registry; scrape each worker (or sum in
+Prometheus) when running several.
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_left
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+METRICS = {
+    "http_request_duration_seconds": ("Wall time spent handling the request.", DURATION_BUCKETS),
+    "http_request_db_queries": ("Database queries executed per request.", QUERY_COUNT_BUCKETS),
+    "http_request_db_duration_seconds": ("Time spent in database queries per request.", DURATION_BUCKETS),
+    "http_response_size_bytes": ("Response body size.", SIZE_BUCKETS),
+}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # One slot per bucket plus +Inf; counts are per bucket, not cumulative.
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(METRICS[name][1])
+            histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def render(self):
+        with self._lock:
+            snapshot = {
+                key: (list(h.counts), h.sum, h.count) for key, h in self._histograms.items()
+            }
+
+        lines = []
+        for name, (help_text, buckets) in METRICS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (metric, labels), (counts, total, count) in sorted(snapshot.items()):
+                if metric != name:
+                    continue
+                label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+                cumulative = 0
+                for bound, bucket_count in zip((*buckets, "+Inf"), counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{label_text}}} {total}")
+                lines.append(f"{name}_count{{{label_text}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REGISTRY = MetricsRegistry()
+
+
+class QueryRecorder:
+    """``connection.execute_wrapper`` callable that counts and times queries.
+
+    Keeps only the ``keep`` slowest statements for the slow-request log.
+    """
+
+    def __init__(self, keep=5):
+        self.keep = keep
+        self.count = 0
+        self.duration = 0.0
+        self._slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            entry = (elapsed, self.count, context["connection"].alias, sql)
+            if len(self._slowest) < self.keep:
+                heapq.heappush(self._slowest, entry)
+            elif self.keep:
+                heapq.heappushpop(self._slowest, entry)
+
+    def slowest(self):
+        return sorted(self._slowest, reverse=True)
@@ -0,0 +1,81 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .metrics import REGISTRY, QueryRecorder
+from .profiling import is_staff_request, profiling_requested, request_id_for, run_profiled
+
+logger = logging.getLogger("core.metrics")
+
+
+class RequestMetricsMiddleware:
+    """Record wall time, DB queries, DB time and response size per view.
+
+    Requests slower than SLOW_REQUEST_SECONDS, or running more than
+    SLOW_REQUEST_QUERY_COUNT queries, are logged with their slowest queries.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_seconds = getattr(settings, "SLOW_REQUEST_SECONDS", 1.0)
+        self.slow_queries = getattr(settings, "SLOW_REQUEST_QUERY_COUNT", 50)
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = request.resolver_match
+        labels = {
+            "view": match.view_name if match else "<unresolved>",
+            "method": request.method,
+        }
+        if response.streaming:
+            size = int(response.get("Content-Length") or 0)
+        else:
+            size = len(response.content)
+
+        REGISTRY.observe("http_request_duration_seconds", labels, elapsed)
+        REGISTRY.observe("http_request_db_queries", labels, recorder.count)
+        REGISTRY.observe("http_request_db_duration_seconds", labels, recorder.duration)
+        REGISTRY.observe("http_response_size_bytes", labels, size)
+
+        if elapsed >= self.slow_seconds or recorder.count >= self.slow_queries:
+            worst = "\n".join(
+                f"  {duration * 1000:.1f} ms [{alias}] {sql[:500]}"
+                for duration, _, alias, sql in recorder.slowest()
+            )
+            logger.warning(
+                f"Slow request {request.method} {request.path} ({labels['view']}): "
+                f"{elapsed * 1000:.0f} ms, {recorder.count} queries in "
+                f"{recorder.duration * 1000:.0f} ms, {size} bytes, status {response.status_code}\n{worst}"
+            )
+        return response
+
+
+class ProfilingMiddleware:
+    """Run staff requests flagged with X-Profile: 1 / ?_profile=1 under cProfile.
+
+    Other requests only pay for two string lookups. See core.profiling.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiling_requested(request) or not is_staff_request(request):
+            return self.get_response(request)
+        request_id = request_id_for(request)
+        response, profiled = run_profiled(request_id, self.get_response, request)
+        if profiled:
+            response["X-Profile-Id"] = request_id
+        else:
+            response["X-Profile-Skipped"] = "another request is being profiled"
+        return response
@@ -76,7 +76,10 @@ def seed_movies(apps, schema_editor):
             "match_score": 89,
         },
     ]
+    # video_url only exists from 0005 on; drop what this model state lacks.
+    field_names = {field.name for field in Movie._meta.get_fields()}
     for payload in sample_movies:
+        payload = {key: value for key, value in payload.items() if key in field_names}
         Movie.objects.get_or_create(title=payload["title"], defaults=payload)
 
 
@@ -0,0 +1,22 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0008_emailoutbox"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="otp",
+            index=models.Index(
+                condition=models.Q(("is_used", False)),
+                fields=["email", "purpose", "code", "expires_at"],
+                name="core_otp_verify_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="otp",
+            index=models.Index(fields=["expires_at"], name="core_otp_expires_idx"),
+        ),
+    ]
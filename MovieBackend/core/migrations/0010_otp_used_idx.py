@@ -0,0 +1,14 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0009_otp_lifecycle_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="otp",
+            index=models.Index(condition=models.Q(("is_used", True)), fields=["id"], name="core_otp_used_idx"),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class Movie(models.Model):
@@ -23,6 +24,9 @@ class Movie(models.Model):
 
     class Meta:
         ordering = ["-is_trending", "title"]
+        indexes = [
+            models.Index(fields=["rank"], name="core_movie_rank_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.title
@@ -78,7 +82,46 @@ class OTP(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=["email", "purpose"]),
+            # Matches the OTPVerifyView / PasswordResetConfirmView lookup.
+            models.Index(
+                fields=["email", "purpose", "code", "expires_at"],
+                condition=models.Q(is_used=False),
+                name="core_otp_verify_idx",
+            ),
+            # Lets prune_otps find expired rows without a table scan.
+            models.Index(fields=["expires_at"], name="core_otp_expires_idx"),
+            # ...and used ones; partial, so it only holds rows waiting to be pruned.
+            models.Index(fields=["id"], condition=models.Q(is_used=True), name="core_otp_used_idx"),
         ]
 
     def __str__(self):
         return f"{self.email} - {self.purpose} - {self.code}"
+
+
+class EmailOutbox(models.Model):
+    """Outgoing email queued by request handlers and delivered by send_queued_email."""
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.EmailField(blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="core_outbox_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.to_email} - {self.subject} ({self.status})"
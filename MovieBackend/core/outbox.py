@@ -0,0 +1,128 @@
+"""
+Transactional email outbox.
+
+Request handlers call ``enqueue_email`` which only inserts an EmailOutbox row
+(inside the caller's transaction). The send_queued_email command drains the
+table over a single reused SMTP connection, retrying failures with backoff.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+# How long a worker may hold claimed rows before another worker can retry them.
+CLAIM_LEASE = timedelta(minutes=5)
+RETRY_BASE_SECONDS = 30
+
+
+@dataclass
+class DeliveryResult:
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+
+
+def enqueue_email(to_email, subject, body, from_email=""):
+    return EmailOutbox.objects.create(
+        to_email=to_email,
+        subject=subject,
+        body=body,
+        from_email=from_email or "",
+    )
+
+
+def _claim_batch(batch_size):
+    """Lease up to ``batch_size`` due rows so concurrent workers skip them."""
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        if rows:
+            EmailOutbox.objects.filter(pk__in=[row.pk for row in rows]).update(
+                next_attempt_at=now + CLAIM_LEASE
+            )
+    return rows
+
+
+def _record_failure(row, error, max_attempts, result):
+    """Schedule a retry with exponential backoff, or give up after ``max_attempts``."""
+    row.last_error = str(error)[:1000]
+    if row.attempts >= max_attempts:
+        row.status = "failed"
+        result.failed += 1
+        logger.error(f"Giving up on email {row.pk} to {row.to_email}: {row.last_error}")
+    else:
+        row.next_attempt_at = timezone.now() + timedelta(
+            seconds=RETRY_BASE_SECONDS * 2 ** (row.attempts - 1)
+        )
+        result.retried += 1
+        logger.warning(f"Email {row.pk} failed (attempt {row.attempts}): {row.last_error}")
+
+
+def _save_batch(rows):
+    EmailOutbox.objects.bulk_update(
+        rows, ["status", "attempts", "last_error", "next_attempt_at", "sent_at"]
+    )
+
+
+def deliver_pending(connection=None, batch_size=None, max_attempts=None):
+    """Send one batch of due emails over ``connection`` (opened if needed)."""
+    batch_size = batch_size or getattr(settings, "EMAIL_OUTBOX_BATCH_SIZE", 50)
+    max_attempts = max_attempts or getattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 5)
+    result = DeliveryResult()
+
+    rows = _claim_batch(batch_size)
+    if not rows:
+        return result
+
+    connection = connection or get_connection()
+    try:
+        connection.open()  # no-op when the connection is already open
+    except Exception as e:
+        # SMTP is unreachable: count it as a failed attempt for the whole batch
+        # so the rows back off (and drop their lease) instead of sitting claimed.
+        logger.warning(f"Could not open the email connection: {e}")
+        for row in rows:
+            row.attempts += 1
+            _record_failure(row, e, max_attempts, result)
+        _save_batch(rows)
+        return result
+
+    for row in rows:
+        message = EmailMessage(
+            subject=row.subject,
+            body=row.body,
+            from_email=row.from_email or None,
+            to=[row.to_email],
+            connection=connection,
+        )
+        row.attempts += 1
+        try:
+            message.send()
+        except Exception as e:
+            _record_failure(row, e, max_attempts, result)
+            # The SMTP session may be broken; reconnect for the rest of the batch.
+            try:
+                connection.close()
+                connection.open()
+            except Exception:
+                pass
+        else:
+            row.status = "sent"
+            row.sent_at = timezone.now()
+            row.last_error = ""
+            result.sent += 1
+
+    _save_batch(rows)
+    return result
@@ -0,0 +1,121 @@
+"""
+On-demand request profiling.
+
+A staff user adds ``X-Profile: 1`` (or ``?_profile=1``; "true", "yes" and
+"on" work too, anything else is ignored) to a request and
+ProfilingMiddleware (core.middleware) runs it under cProfile. The stats are
+saved to PROFILE_DIR as ``<request id>.prof`` and the response carries
+``X-Profile-Id`` for /api/_profiles/<id>. Only the request thread is
+profiled; work handed to background threads is not included.
+"""
+import cProfile
+import io
+import pstats
+import re
+import threading
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from rest_framework import exceptions
+from rest_framework.authentication import get_authorization_header
+
+from .authentication import CachedTokenAuthentication
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+PROFILE_QUERY_PARAM = "_profile"
+PROFILE_FLAG_VALUES = {"1", "true", "yes", "on"}
+REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+_profiler_lock = threading.Lock()
+
+
+def _flag_set(value):
+    return value is not None and value.strip().lower() in PROFILE_FLAG_VALUES
+
+
+def profiling_requested(request):
+    if _flag_set(request.META.get(PROFILE_HEADER)):
+        return True
+    # Plain substring check first so un-flagged requests don't pay for QueryDict parsing.
+    if f"{PROFILE_QUERY_PARAM}=" not in request.META.get("QUERY_STRING", ""):
+        return False
+    return _flag_set(request.GET.get(PROFILE_QUERY_PARAM))
+
+
+def is_staff_request(request):
+    """Resolve staff status for a session or token-authenticated request.
+
+    DRF authenticates inside the view, which is too late to decide whether to
+    start the profiler, so token credentials are checked here directly.
+    """
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    auth = get_authorization_header(request).split()
+    if len(auth) != 2 or auth[0].lower() != b"token":
+        return False
+    try:
+        user, _ = CachedTokenAuthentication().authenticate_credentials(auth[1].decode())
+    except (exceptions.AuthenticationFailed, UnicodeError):
+        return False
+    return user.is_staff
+
+
+def profile_dir():
+    return Path(settings.PROFILE_DIR)
+
+
+def profile_path(request_id):
+    if not REQUEST_ID_RE.match(request_id):
+        return None
+    return profile_dir() / f"{request_id}.prof"
+
+
+def request_id_for(request):
+    """Profile id: the client's X-Request-ID (if usable) plus a random suffix.
+
+    The suffix keeps a client that reuses an id from overwriting an earlier profile.
+    """
+    suffix = uuid.uuid4().hex
+    request_id = request.META.get("HTTP_X_REQUEST_ID", "")
+    if REQUEST_ID_RE.match(request_id):
+        return f"{request_id[:55]}-{suffix[:8]}"
+    return suffix
+
+
+def run_profiled(request_id, func, *args):
+    """Call ``func(*args)`` under cProfile and save the stats for ``request_id``.
+
+    Returns ``(result, profiled)``. Only one profiler can be active per
+    process, so a request arriving while another is being profiled runs
+    normally with ``profiled=False``.
+    """
+    if not _profiler_lock.acquire(blocking=False):
+        return func(*args), False
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args), True
+    finally:
+        try:
+            directory = profile_dir()
+            directory.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(directory / f"{request_id}.prof")
+            _prune(directory)
+        finally:
+            _profiler_lock.release()
+
+
+def _prune(directory):
+    keep = getattr(settings, "PROFILE_MAX_FILES", 100)
+    files = sorted(directory.glob("*.prof"), key=lambda path: path.stat().st_mtime, reverse=True)
+    for path in files[keep:]:
+        path.unlink(missing_ok=True)
+
+
+def render_text(path, limit=50):
+    """Top ``limit`` functions by cumulative time, as pstats prints them."""
+    out = io.StringIO()
+    stats = pstats.Stats(str(path), stream=out)
+    stats.sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
@@ -0,0 +1,65 @@
+"""
+Sliding-window rate limiting on the Django cache.
+
+Each limiter keeps one counter per fixed window and estimates the sliding
+window as ``previous * (1 - elapsed_fraction) + current``. A check is two
+cache reads plus one atomic ``incr``, independent of how many rows any table
+holds. Use a shared cache backend when running several processes.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+
+
+class RateLimiter:
+    def __init__(self, name, limit, window_seconds):
+        self.name = name
+        self.limit = limit
+        self.window = window_seconds
+
+    def _key(self, identifier, window_index):
+        digest = hashlib.sha256(str(identifier).lower().encode()).hexdigest()[:32]
+        return f"ratelimit:{self.name}:{digest}:{window_index}"
+
+    def _estimate(self, previous, current, now):
+        elapsed = (now % self.window) / self.window
+        return previous * (1 - elapsed) + current
+
+    def hit(self, identifier, now=None):
+        """Count one request for ``identifier``; return False if it exceeds the limit.
+
+        Rejected requests are not counted, so a client is let back in as soon
+        as the window slides past its earlier requests.
+        """
+        now = time.time() if now is None else now
+        index = int(now // self.window)
+        key = self._key(identifier, index)
+        previous = cache.get(self._key(identifier, index - 1), 0)
+
+        # Counters must outlive their own window to serve as "previous".
+        cache.add(key, 0, timeout=self.window * 2)
+        try:
+            current = cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr(); start the window over.
+            cache.set(key, 1, timeout=self.window * 2)
+            current = 1
+
+        if self._estimate(previous, current, now) > self.limit:
+            self.undo(identifier, now)
+            return False
+        return True
+
+    def undo(self, identifier, now=None):
+        """Take back a hit, e.g. when another limiter rejected the same request."""
+        now = time.time() if now is None else now
+        try:
+            cache.decr(self._key(identifier, int(now // self.window)))
+        except ValueError:
+            pass
+
+    def reset(self, identifier, now=None):
+        now = time.time() if now is None else now
+        index = int(now // self.window)
+        cache.delete_many([self._key(identifier, index), self._key(identifier, index - 1)])
@@ -33,6 +33,47 @@ class UserMovieStateSerializer(serializers.ModelSerializer):
         return value
 
 
+class UserMovieStateOperationSerializer(serializers.ModelSerializer):
+    """One (movie_id, fields) entry of a batch state mutation."""
+
+    movie_id = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        model = UserMovieState
+        fields = [
+            "movie_id",
+            "status",
+            "progress_percent",
+            "position_seconds",
+            "in_my_list",
+            "is_favorite",
+            "is_downloaded",
+        ]
+
+    def validate_status(self, value):
+        if value == "":
+            return None
+        return value
+
+
+class UserMovieStateBatchSerializer(serializers.Serializer):
+    MAX_OPERATIONS = 500
+
+    operations = UserMovieStateOperationSerializer(many=True, allow_empty=False)
+
+    def validate_operations(self, value):
+        if len(value) > self.MAX_OPERATIONS:
+            raise serializers.ValidationError(
+                f"At most {self.MAX_OPERATIONS} operations are allowed per batch."
+            )
+        movie_ids = {op["movie_id"] for op in value}
+        existing = set(Movie.objects.filter(pk__in=movie_ids).values_list("pk", flat=True))
+        missing = sorted(movie_ids - existing)
+        if missing:
+            raise serializers.ValidationError(f"Unknown movie ids: {missing}")
+        return value
+
+
 class MovieSerializer(serializers.ModelSerializer):
     user_state = serializers.SerializerMethodField()
 
@@ -60,7 +101,12 @@ class MovieSerializer(serializers.ModelSerializer):
         user = request.user if request else None
         if not user or not user.is_authenticated:
             return None
-        state = obj.states.filter(user=user).first()
+        # Views can attach the user's states up front to avoid a query per movie.
+        prefetched = getattr(obj, "prefetched_user_states", None)
+        if prefetched is not None:
+            state = prefetched[0] if prefetched else None
+        else:
+            state = obj.states.filter(user=user).first()
         if not state:
             return None
         return UserMovieStateSerializer(state).data
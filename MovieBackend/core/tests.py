@@ -1,3 +1,597 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from streaming.models import Movie as StreamingMovie, StreamingLink
+
+from .authentication import TOKEN_CACHE_KEY, CachedTokenAuthentication, invalidate_user_tokens
+from .db_routing import ReadReplicaRouter, pin_to_primary, read_from_replica, routing_scope
+from .management.commands.prune_otps import prunable_batches
+from .models import OTP, EmailOutbox, Movie, UserMovieState
+from .outbox import RETRY_BASE_SECONDS, deliver_pending, enqueue_email
+from .profiling import REQUEST_ID_RE, profiling_requested, request_id_for
+from .serializers import UserMovieStateBatchSerializer
+from .trending import refresh_trending
+from .views import HOME_CACHE_KEY, check_rate_limit, get_client_ip, send_otp
+
+User = get_user_model()
+
+
+class UserStateTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="viewer", email="viewer@example.com", password="pw")
+        self.client.force_authenticate(self.user)
+        self.movies = [Movie.objects.create(title=f"Movie {i}", year=2020) for i in range(3)]
+
+    def state(self, movie):
+        return UserMovieState.objects.get(user=self.user, movie=movie)
+
+
+class UserMovieStateBatchTests(UserStateTestCase):
+    url = reverse("core:user-state-batch")
+
+    def test_upserts_and_returns_states(self):
+        first, second, _ = self.movies
+        UserMovieState.objects.create(user=self.user, movie=first, status="watched", progress_percent=100)
+
+        response = self.client.post(
+            self.url,
+            {
+                "operations": [
+                    {"movie_id": first.pk, "in_my_list": True},
+                    {"movie_id": second.pk, "progress_percent": 10},
+                    # Later operations for the same movie win.
+                    {"movie_id": second.pk, "progress_percent": 40, "status": "watching"},
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({row["movie_id"] for row in response.data}, {first.pk, second.pk})
+        self.assertEqual(UserMovieState.objects.filter(user=self.user).count(), 2)
+        # Fields not in the operation are kept.
+        self.assertEqual(self.state(first).status, "watched")
+        self.assertEqual(self.state(first).progress_percent, 100)
+        self.assertTrue(self.state(first).in_my_list)
+        self.assertEqual(self.state(second).progress_percent, 40)
+
+    def test_accepts_bare_list(self):
+        response = self.client.post(self.url, [{"movie_id": self.movies[0].pk, "is_favorite": True}], format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.state(self.movies[0]).is_favorite)
+        self.assertEqual(self.state(self.movies[0]).status, "watching")
+
+    def test_rejects_unknown_movie_ids(self):
+        missing = Movie.objects.order_by("-pk").first().pk + 1
+        response = self.client.post(
+            self.url,
+            {"operations": [{"movie_id": self.movies[0].pk, "in_my_list": True}, {"movie_id": missing}]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(missing), str(response.data["operations"]))
+        self.assertFalse(UserMovieState.objects.filter(user=self.user).exists())
+
+    def test_operation_limit(self):
+        limit = UserMovieStateBatchSerializer.MAX_OPERATIONS
+        movies = Movie.objects.bulk_create(Movie(title=f"Bulk {i}", year=2020) for i in range(limit + 1))
+        operations = [{"movie_id": movie.pk, "in_my_list": True} for movie in movies]
+
+        response = self.client.post(self.url, {"operations": operations}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(UserMovieState.objects.filter(user=self.user).exists())
+
+        response = self.client.post(self.url, {"operations": operations[:limit]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(UserMovieState.objects.filter(user=self.user, in_my_list=True).count(), limit)
+
+
+class ClearHistoryTests(UserStateTestCase):
+    url = reverse("core:user-state-clear-history")
+
+    def test_counts_only_rows_with_history(self):
+        watched, in_progress, listed = self.movies
+        UserMovieState.objects.create(user=self.user, movie=watched, status="watched")
+        UserMovieState.objects.create(user=self.user, movie=in_progress, position_seconds=30)
+        UserMovieState.objects.create(user=self.user, movie=listed, in_my_list=True)
+        other = User.objects.create_user(username="other", password="pw")
+        UserMovieState.objects.create(user=other, movie=watched, status="watching")
+
+        response = self.client.post(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+        self.assertIsNone(self.state(watched).status)
+        self.assertEqual(self.state(in_progress).position_seconds, 0)
+        self.assertTrue(self.state(listed).in_my_list)
+        self.assertEqual(UserMovieState.objects.get(user=other).status, "watching")
+
+        self.assertEqual(self.client.post(self.url).data["count"], 0)
+
+
+class HomeViewTests(UserStateTestCase):
+    url = reverse("core:home")
+
+    def setUp(self):
+        super().setUp()
+        for movie in self.movies:
+            movie.is_trending = movie.is_new = True
+            movie.save()
+            UserMovieState.objects.create(user=self.user, movie=movie, status="watching", in_my_list=True)
+        streaming_movie = StreamingMovie.objects.create(imdb_id="tt0000001", title="Streaming")
+        StreamingLink.objects.create(movie=streaming_movie, source_url="https://example.com/embed/1")
+
+    def test_query_count(self):
+        with self.assertNumQueries(8):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["my_list"]), 3)
+
+        # A bigger catalog costs the same number of queries.
+        cache.clear()
+        for i in range(5):
+            movie = Movie.objects.create(title=f"Extra {i}", year=2021, is_trending=True, is_new=True)
+            UserMovieState.objects.create(user=self.user, movie=movie, status="watched", in_my_list=True)
+        with self.assertNumQueries(8):
+            self.client.get(self.url)
+
+        # Served from the cache until it expires or is invalidated.
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_state_write_invalidates_cache(self):
+        self.client.get(self.url)
+        key = HOME_CACHE_KEY.format(user_id=self.user.pk)
+        self.assertIsNotNone(cache.get(key))
+
+        response = self.client.post(
+            reverse("core:user-state-set-state"), {"movie_id": self.movies[0].pk, "in_my_list": False}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(cache.get(key))
+
+        my_list = self.client.get(self.url).data["my_list"]
+        self.assertNotIn(self.movies[0].pk, [movie["id"] for movie in my_list])
+
+        self.client.post(reverse("core:user-state-batch"), [{"movie_id": self.movies[1].pk}], format="json")
+        self.assertIsNone(cache.get(key))
+        self.client.get(self.url)
+        self.client.post(reverse("core:user-state-clear-history"))
+        self.assertIsNone(cache.get(key))
+
+    def test_cache_is_per_user(self):
+        self.client.get(self.url)
+        other = User.objects.create_user(username="other", password="pw")
+        self.client.force_authenticate(other)
+
+        self.assertEqual(self.client.get(self.url).data["my_list"], [])
+
+
+@override_settings(OTP_RATE_LIMITS={"email": (2, 3600), "ip": (20, 3600)})
+class OTPRateLimitTests(APITestCase):
+    email = "limited@example.com"
+
+    def setUp(self):
+        cache.clear()
+
+    def test_limit_per_email(self):
+        for _ in range(2):
+            self.assertTrue(check_rate_limit(self.email, "verify", ip="10.0.0.1"))
+        self.assertFalse(check_rate_limit(self.email, "verify", ip="10.0.0.1"))
+        # Other purposes and addresses have their own counters.
+        self.assertTrue(check_rate_limit(self.email, "reset", ip="10.0.0.1"))
+        self.assertTrue(check_rate_limit("other@example.com", "verify", ip="10.0.0.1"))
+
+    def test_rejection_by_one_limit_undoes_the_others(self):
+        with override_settings(OTP_RATE_LIMITS={"email": (5, 3600), "ip": (1, 3600)}):
+            self.assertTrue(check_rate_limit(self.email, "verify", ip="10.0.0.1"))
+            for _ in range(3):
+                self.assertFalse(check_rate_limit(self.email, "verify", ip="10.0.0.1"))
+        # Only the accepted request counted against the email limit.
+        self.assertTrue(check_rate_limit(self.email, "verify", ip="10.0.0.2"))
+        self.assertFalse(check_rate_limit(self.email, "verify", ip="10.0.0.2"))
+
+    def test_no_global_limit_across_clients(self):
+        # A flood from many addresses must not lock out anyone else.
+        for i in range(600):
+            self.assertTrue(check_rate_limit(f"user{i}@example.com", "verify", ip=f"10.1.{i // 256}.{i % 256}"))
+        self.assertTrue(check_rate_limit(self.email, "verify", ip="10.0.0.1"))
+
+    def test_client_ip_behind_proxies(self):
+        request = RequestFactory().get(
+            "/", REMOTE_ADDR="192.168.0.10", HTTP_X_FORWARDED_FOR="6.6.6.6, 203.0.113.7, 192.168.0.9"
+        )
+        self.assertEqual(get_client_ip(request), "192.168.0.10")
+        with override_settings(TRUSTED_PROXY_COUNT=1):
+            self.assertEqual(get_client_ip(request), "192.168.0.9")
+        with override_settings(TRUSTED_PROXY_COUNT=2):
+            # The spoofed left-most entry is never used.
+            self.assertEqual(get_client_ip(request), "203.0.113.7")
+        with override_settings(TRUSTED_PROXY_COUNT=2):
+            direct = RequestFactory().get("/", REMOTE_ADDR="203.0.113.8")
+            self.assertEqual(get_client_ip(direct), "203.0.113.8")
+
+    def test_failed_send_is_not_counted(self):
+        with mock.patch("core.views.enqueue_email", side_effect=DatabaseError("outbox unavailable")):
+            for _ in range(3):
+                with self.assertRaises(DatabaseError):
+                    send_otp(self.email, "verify", ip="10.0.0.1")
+        self.assertFalse(OTP.objects.exists())
+
+        for _ in range(2):
+            self.assertIsNone(send_otp(self.email, "verify", ip="10.0.0.1")[1])
+        self.assertIsNotNone(send_otp(self.email, "verify", ip="10.0.0.1")[1])
+        self.assertEqual(OTP.objects.filter(email=self.email).count(), 2)
+
+    def test_request_view_returns_429(self):
+        url = reverse("core:otp-request")
+        payload = {"email": self.email, "purpose": "verify"}
+        for _ in range(2):
+            self.assertEqual(self.client.post(url, payload, format="json").status_code, 200)
+        self.assertEqual(self.client.post(url, payload, format="json").status_code, 429)
+
+
+class EmailOutboxTests(TestCase):
+    """deliver_pending against the locmem backend the test runner installs."""
+
+    def setUp(self):
+        self.row = enqueue_email("reader@example.com", "Your code", "123456")
+
+    def refresh(self):
+        self.row.refresh_from_db()
+        return self.row
+
+    def make_due(self):
+        EmailOutbox.objects.filter(pk=self.row.pk).update(next_attempt_at=timezone.now())
+
+    def test_enqueued_email_is_sent(self):
+        self.assertEqual(mail.outbox, [])
+
+        result = deliver_pending()
+
+        self.assertEqual((result.sent, result.retried, result.failed), (1, 0, 0))
+        self.assertEqual([m.to for m in mail.outbox], [["reader@example.com"]])
+        self.assertEqual(mail.outbox[0].subject, "Your code")
+        row = self.refresh()
+        self.assertEqual((row.status, row.attempts), ("sent", 1))
+        self.assertIsNotNone(row.sent_at)
+        # Sent rows are never claimed again.
+        self.assertEqual(deliver_pending().sent, 0)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_failure_backs_off_exponentially(self):
+        with mock.patch.object(LocmemEmailBackend, "send_messages", side_effect=OSError("550 mailbox busy")):
+            for attempt in (1, 2, 3):
+                self.make_due()
+                started = timezone.now()
+                self.assertEqual(deliver_pending(max_attempts=5).retried, 1)
+                row = self.refresh()
+                self.assertEqual((row.status, row.attempts), ("pending", attempt))
+                self.assertIn("mailbox busy", row.last_error)
+                delay = (row.next_attempt_at - started).total_seconds()
+                expected = RETRY_BASE_SECONDS * 2 ** (attempt - 1)
+                self.assertGreaterEqual(delay, expected)
+                self.assertLess(delay, expected + 5)
+        # Not due yet, so nothing is claimed.
+        self.assertEqual(deliver_pending().retried, 0)
+
+    def test_marked_failed_after_max_attempts(self):
+        with mock.patch.object(LocmemEmailBackend, "send_messages", side_effect=OSError("550 no such user")):
+            for _ in range(2):
+                self.make_due()
+                result = deliver_pending(max_attempts=3)
+            self.assertEqual(result.retried, 1)
+            self.make_due()
+            result = deliver_pending(max_attempts=3)
+
+        self.assertEqual((result.retried, result.failed), (0, 1))
+        row = self.refresh()
+        self.assertEqual((row.status, row.attempts), ("failed", 3))
+        self.make_due()
+        self.assertEqual(deliver_pending(max_attempts=3).failed, 0)
+
+    def test_connection_failure_releases_the_batch(self):
+        other = enqueue_email("second@example.com", "Your code", "654321")
+        with mock.patch.object(LocmemEmailBackend, "open", side_effect=ConnectionRefusedError("smtp down")):
+            started = timezone.now()
+            result = deliver_pending()
+
+        self.assertEqual((result.sent, result.retried), (0, 2))
+        self.assertEqual(mail.outbox, [])
+        for row in EmailOutbox.objects.filter(pk__in=[self.row.pk, other.pk]):
+            self.assertEqual((row.status, row.attempts), ("pending", 1))
+            self.assertIn("smtp down", row.last_error)
+            # Backed off by the first retry delay, not held for the whole claim lease.
+            self.assertLess((row.next_attempt_at - started).total_seconds(), RETRY_BASE_SECONDS + 5)
+
+        self.make_due()
+        EmailOutbox.objects.filter(pk=other.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(deliver_pending().sent, 2)
+
+    def test_send_queued_email_survives_connection_failure(self):
+        out = StringIO()
+        with mock.patch.object(LocmemEmailBackend, "open", side_effect=ConnectionRefusedError("smtp down")):
+            call_command("send_queued_email", stdout=out)
+
+        self.assertIn("retried=1", out.getvalue())
+        self.assertEqual(self.refresh().attempts, 1)
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="token-user", email="token@example.com", password="pw")
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.backend = CachedTokenAuthentication()
+
+    def test_cached_lookup_runs_no_queries(self):
+        self.backend.authenticate_credentials(self.token.key)
+        with self.assertNumQueries(0):
+            user, token = self.backend.authenticate_credentials(self.token.key)
+            self.assertEqual(user.pk, self.user.pk)
+            self.assertTrue(user.is_authenticated)
+            self.assertEqual((user.username, user.email), ("token-user", "token@example.com"))
+            self.assertEqual(token.key, self.token.key)
+        # The password hash is not cached; reading it loads it.
+        with self.assertNumQueries(1):
+            self.assertTrue(user.check_password("pw"))
+
+    def test_cache_holds_no_secrets(self):
+        self.backend.authenticate_credentials(self.token.key)
+        cached = cache.get(TOKEN_CACHE_KEY.format(key=self.token.key))
+        self.assertEqual(cached["id"], self.user.pk)
+        self.assertTrue(cached["is_active"])
+        self.assertNotIn("password", cached)
+
+    def test_cold_cache_runs_one_query_per_request(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(reverse("core:me")).data["username"], "token-user")
+
+    def test_warm_cache_runs_no_auth_queries(self):
+        movie = Movie.objects.create(title="Cached", year=2020)
+        UserMovieState.objects.create(user=self.user, movie=movie, in_my_list=True)
+        self.client.get(reverse("core:me"))
+
+        # Only the view's own queries run.
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse("core:me")).data["email"], "token@example.com")
+        with self.assertNumQueries(1):
+            self.assertEqual(len(self.client.get(reverse("core:user-state-list")).data), 1)
+        # The movies, then the user's states (prefetch).
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get(reverse("core:movie-list")).status_code, 200)
+
+    def test_saving_a_cached_user_keeps_the_password(self):
+        user, _ = self.backend.authenticate_credentials(self.token.key)
+        user, _ = self.backend.authenticate_credentials(self.token.key)
+        user.first_name = "Renamed"
+        user.save()
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, "Renamed")
+        self.assertTrue(self.user.check_password("pw"))
+
+    def test_logout_invalidates_token(self):
+        self.assertEqual(self.client.get(reverse("core:me")).status_code, 200)
+        self.assertEqual(self.client.post(reverse("core:logout")).status_code, 200)
+
+        self.assertIsNone(cache.get(TOKEN_CACHE_KEY.format(key=self.token.key)))
+        self.assertEqual(self.client.get(reverse("core:me")).status_code, 401)
+
+    def test_token_delete_invalidates_cache(self):
+        self.backend.authenticate_credentials(self.token.key)
+        self.token.delete()
+
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.backend.authenticate_credentials(self.token.key)
+
+    def test_deactivation_invalidates_cache(self):
+        self.backend.authenticate_credentials(self.token.key)
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.backend.authenticate_credentials(self.token.key)
+
+    def test_bulk_deactivation_needs_explicit_invalidation(self):
+        self.backend.authenticate_credentials(self.token.key)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        # No signal for QuerySet.update(): the cached entry is still served...
+        self.backend.authenticate_credentials(self.token.key)
+
+        invalidate_user_tokens([self.user.pk])
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.backend.authenticate_credentials(self.token.key)
+
+    def test_views_work_with_cached_user(self):
+        movie = Movie.objects.create(title="Cached", year=2020)
+        self.backend.authenticate_credentials(self.token.key)
+
+        response = self.client.post(
+            reverse("core:user-state-set-state"), {"movie_id": movie.pk, "in_my_list": True}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(UserMovieState.objects.get(user=self.user, movie=movie).in_my_list)
+        self.assertEqual(len(self.client.get(reverse("core:home")).data["my_list"]), 1)
+
+
+@mock.patch("core.db_routing.replica_alias", return_value="replica")
+class ReadReplicaRouterTests(SimpleTestCase):
+    router = ReadReplicaRouter()
+
+    def test_reads_stay_on_primary_without_opt_in(self, _):
+        self.assertIsNone(self.router.db_for_read(Movie))
+        with routing_scope():
+            self.assertIsNone(self.router.db_for_read(Movie))
+
+    def test_opted_in_reads_go_to_replica(self, _):
+        with routing_scope():
+            read_from_replica()
+            self.assertEqual(self.router.db_for_read(Movie), "replica")
+        # The opt-in ends with its scope.
+        self.assertIsNone(self.router.db_for_read(Movie))
+
+    def test_writes_go_to_primary_and_pin_later_reads(self, _):
+        with routing_scope(replica_reads=True):
+            self.assertEqual(self.router.db_for_read(Movie), "replica")
+            self.assertEqual(self.router.db_for_write(Movie), "default")
+            self.assertIsNone(self.router.db_for_read(Movie))
+        with routing_scope(replica_reads=True):
+            self.assertEqual(self.router.db_for_read(Movie), "replica")
+
+    def test_pin_to_primary(self, _):
+        with routing_scope(replica_reads=True):
+            pin_to_primary()
+            self.assertIsNone(self.router.db_for_read(Movie))
+        # Outside a scope there is nothing to pin.
+        pin_to_primary()
+        self.assertIsNone(self.router.db_for_read(Movie))
+
+    def test_replica_never_migrated(self, _):
+        self.assertIs(self.router.allow_migrate("replica", "core"), False)
+        self.assertIsNone(self.router.allow_migrate("default", "core"))
+
+
+class ProfilingRequestedTests(SimpleTestCase):
+    factory = RequestFactory()
+
+    def test_truthy_flags(self):
+        for request in (
+            self.factory.get("/api/home/", HTTP_X_PROFILE="1"),
+            self.factory.get("/api/home/", HTTP_X_PROFILE="true"),
+            self.factory.get("/api/home/?_profile=1"),
+            self.factory.get("/api/home/?page=2&_profile=yes"),
+        ):
+            self.assertTrue(profiling_requested(request))
+
+    def test_other_values_are_ignored(self):
+        for request in (
+            self.factory.get("/api/home/"),
+            self.factory.get("/api/home/", HTTP_X_PROFILE="0"),
+            self.factory.get("/api/home/", HTTP_X_PROFILE=""),
+            self.factory.get("/api/home/?_profile=0"),
+            self.factory.get("/api/home/?_profile="),
+            self.factory.get("/api/home/?x_profile=1"),
+        ):
+            self.assertFalse(profiling_requested(request))
+
+    def test_repeated_request_id_gets_a_new_profile_id(self):
+        request = self.factory.get("/api/home/", HTTP_X_REQUEST_ID="checkout-debug")
+        first, second = request_id_for(request), request_id_for(request)
+
+        self.assertNotEqual(first, second)
+        self.assertTrue(first.startswith("checkout-debug-"))
+
+    def test_profile_id_is_always_valid(self):
+        for header in ("x" * 64, "../../etc/passwd", ""):
+            request = self.factory.get("/api/home/", HTTP_X_REQUEST_ID=header)
+            self.assertRegex(request_id_for(request), REQUEST_ID_RE)
+
+
+class PruneOTPsTests(TestCase):
+    def otp(self, expires_in_minutes, is_used=False):
+        return OTP.objects.create(
+            email="pruned@example.com",
+            code="123456",
+            purpose="verify",
+            is_used=is_used,
+            expires_at=timezone.now() + timedelta(minutes=expires_in_minutes),
+        )
+
+    def prune(self, *args):
+        call_command("prune_otps", "--sleep", "0", *args, stdout=StringIO())
+
+    def test_deletes_used_and_long_expired_rows(self):
+        live = self.otp(10)
+        in_grace = self.otp(-30)
+        self.otp(-90)
+        self.otp(10, is_used=True)
+        self.otp(-90, is_used=True)
+
+        self.prune("--grace-minutes", "60")
+
+        self.assertEqual(sorted(OTP.objects.values_list("pk", flat=True)), [live.pk, in_grace.pk])
+
+    def test_deletes_in_batches(self):
+        for _ in range(5):
+            self.otp(10, is_used=True)
+        for _ in range(2):
+            self.otp(-120)
+        keep = self.otp(10)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.prune("--batch-size", "2")
+
+        deletes = [q["sql"] for q in queries.captured_queries if q["sql"].startswith("DELETE")]
+        # Used rows in batches of 2, 2 and 1, then both expired rows at once.
+        self.assertEqual(len(deletes), 4)
+        self.assertEqual(list(OTP.objects.values_list("pk", flat=True)), [keep.pk])
+
+    @skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN is SQLite syntax")
+    def test_batches_use_indexes(self):
+        used, expired = prunable_batches(timezone.now())
+        self.assertIn("USING INDEX core_otp_used_idx", used.values_list("pk", flat=True)[:1000].explain())
+        self.assertIn("core_otp_expires_idx", expired.values_list("pk", flat=True)[:1000].explain())
+
+
+class ComputeTrendingTests(TestCase):
+    def setUp(self):
+        Movie.objects.update(is_trending=False, rank=None)
+        self.seeded = [Movie.objects.create(title=f"Seeded {i}", year=2020, is_trending=True) for i in range(2)]
+        self.user = User.objects.create_user(username="watcher", password="pw")
+
+    def trending(self):
+        return list(Movie.objects.filter(is_trending=True).order_by("rank", "pk").values_list("title", "rank"))
+
+    def test_empty_window_keeps_current_ranking(self):
+        before = self.trending()
+        out = StringIO()
+
+        call_command("compute_trending", stdout=out)
+
+        self.assertEqual(self.trending(), before)
+        self.assertIn("kept the current trending ranking", out.getvalue())
+
+    def test_activity_replaces_seeded_ranking(self):
+        popular, quiet = (Movie.objects.create(title=title, year=2021) for title in ("Popular", "Quiet"))
+        other = User.objects.create_user(username="other", password="pw")
+        UserMovieState.objects.create(user=self.user, movie=popular, status="watched")
+        UserMovieState.objects.create(user=other, movie=popular, in_my_list=True)
+        UserMovieState.objects.create(user=self.user, movie=quiet, in_my_list=True)
+
+        result = refresh_trending(top=10)
+
+        self.assertFalse(result.kept_previous)
+        self.assertEqual(self.trending(), [("Popular", 1), ("Quiet", 2)])
+
+    def test_half_life_must_be_positive(self):
+        for value in ("0", "-1", "nan", "inf"):
+            with self.subTest(value=value), self.assertRaisesMessage(CommandError, "must be a positive number"):
+                call_command("compute_trending", f"--half-life-hours={value}", stdout=StringIO())
+        call_command("compute_trending", "--half-life-hours=0.5", stdout=StringIO())
+
+    def test_old_activity_counts_as_empty(self):
+        state = UserMovieState.objects.create(user=self.user, movie=self.seeded[0], status="watched")
+        UserMovieState.objects.filter(pk=state.pk).update(last_watched_at=timezone.now() - timedelta(days=60))
+
+        self.assertTrue(refresh_trending(window_days=30).kept_previous)
+        self.assertEqual(len(self.trending()), 2)
@@ -0,0 +1,104 @@
+"""
+Time-decayed popularity scoring for core.Movie.
+
+Every UserMovieState row is treated as an engagement event stamped with
+``last_watched_at``. Each event contributes a weight that halves every
+``half_life_hours``; a movie's score is the sum of its events. The top
+movies by score get ``rank`` 1..N and ``is_trending``; everything else is
+cleared. When the window has no activity at all the current ranking (the
+seeded one on a fresh install) is left alone rather than emptied.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Movie, UserMovieState
+
+logger = logging.getLogger(__name__)
+
+# Relative weight of each kind of engagement.
+WATCHED_WEIGHT = 3.0
+WATCHING_WEIGHT = 2.0
+MY_LIST_WEIGHT = 1.0
+FAVORITE_WEIGHT = 1.5
+
+
+@dataclass
+class TrendingResult:
+    scored: int
+    updated: int
+    kept_previous: bool = False
+
+
+def compute_scores(movie_ids, statuses, in_my_list, is_favorite, ages_hours, half_life_hours):
+    """Return ``(unique_movie_ids, scores)`` for the given event arrays."""
+    movie_ids = np.asarray(movie_ids, dtype=np.int64)
+    if movie_ids.size == 0:
+        return movie_ids, np.zeros(0)
+
+    statuses = np.asarray(statuses, dtype=object)
+    weights = (
+        np.where(statuses == "watched", WATCHED_WEIGHT, 0.0)
+        + np.where(statuses == "watching", WATCHING_WEIGHT, 0.0)
+        + np.asarray(in_my_list, dtype=bool) * MY_LIST_WEIGHT
+        + np.asarray(is_favorite, dtype=bool) * FAVORITE_WEIGHT
+    )
+    ages = np.clip(np.asarray(ages_hours, dtype=np.float64), 0.0, None)
+    decayed = weights * np.exp2(-ages / half_life_hours)
+
+    unique_ids, inverse = np.unique(movie_ids, return_inverse=True)
+    scores = np.bincount(inverse, weights=decayed, minlength=unique_ids.size)
+    return unique_ids, scores
+
+
+def refresh_trending(top=10, half_life_hours=72.0, window_days=30, dry_run=False):
+    """Recompute rank/is_trending and write only the movies whose values changed."""
+    now = timezone.now()
+    rows = list(
+        UserMovieState.objects.filter(last_watched_at__gte=now - timedelta(days=window_days))
+        .values_list("movie_id", "status", "in_my_list", "is_favorite", "last_watched_at")
+    )
+    if rows:
+        movie_ids, statuses, in_my_list, is_favorite, seen_at = zip(*rows)
+        ages_hours = [(now - ts).total_seconds() / 3600.0 for ts in seen_at]
+    else:
+        movie_ids = statuses = in_my_list = is_favorite = ages_hours = ()
+
+    unique_ids, scores = compute_scores(
+        movie_ids, statuses, in_my_list, is_favorite, ages_hours, half_life_hours
+    )
+
+    # Highest score first, lower id wins ties so ranks are stable between runs.
+    positive = scores > 0
+    unique_ids, scores = unique_ids[positive], scores[positive]
+    order = np.lexsort((unique_ids, -scores))[:top]
+    new_ranks = {int(unique_ids[i]): position for position, i in enumerate(order, start=1)}
+    if not new_ranks:
+        logger.info("Trending refresh: no activity in the window, keeping the current ranking")
+        return TrendingResult(scored=0, updated=0, kept_previous=True)
+
+    current = (
+        Movie.objects.filter(rank__isnull=False)
+        | Movie.objects.filter(is_trending=True)
+        | Movie.objects.filter(pk__in=new_ranks)
+    )
+
+    changed = []
+    for movie in current.only("id", "rank", "is_trending"):
+        rank = new_ranks.get(movie.pk)
+        is_trending = rank is not None
+        if movie.rank != rank or movie.is_trending != is_trending:
+            movie.rank = rank
+            movie.is_trending = is_trending
+            changed.append(movie)
+
+    if changed and not dry_run:
+        with transaction.atomic():
+            Movie.objects.bulk_update(changed, ["rank", "is_trending"])
+
+    logger.info(f"Trending refresh: {len(unique_ids)} scored, {len(changed)} changed")
+    return TrendingResult(scored=int(unique_ids.size), updated=len(changed))
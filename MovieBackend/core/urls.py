@@ -2,14 +2,17 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
+    HomeView,
     LoginView,
     LogoutView,
     MeView,
+    MetricsView,
     MovieViewSet,
     OTPRequestView,
     OTPVerifyView,
     PasswordResetConfirmView,
     PasswordResetRequestView,
+    ProfileDownloadView,
     SignupView,
     UserMovieStateViewSet,
 )
@@ -22,6 +25,9 @@ router.register(r"user-states", UserMovieStateViewSet, basename="user-state")
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("home/", HomeView.as_view(), name="home"),
+    path("_metrics", MetricsView.as_view(), name="metrics"),
+    path("_profiles/<str:request_id>", ProfileDownloadView.as_view(), name="profile-download"),
     path("auth/signup/", SignupView.as_view(), name="signup"),
     path("auth/signup", SignupView.as_view(), name="signup-noslash"),
     path("auth/login/", LoginView.as_view(), name="login"),
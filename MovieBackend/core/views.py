@@ -1,18 +1,32 @@
 import random
+import time
 from datetime import timedelta
 
 from django.contrib.auth import get_user_model
+from django.conf import settings
 from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
+from django.http import FileResponse, HttpResponse
+from django.db import transaction
+from django.db.models import Case, F, Prefetch, Q, When
 from django.utils import timezone
-from django.core.mail import send_mail
 from rest_framework import mixins, status, viewsets
 from rest_framework.authtoken.models import Token
 from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.filters import OrderingFilter
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from streaming.models import Movie as StreamingMovie, StreamingLink
+from streaming.serializers import MovieSerializer as StreamingMovieSerializer
+
+from .db_routing import ReplicaReadMixin
+from .metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY
 from .models import Movie, OTP, UserMovieState
+from .outbox import enqueue_email
+from .profiling import profile_path, render_text
+from .ratelimit import RateLimiter
 from .serializers import (
     LoginSerializer,
     MovieSerializer,
@@ -20,36 +34,112 @@ from .serializers import (
     OTPVerifySerializer,
     PasswordResetSerializer,
     SignupSerializer,
+    UserMovieStateBatchSerializer,
     UserMovieStateSerializer,
     UserSerializer,
 )
 
 User = get_user_model()
 
+BATCH_UPDATE_FIELDS = [
+    "status",
+    "progress_percent",
+    "position_seconds",
+    "in_my_list",
+    "is_favorite",
+    "is_downloaded",
+    "last_watched_at",
+]
+
+HOME_CACHE_KEY = "home-rails:{user_id}"
+
+
+def invalidate_home_cache(user_id):
+    cache.delete(HOME_CACHE_KEY.format(user_id=user_id))
+
+
+def user_states_prefetch(user):
+    """Attach ``user``'s state to each movie for MovieSerializer.get_user_state."""
+    return Prefetch(
+        "states",
+        queryset=UserMovieState.objects.filter(user=user),
+        to_attr="prefetched_user_states",
+    )
+
 
 def generate_otp():
     return f"{random.randint(0, 999999):06d}"
 
 
-def check_rate_limit(email, purpose, limit=5, minutes=60):
-    window_start = timezone.now() - timedelta(minutes=minutes)
-    count = OTP.objects.filter(email=email, purpose=purpose, created_at__gte=window_start).count()
-    return count < limit
+def _otp_limiter(scope):
+    limit, window_seconds = settings.OTP_RATE_LIMITS[scope]
+    return RateLimiter(f"otp-{scope}", limit, window_seconds)
+
+
+def _otp_limits(email, purpose, ip=None):
+    checks = [(_otp_limiter("email"), f"{purpose}:{email}")]
+    if ip:
+        checks.append((_otp_limiter("ip"), ip))
+    return checks
+
+
+def check_rate_limit(email, purpose, ip=None, now=None):
+    """Apply the per email and per IP OTP limits from OTP_RATE_LIMITS."""
+    now = time.time() if now is None else now
+    passed = []
+    for limiter, identifier in _otp_limits(email, purpose, ip=ip):
+        if not limiter.hit(identifier, now=now):
+            for done, done_identifier in passed:
+                done.undo(done_identifier, now=now)
+            return False
+        passed.append((limiter, identifier))
+    return True
 
 
-def send_otp(email, purpose):
-    if not check_rate_limit(email, purpose):
+def undo_rate_limit(email, purpose, ip=None, now=None):
+    """Take back the hits of a check_rate_limit call whose OTP was never sent."""
+    for limiter, identifier in _otp_limits(email, purpose, ip=ip):
+        limiter.undo(identifier, now=now)
+
+
+def get_client_ip(request):
+    """The client address used for the per-IP OTP limit and the metrics allowlist.
+
+    With TRUSTED_PROXY_COUNT = 0 this is REMOTE_ADDR, which behind a reverse
+    proxy is the proxy itself, so every client would share one bucket. Set it
+    to the number of proxies in front of Django to take the address they
+    appended to X-Forwarded-For instead; entries further left are
+    client-supplied and ignored.
+    """
+    proxies = getattr(settings, "TRUSTED_PROXY_COUNT", 0)
+    if proxies:
+        forwarded = [
+            addr.strip() for addr in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if addr.strip()
+        ]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get("REMOTE_ADDR")
+
+
+def send_otp(email, purpose, ip=None):
+    now = time.time()
+    if not check_rate_limit(email, purpose, ip=ip, now=now):
         return None, "Too many OTP requests. Please try later."
     code = generate_otp()
     expires_at = timezone.now() + timedelta(minutes=10)
-    OTP.objects.create(email=email, code=code, purpose=purpose, expires_at=expires_at)
-    send_mail(
-        subject="Your verification code",
-        message=f"Your {purpose} code is {code}. It expires in 10 minutes.",
-        from_email=None,
-        recipient_list=[email],
-        fail_silently=False,
-    )
+    # Delivery happens in the send_queued_email worker; the request only writes rows.
+    try:
+        with transaction.atomic():
+            OTP.objects.create(email=email, code=code, purpose=purpose, expires_at=expires_at)
+            enqueue_email(
+                to_email=email,
+                subject="Your verification code",
+                body=f"Your {purpose} code is {code}. It expires in 10 minutes.",
+            )
+    except Exception:
+        # Nothing was queued, so the attempt must not count against the limits.
+        undo_rate_limit(email, purpose, ip=ip, now=now)
+        raise
     return code, None
 
 
@@ -72,7 +162,7 @@ class SignupView(APIView):
             password=password,
             is_active=False,
         )
-        _, error = send_otp(email, "verify")
+        _, error = send_otp(email, "verify", ip=get_client_ip(request))
         if error:
             return Response({"detail": error}, status=status.HTTP_429_TOO_MANY_REQUESTS)
         return Response({"detail": "Signup successful. Verify OTP sent."}, status=201)
@@ -113,7 +203,7 @@ class OTPRequestView(APIView):
         serializer.is_valid(raise_exception=True)
         email = serializer.validated_data["email"]
         purpose = serializer.validated_data["purpose"]
-        _, error = send_otp(email, purpose)
+        _, error = send_otp(email, purpose, ip=get_client_ip(request))
         if error:
             return Response({"detail": error}, status=status.HTTP_429_TOO_MANY_REQUESTS)
         return Response({"detail": "OTP sent"})
@@ -167,7 +257,7 @@ class PasswordResetRequestView(APIView):
         email = serializer.validated_data["email"]
         if not User.objects.filter(email=email).exists():
             return Response({"detail": "If the email exists, a reset code was sent."})
-        _, error = send_otp(email, "reset")
+        _, error = send_otp(email, "reset", ip=get_client_ip(request))
         if error:
             return Response({"detail": error}, status=status.HTTP_429_TOO_MANY_REQUESTS)
         return Response({"detail": "Reset code sent."})
@@ -209,10 +299,15 @@ class PasswordResetConfirmView(APIView):
         return Response({"detail": "Password reset successful."})
 
 
-class MovieViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+class MovieViewSet(ReplicaReadMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
     queryset = Movie.objects.all()
     serializer_class = MovieSerializer
     permission_classes = [IsAuthenticated]
+    filter_backends = [OrderingFilter]
+    ordering_fields = ["rank", "title", "year", "match_score", "created_at"]
+
+    def get_queryset(self):
+        return super().get_queryset().prefetch_related(user_states_prefetch(self.request.user))
 
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
@@ -222,7 +317,11 @@ class MovieViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.Ge
     @action(detail=True, methods=["get"])
     def recommendations(self, request, pk=None):
         movie = self.get_object()
-        related = Movie.objects.filter(genre__overlap=movie.genre).exclude(pk=movie.pk)[:10]
+        related = (
+            Movie.objects.filter(genre__overlap=movie.genre)
+            .exclude(pk=movie.pk)
+            .prefetch_related(user_states_prefetch(request.user))[:10]
+        )
         serializer = self.get_serializer(related, many=True)
         return Response(serializer.data)
 
@@ -241,9 +340,11 @@ class UserMovieStateViewSet(
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+        invalidate_home_cache(self.request.user.pk)
 
     def perform_update(self, serializer):
         serializer.save(user=self.request.user)
+        invalidate_home_cache(self.request.user.pk)
 
     @action(detail=False, methods=["post"])
     def set_state(self, request):
@@ -255,11 +356,159 @@ class UserMovieStateViewSet(
         serializer = self.get_serializer(state, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save(status=request.data.get("status") or state.status or "watching")
+        invalidate_home_cache(user.pk)
         return Response(serializer.data)
 
+    @action(detail=False, methods=["post"])
+    def batch(self, request):
+        """Apply many set_state operations in one request.
+
+        Accepts ``{"operations": [{"movie_id": 1, "in_my_list": true}, ...]}``
+        (or the bare list) and upserts every state in a single transaction.
+        Later operations for the same movie override earlier ones.
+        """
+        data = request.data
+        if isinstance(data, list):
+            data = {"operations": data}
+        batch = UserMovieStateBatchSerializer(data=data)
+        batch.is_valid(raise_exception=True)
+
+        merged = {}
+        for op in batch.validated_data["operations"]:
+            op = dict(op)
+            merged.setdefault(op.pop("movie_id"), {}).update(op)
+
+        user = request.user
+        with transaction.atomic():
+            existing = {
+                state.movie_id: state
+                for state in UserMovieState.objects.filter(user=user, movie_id__in=merged)
+            }
+            states = []
+            for movie_id, fields in merged.items():
+                state = existing.get(movie_id) or UserMovieState(user=user, movie_id=movie_id)
+                previous_status = state.status
+                for name, value in fields.items():
+                    setattr(state, name, value)
+                # Same status defaulting as set_state.
+                state.status = fields.get("status") or previous_status or "watching"
+                states.append(state)
+
+            UserMovieState.objects.bulk_create(
+                states,
+                update_conflicts=True,
+                unique_fields=["user", "movie"],
+                update_fields=BATCH_UPDATE_FIELDS,
+            )
+        invalidate_home_cache(user.pk)
+
+        results = self.get_queryset().filter(movie_id__in=merged)
+        data = [
+            {"movie_id": state.movie_id, **self.get_serializer(state).data}
+            for state in results
+        ]
+        return Response(data)
+
     @action(detail=False, methods=["post"])
     def clear_history(self, request):
         user = request.user
-        qs = UserMovieState.objects.filter(user=user)
-        qs.update(status=None, progress_percent=0, position_seconds=0)
-        return Response({"detail": "History cleared", "count": qs.count()})
+        count = (
+            UserMovieState.objects.filter(user=user)
+            .filter(Q(status__isnull=False) | Q(progress_percent__gt=0) | Q(position_seconds__gt=0))
+            .update(status=None, progress_percent=0, position_seconds=0)
+        )
+        invalidate_home_cache(user.pk)
+        return Response({"detail": "History cleared", "count": count})
+
+
+class HomeView(APIView):
+    """All home screen rails in one response.
+
+    GET /api/home/ returns trending, new, continue watching, my list and
+    streaming rails. Built with a fixed number of queries and cached per
+    user for HOME_CACHE_TTL seconds; the user's state writes drop the entry.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        key = HOME_CACHE_KEY.format(user_id=request.user.pk)
+        data = cache.get(key)
+        if data is None:
+            data = self.build_rails(request)
+            cache.set(key, data, getattr(settings, "HOME_CACHE_TTL", 60))
+        return Response(data)
+
+    def build_rails(self, request):
+        user = request.user
+        size = getattr(settings, "HOME_RAIL_SIZE", 20)
+        context = {"request": request}
+        movies = Movie.objects.prefetch_related(user_states_prefetch(user))
+
+        trending = movies.filter(is_trending=True).order_by(F("rank").asc(nulls_last=True), "title")[:size]
+        new = movies.filter(is_new=True).order_by("-created_at")[:size]
+
+        states = UserMovieState.objects.filter(user=user).select_related("movie")
+        continue_watching = states.filter(status__isnull=False).order_by(
+            Case(When(status="watching", then=0), default=1), "-last_watched_at"
+        )[:size]
+        my_list = states.filter(in_my_list=True).order_by("-last_watched_at")[:size]
+
+        streaming = StreamingMovie.objects.prefetch_related(
+            Prefetch(
+                "links",
+                queryset=StreamingLink.objects.filter(is_active=True),
+                to_attr="active_links",
+            )
+        ).order_by("-created_at")[:size]
+
+        return {
+            "trending": MovieSerializer(trending, many=True, context=context).data,
+            "new": MovieSerializer(new, many=True, context=context).data,
+            "continue_watching": MovieSerializer(
+                self._movies_for(continue_watching), many=True, context=context
+            ).data,
+            "my_list": MovieSerializer(self._movies_for(my_list), many=True, context=context).data,
+            "streaming": StreamingMovieSerializer(streaming, many=True).data,
+        }
+
+    @staticmethod
+    def _movies_for(states):
+        movies = []
+        for state in states:
+            movie = state.movie
+            movie.prefetched_user_states = [state]
+            movies.append(movie)
+        return movies
+
+
+class MetricsView(APIView):
+    """Prometheus scrape endpoint for this process's request metrics.
+
+    Open to staff users and to addresses in METRICS_ALLOWED_IPS.
+    """
+
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        allowed_ips = getattr(settings, "METRICS_ALLOWED_IPS", [])
+        if not (request.user.is_staff or get_client_ip(request) in allowed_ips):
+            return Response({"detail": "Forbidden"}, status=status.HTTP_403_FORBIDDEN)
+        return HttpResponse(REGISTRY.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+class ProfileDownloadView(APIView):
+    """Download a saved request profile (see core.profiling).
+
+    Returns the raw cProfile dump, or the top functions as text with ?output=text.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, request_id):
+        path = profile_path(request_id)
+        if path is None or not path.exists():
+            return Response({"detail": "Profile not found"}, status=status.HTTP_404_NOT_FOUND)
+        if request.query_params.get("output") == "text":
+            return HttpResponse(render_text(path), content_type="text/plain; charset=utf-8")
+        return FileResponse(path.open("rb"), as_attachment=True, filename=path.name)
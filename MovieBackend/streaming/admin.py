@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Movie, StreamingLink
+from .models import Movie, ScrapeJob, StreamingLink
 
 
 @admin.register(Movie)
@@ -17,3 +17,10 @@ class StreamingLinkAdmin(admin.ModelAdmin):
     list_filter = ("quality", "language", "is_active")
     search_fields = ("movie__title", "source_url")
 
+
+@admin.register(ScrapeJob)
+class ScrapeJobAdmin(admin.ModelAdmin):
+    list_display = ("target_url", "movie", "status", "attempts", "created_at", "finished_at")
+    list_filter = ("status",)
+    search_fields = ("target_url", "movie__title")
+    readonly_fields = ("created_at", "started_at", "finished_at")
@@ -0,0 +1,297 @@
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from streaming.models import ScrapeJob
+from streaming.scraper_utils import build_scrape_plan, scraper_dir
+
+logger = logging.getLogger(__name__)
+
+ASYNCIO_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
+
+
+def requeue_interrupted_jobs():
+    """Jobs left 'running' by a previous service process go back in the queue."""
+    return ScrapeJob.objects.filter(status="running").update(status="pending")
+
+
+def claim_jobs(limit):
+    close_old_connections()
+    with transaction.atomic():
+        jobs = list(
+            ScrapeJob.objects.select_for_update(skip_locked=True)
+            .filter(status="pending")
+            .order_by("created_at", "id")[:limit]
+        )
+        if jobs:
+            ScrapeJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                status="running", started_at=timezone.now(), attempts=F("attempts") + 1
+            )
+    return jobs
+
+
+def finish_job(job_pk, spiders_run, errors):
+    close_old_connections()
+    # A job succeeds if at least one spider finished; the others' errors are kept.
+    failed = bool(errors) and len(errors) >= spiders_run
+    ScrapeJob.objects.filter(pk=job_pk).update(
+        status="failed" if failed else "done",
+        last_error="\n".join(errors)[:5000],
+        finished_at=timezone.now(),
+    )
+
+
+def plan_job(job):
+    close_old_connections()
+    return build_scrape_plan(job.target_url, job.movie_id)
+
+
+class SharedBrowser:
+    """One headless Chromium that every crawl connects to over CDP.
+
+    Without it each Crawler's scrapy-playwright handler launches and tears down
+    its own browser. The browser is a child of this process, so
+    browser_pool.browser_rss_mb still counts its memory.
+    """
+
+    def __init__(self, launch_options, startup_timeout=30):
+        self.launch_options = launch_options or {}
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self.user_data_dir = None
+
+    def executable(self):
+        if self.launch_options.get("executable_path"):
+            return self.launch_options["executable_path"]
+        from playwright.sync_api import sync_playwright
+
+        with sync_playwright() as playwright:
+            return playwright.chromium.executable_path
+
+    def start(self):
+        """Launch the browser and return its CDP endpoint URL."""
+        self.user_data_dir = tempfile.mkdtemp(prefix="crawl-service-chromium-")
+        args = [
+            self.executable(),
+            "--remote-debugging-port=0",
+            f"--user-data-dir={self.user_data_dir}",
+            "--no-first-run",
+            "--no-default-browser-check",
+        ]
+        if self.launch_options.get("headless", True):
+            args.append("--headless")
+        args += list(self.launch_options.get("args", []))
+        args.append("about:blank")
+        self.process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        # Chromium writes the port it picked (and the browser's ws path) here.
+        port_file = Path(self.user_data_dir) / "DevToolsActivePort"
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline and self.process.poll() is None:
+            try:
+                lines = port_file.read_text().splitlines()
+            except OSError:
+                lines = []
+            if len(lines) >= 2:
+                return f"http://127.0.0.1:{lines[0].strip()}"
+            time.sleep(0.1)
+        self.stop()
+        raise CommandError(f"Chromium did not open a DevTools port within {self.startup_timeout}s")
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        if self.user_data_dir:
+            shutil.rmtree(self.user_data_dir, ignore_errors=True)
+            self.user_data_dir = None
+
+
+class CrawlService:
+    """Polls ScrapeJob and runs each job's spiders on one shared reactor.
+
+    Every spider run gets its own Crawler (settings, stats, engine), so a job
+    that fails or times out does not affect the others.
+    """
+
+    def __init__(self, runner, concurrency, poll_interval, timeout, clock=None):
+        self.runner = runner
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        # The reactor unless a test passes a twisted.internet.task.Clock.
+        self.clock = clock
+        self.active = 0
+
+    def start(self):
+        from twisted.internet import task
+
+        self.loop = task.LoopingCall(self.poll)
+        d = self.loop.start(self.poll_interval)
+        d.addErrback(lambda failure: logger.error(f"Crawl service poll loop stopped: {failure.value}"))
+
+    def poll(self):
+        from twisted.internet import threads
+
+        free = self.concurrency - self.active
+        if free <= 0:
+            return None
+        d = threads.deferToThread(claim_jobs, free)
+        d.addCallback(self._start_jobs)
+        # Keep polling after transient database errors.
+        d.addErrback(lambda failure: logger.error(f"Could not claim scrape jobs: {failure.value}"))
+        return d
+
+    def _start_jobs(self, jobs):
+        for job in jobs:
+            self.active += 1
+            d = self.run_job(job)
+            d.addErrback(lambda failure, pk=job.pk: logger.error(f"Scrape job {pk} crashed: {failure.value}"))
+            d.addBoth(self._job_finished)
+
+    def _job_finished(self, _):
+        self.active -= 1
+
+    def run_job(self, job):
+        from twisted.internet import defer, threads
+
+        @defer.inlineCallbacks
+        def run():
+            logger.info(f"Scrape job {job.pk}: {job.target_url}")
+            plan = yield threads.deferToThread(plan_job, job)
+            errors = []
+            for spider_name, spider_kwargs, setting_overrides in plan:
+                try:
+                    yield self.crawl(spider_name, spider_kwargs, setting_overrides)
+                except Exception as e:
+                    logger.warning(f"Scrape job {job.pk} ({spider_name}) failed: {e}")
+                    errors.append(f"{spider_name}: {e}")
+            yield threads.deferToThread(finish_job, job.pk, len(plan), errors)
+            logger.info(f"Scrape job {job.pk} finished ({len(errors)} of {len(plan)} spiders failed)")
+
+        return run()
+
+    def crawl(self, spider_name, spider_kwargs, setting_overrides):
+        from scrapy.crawler import Crawler
+
+        settings = self.runner.settings.copy()
+        settings.setdict(setting_overrides, priority="cmdline")
+        crawler = Crawler(self.runner.spider_loader.load(spider_name), settings)
+        d = self.runner.crawl(crawler, **spider_kwargs)
+        return self.with_timeout(d, crawler.stop, spider_name)
+
+    def with_timeout(self, d, stop, label):
+        """Call ``stop`` if ``d`` hasn't fired after ``timeout`` seconds, then fail it."""
+        clock = self.clock
+        if clock is None:
+            from twisted.internet import reactor as clock
+        timed_out = []
+
+        def on_timeout():
+            timed_out.append(True)
+            logger.warning(f"{label} exceeded {self.timeout}s, stopping it")
+            stop()
+
+        timer = clock.callLater(self.timeout, on_timeout)
+
+        def finished(result):
+            if timer.active():
+                timer.cancel()
+            if timed_out:
+                raise TimeoutError(f"timed out after {self.timeout}s")
+            return result
+
+        d.addBoth(finished)
+        return d
+
+
+class Command(BaseCommand):
+    help = "Run queued on-demand scrapes in one long-lived Scrapy process (set STREAMLINE_CRAWL_SERVICE=1)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Scrape jobs to run at the same time",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds between checks for new jobs",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=int,
+            default=int(os.environ.get("STREAMLINE_SCRAPE_TIMEOUT", "240")),
+            help="Seconds before a single spider run is stopped",
+        )
+        parser.add_argument(
+            "--no-shared-browser",
+            dest="shared_browser",
+            action="store_false",
+            help="Let every crawl launch its own browser instead of sharing one over CDP",
+        )
+
+    def handle(self, *args, **options):
+        path = str(scraper_dir())
+        if path not in sys.path:
+            sys.path.insert(0, path)
+        os.environ.setdefault("SCRAPY_SETTINGS_MODULE", "scraper.settings")
+
+        from scrapy.utils.project import get_project_settings
+        from scrapy.utils.reactor import install_reactor
+
+        settings = get_project_settings()
+        shared_browser = None
+        if options["shared_browser"] and not settings.get("PLAYWRIGHT_CDP_URL"):
+            # Launched before the reactor: Playwright's sync API can't run inside its loop.
+            shared_browser = SharedBrowser(settings.getdict("PLAYWRIGHT_LAUNCH_OPTIONS"))
+            settings.set("PLAYWRIGHT_CDP_URL", shared_browser.start(), priority="cmdline")
+            self.stdout.write(f"Shared browser listening at {settings['PLAYWRIGHT_CDP_URL']}")
+        # scrapy-playwright needs the asyncio reactor; install it before anything imports the default one.
+        install_reactor(settings.get("TWISTED_REACTOR") or ASYNCIO_REACTOR)
+
+        from scrapy.crawler import CrawlerRunner
+        from scrapy.utils.log import configure_logging
+        from twisted.internet import reactor
+
+        configure_logging(settings)
+        runner = CrawlerRunner(settings)
+
+        requeued = requeue_interrupted_jobs()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} interrupted jobs")
+
+        service = CrawlService(
+            runner,
+            concurrency=max(1, options["concurrency"]),
+            poll_interval=options["poll_interval"],
+            timeout=options["timeout"],
+        )
+        reactor.callWhenRunning(service.start)
+        # Let running spiders close cleanly (and flush their pipelines) on Ctrl+C.
+        reactor.addSystemEventTrigger("before", "shutdown", runner.stop)
+        self.stdout.write(
+            f"Crawl service running (concurrency={service.concurrency}, timeout={service.timeout}s)"
+        )
+        try:
+            reactor.run()
+        finally:
+            if shared_browser is not None:
+                shared_browser.stop()
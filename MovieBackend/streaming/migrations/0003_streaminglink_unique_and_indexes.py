@@ -0,0 +1,53 @@
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def dedupe_links(apps, schema_editor):
+    """Keep one StreamingLink per (movie, source_url) before adding the constraint.
+
+    The survivor is the active row checked most recently (highest id on ties).
+    """
+    StreamingLink = apps.get_model("streaming", "StreamingLink")
+    duplicates = (
+        StreamingLink.objects.values("movie_id", "source_url")
+        .annotate(n=Count("id"), max_id=Max("id"))
+        .filter(n__gt=1)
+    )
+    for group in duplicates.iterator():
+        rows = StreamingLink.objects.filter(
+            movie_id=group["movie_id"], source_url=group["source_url"]
+        ).order_by("-is_active", models.F("last_checked").desc(nulls_last=True), "-id")
+        keep = rows.values_list("id", flat=True).first()
+        rows.exclude(id=keep).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("streaming", "0002_movie_original_detail_url"),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_links, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="streaminglink",
+            constraint=models.UniqueConstraint(
+                fields=["movie", "source_url"], name="streaming_link_movie_source_uniq"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="streaminglink",
+            index=models.Index(fields=["movie", "is_active"], name="streaming_link_movie_active"),
+        ),
+        migrations.AddIndex(
+            model_name="streaminglink",
+            index=models.Index(fields=["is_active", "last_checked"], name="streaming_link_active_checked"),
+        ),
+        migrations.AddIndex(
+            model_name="streaminglink",
+            index=models.Index(fields=["last_checked"], name="streaming_link_last_checked"),
+        ),
+        migrations.AddIndex(
+            model_name="movie",
+            index=models.Index(fields=["type", "-created_at"], name="streaming_movie_type_created"),
+        ),
+    ]
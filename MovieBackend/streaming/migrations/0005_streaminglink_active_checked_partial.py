@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Make streaming_link_active_checked a partial index on last_checked.
+
+    On SQLite the ORM writes ``is_active=True`` as a bare ``WHERE is_active``,
+    which the planner can't match against the leading column of the
+    (is_active, last_checked) index, so it was never used. A partial index
+    with the same condition is.
+    """
+
+    dependencies = [
+        ("streaming", "0004_scrapejob"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="streaminglink",
+            name="streaming_link_active_checked",
+        ),
+        migrations.AddIndex(
+            model_name="streaminglink",
+            index=models.Index(
+                fields=["last_checked"],
+                condition=models.Q(is_active=True),
+                name="streaming_link_active_checked",
+            ),
+        ),
+    ]
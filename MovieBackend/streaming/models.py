@@ -17,6 +17,11 @@ class Movie(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["type", "-created_at"], name="streaming_movie_type_created"),
+        ]
+
     def __str__(self):
         return f"{self.title} ({self.year})"
 
@@ -36,6 +41,44 @@ class StreamingLink(models.Model):
     is_active = models.BooleanField(default=True)
     last_checked = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["movie", "source_url"], name="streaming_link_movie_source_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["movie", "is_active"], name="streaming_link_movie_active"),
+            models.Index(
+                fields=["last_checked"], condition=models.Q(is_active=True), name="streaming_link_active_checked"
+            ),
+            models.Index(fields=["last_checked"], name="streaming_link_last_checked"),
+        ]
+
     def __str__(self):
         return f"{self.movie.title} - {self.quality}"
 
+
+class ScrapeJob(models.Model):
+    """On-demand scrape request consumed by the run_crawl_service command."""
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+    movie = models.ForeignKey(Movie, on_delete=models.SET_NULL, null=True, blank=True, related_name="scrape_jobs")
+    target_url = models.URLField(max_length=1000)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="streaming_scrapejob_queue"),
+        ]
+
+    def __str__(self):
+        return f"{self.target_url} ({self.status})"
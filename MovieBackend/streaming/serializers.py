@@ -31,7 +31,9 @@ class MovieSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at", "updated_at", "links"]
     
     def get_links(self, obj):
-        # Only return active links
-        active_links = obj.links.filter(is_active=True)
+        # Only return active links; use them as-is when the view prefetched them.
+        active_links = getattr(obj, "active_links", None)
+        if active_links is None:
+            active_links = obj.links.filter(is_active=True)
         return StreamingLinkSerializer(active_links, many=True).data
 
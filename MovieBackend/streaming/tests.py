@@ -0,0 +1,258 @@
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from .management.commands.run_crawl_service import CrawlService, claim_jobs, requeue_interrupted_jobs
+from core.db_routing import read_from_replica, routing_scope
+
+from .models import Movie, ScrapeJob, StreamingLink
+from .scraper_utils import enqueue_scrape
+
+try:
+    from twisted.internet import defer, task
+except ImportError:  # Twisted comes with Scrapy, which the API alone doesn't need.
+    defer = task = None
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN is SQLite syntax")
+class StreamingLinkQueryPlanTests(TestCase):
+    """The hot StreamingLink queries must be index searches, not table scans."""
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(f"USING INDEX {index_name}", plan)
+
+    def unique_index_name(self):
+        # SQLite backs the UNIQUE constraint with an automatic index.
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA index_list(streaming_streaminglink)")
+            for _, name, unique, origin, _ in cursor.fetchall():
+                if unique and origin == "u":
+                    cursor.execute(f"PRAGMA index_info({name})")
+                    if [row[2] for row in cursor.fetchall()] == ["movie_id", "source_url"]:
+                        return name
+        self.fail("no unique index on (movie_id, source_url)")
+
+    def test_active_links_of_a_movie(self):
+        # MovieViewSet.retrieve and the detail page links.
+        self.assertUsesIndex(
+            StreamingLink.objects.filter(movie_id=1, is_active=True), "streaming_link_movie_active"
+        )
+
+    def test_stale_active_links(self):
+        cutoff = timezone.now() - timedelta(hours=24)
+        self.assertUsesIndex(
+            StreamingLink.objects.filter(is_active=True, last_checked__lt=cutoff),
+            "streaming_link_active_checked",
+        )
+
+    def test_links_older_than(self):
+        # check_link_health --older-than.
+        cutoff = timezone.now() - timedelta(hours=24)
+        self.assertUsesIndex(
+            StreamingLink.objects.filter(last_checked__lt=cutoff), "streaming_link_last_checked"
+        )
+
+    def test_link_by_movie_and_url(self):
+        self.assertUsesIndex(
+            StreamingLink.objects.filter(movie_id=1, source_url="https://example.com/embed/1"),
+            self.unique_index_name(),
+        )
+
+    def test_pipeline_upsert_on_movie_and_url(self):
+        movie = Movie.objects.create(imdb_id="tt0000001", title="Upsert")
+        url = "https://example.com/embed/1"
+        for quality in ("CAM", "1080p"):
+            StreamingLink.objects.bulk_create(
+                [StreamingLink(movie=movie, source_url=url, quality=quality)],
+                update_conflicts=True,
+                unique_fields=["movie", "source_url"],
+                update_fields=["quality"],
+            )
+        self.assertEqual(list(movie.links.values_list("quality", flat=True)), ["1080p"])
+
+
+class EnqueueScrapeTests(TestCase):
+    def test_dedupe_reads_the_primary(self):
+        movie = Movie.objects.create(imdb_id="tt0000005", title="Queued")
+        queued = ScrapeJob.objects.create(movie=movie, target_url="https://example.com/movie/5")
+
+        # A replica read would hit the (unconfigured) alias and raise.
+        with mock.patch("core.db_routing.replica_alias", return_value="replica"), routing_scope():
+            read_from_replica()
+            self.assertEqual(enqueue_scrape("https://example.com/movie/5", movie.pk), queued)
+            other = enqueue_scrape("https://example.com/movie/6")
+
+        self.assertIsNone(other.movie_id)
+        self.assertEqual(ScrapeJob.objects.count(), 2)
+
+
+class DedupeLinksMigrationTests(TransactionTestCase):
+    """0003 collapses duplicate (movie, source_url) links before adding the constraint."""
+
+    migrate_from = [("streaming", "0002_movie_original_detail_url")]
+    migrate_to = [("streaming", "0003_streaminglink_unique_and_indexes")]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        self.old_apps = executor.loader.project_state(self.migrate_from).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def migrate(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.migrate_to)
+        return executor.loader.project_state(self.migrate_to).apps
+
+    def test_keeps_newest_row(self):
+        OldMovie = self.old_apps.get_model("streaming", "Movie")
+        OldLink = self.old_apps.get_model("streaming", "StreamingLink")
+        movie = OldMovie.objects.create(imdb_id="tt0000002", title="Dupes")
+        url = "https://example.com/embed/2"
+        now = timezone.now()
+
+        OldLink.objects.create(movie=movie, source_url=url, last_checked=now - timedelta(days=2))
+        newest = OldLink.objects.create(movie=movie, source_url=url, last_checked=now)
+        OldLink.objects.create(movie=movie, source_url=url, last_checked=None)
+        # An inactive row loses even when it was checked last.
+        OldLink.objects.create(movie=movie, source_url=url, is_active=False, last_checked=now + timedelta(hours=1))
+        # Same check time: the later row wins.
+        other = "https://example.com/embed/3"
+        OldLink.objects.create(movie=movie, source_url=other, last_checked=now)
+        latest = OldLink.objects.create(movie=movie, source_url=other, last_checked=now)
+        single = OldLink.objects.create(movie=movie, source_url="https://example.com/embed/4")
+
+        apps = self.migrate()
+        Link = apps.get_model("streaming", "StreamingLink")
+        self.assertEqual(
+            sorted(Link.objects.values_list("id", flat=True)), sorted([newest.id, latest.id, single.id])
+        )
+
+
+@skipUnless(defer, "Twisted is not installed")
+class CrawlServiceTests(TransactionTestCase):
+    """Queue, claim and timeout handling of run_crawl_service with the spider runs stubbed."""
+
+    def setUp(self):
+        # Run the service's database calls inline instead of on the reactor's thread pool.
+        patcher = mock.patch("twisted.internet.threads.deferToThread", side_effect=defer.maybeDeferred)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch(
+            "streaming.management.commands.run_crawl_service.build_scrape_plan",
+            return_value=[("first", {}, {}), ("second", {}, {})],
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.clock = task.Clock()
+        self.service = CrawlService(runner=None, concurrency=2, poll_interval=1, timeout=60, clock=self.clock)
+        self.runs = []
+        self.service.crawl = self.fake_crawl
+
+    def fake_crawl(self, spider_name, spider_kwargs, setting_overrides):
+        d = defer.Deferred()
+        self.runs.append((spider_name, d))
+        return d
+
+    def job(self, n):
+        return ScrapeJob.objects.create(target_url=f"https://example.com/movie/{n}")
+
+    def status(self, job):
+        job.refresh_from_db()
+        return job.status
+
+    def test_claim_marks_oldest_jobs_running(self):
+        jobs = [self.job(i) for i in range(3)]
+
+        claimed = claim_jobs(2)
+
+        self.assertEqual([job.pk for job in claimed], [jobs[0].pk, jobs[1].pk])
+        self.assertEqual(
+            list(ScrapeJob.objects.order_by("id").values_list("status", "attempts")),
+            [("running", 1), ("running", 1), ("pending", 0)],
+        )
+        self.assertEqual([job.pk for job in claim_jobs(5)], [jobs[2].pk])
+        self.assertEqual(claim_jobs(5), [])
+
+    def test_interrupted_jobs_are_requeued(self):
+        job = self.job(1)
+        claim_jobs(1)
+
+        self.assertEqual(requeue_interrupted_jobs(), 1)
+        self.assertEqual(self.status(job), "pending")
+        claim_jobs(1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("running", 2))
+
+    def test_poll_respects_concurrency(self):
+        jobs = [self.job(i) for i in range(3)]
+
+        self.service.poll()
+        self.assertEqual(self.service.active, 2)
+        self.assertIsNone(self.service.poll())
+        self.assertEqual(self.status(jobs[2]), "pending")
+
+        # Spiders of a job run one after the other.
+        self.assertEqual([name for name, _ in self.runs], ["first", "first"])
+        for _ in range(2):
+            self.runs.pop(0)[1].callback(None)
+        self.assertEqual(self.service.active, 2)
+        for _ in range(2):
+            self.runs.pop(0)[1].callback(None)
+        self.assertEqual(self.service.active, 0)
+        self.assertEqual([self.status(job) for job in jobs[:2]], ["done", "done"])
+
+        self.service.poll()
+        self.assertEqual(self.service.active, 1)
+        self.assertEqual(self.status(jobs[2]), "running")
+
+    def test_job_fails_only_when_every_spider_fails(self):
+        self.service.concurrency = 1
+        partial, failed = self.job(1), self.job(2)
+
+        self.service.poll()
+        self.runs.pop(0)[1].errback(RuntimeError("blocked"))
+        self.runs.pop(0)[1].callback(None)
+        self.service.poll()
+        self.runs.pop(0)[1].errback(RuntimeError("blocked"))
+        self.runs.pop(0)[1].errback(RuntimeError("gone"))
+
+        self.assertEqual(self.status(partial), "done")
+        self.assertIn("first: blocked", partial.last_error)
+        self.assertEqual(self.status(failed), "failed")
+        self.assertIn("second: gone", failed.last_error)
+        self.assertEqual(self.service.active, 0)
+
+    def test_slow_spider_is_stopped(self):
+        d = defer.Deferred()
+        stop = mock.Mock(side_effect=lambda: d.callback(None))
+        errors = []
+        self.service.with_timeout(d, stop, "slow").addErrback(errors.append)
+
+        self.clock.advance(59)
+        stop.assert_not_called()
+        self.clock.advance(1)
+
+        stop.assert_called_once_with()
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0].value, TimeoutError)
+
+    def test_fast_spider_cancels_the_timer(self):
+        d = defer.Deferred()
+        stop = mock.Mock()
+        self.service.with_timeout(d, stop, "fast")
+
+        d.callback("finished")
+
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+        self.clock.advance(120)
+        stop.assert_not_called()
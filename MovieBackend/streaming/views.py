@@ -7,6 +7,8 @@ from django.utils import timezone
 from datetime import timedelta
 import logging
 
+from core.db_routing import ReplicaReadMixin
+
 from .models import Movie, StreamingLink
 from .serializers import MovieSerializer
 from .scraper_utils import scrape_movie_on_demand
@@ -15,7 +17,7 @@ from .link_health import check_link_health
 logger = logging.getLogger(__name__)
 
 
-class StreamingMovieViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+class StreamingMovieViewSet(ReplicaReadMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
     """
     Read-only endpoints for scraped streaming movies with on-demand scraping
     and real-time link validation.
@@ -9,6 +9,11 @@ sys.path.append('MovieBackend')
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'MovieBackends.settings')
 django.setup()
 
+from core.db_routing import read_from_replica
+
+# Stats are read-only; use the replica when one is configured.
+read_from_replica()
+
 from streaming.models import Movie, StreamingLink
 from django.utils import timezone
 from datetime import timedelta
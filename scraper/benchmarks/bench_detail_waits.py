@@ -0,0 +1,229 @@
+"""Benchmark OneFlixSpider detail-page waits (pages/minute, fixed sleeps vs condition waits).
+
+Usage (from the scraper directory):
+    python benchmarks/bench_detail_waits.py --record URL [URL ...]
+    python benchmarks/bench_detail_waits.py [--har benchmarks/recordings/detail_pages.har] [--rounds 1]
+    python benchmarks/bench_detail_waits.py --synthetic [--pages 5] [--player-delay 2000]
+
+--record loads each detail page once (old fixed waits, so lazy players are
+captured) and saves every response to a HAR file, with the URL list next to it.
+Replays serve the pages from that HAR only (route_from_har; anything not
+recorded is aborted), so both modes see identical pages. --synthetic serves
+local pages whose player iframe appears --player-delay ms after a server
+button is clicked, for when no recording is at hand.
+
+"fixed" is the previous chain: networkidle, then 3 s + 2 s + 20 s + 3 s of
+wait_for_timeout around the scroll/click scripts. "event" runs
+OneFlixSpider.detail_page_methods, as the spider does now. "with player" counts
+pages that had a player iframe when the waits ended; it should match.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from playwright.async_api import async_playwright  # noqa: E402
+from scrapy_playwright.page import PageMethod  # noqa: E402
+
+from scraper.page_waits import StreamWait  # noqa: E402
+from scraper.stream_capture import StreamCapture  # noqa: E402
+from scraper.spiders.example_spider import (  # noqa: E402
+    CLICK_SERVERS_JS,
+    REVEAL_LAZY_IFRAMES_JS,
+    SCROLL_TO_MIDDLE_JS,
+    OneFlixSpider,
+)
+
+DEFAULT_HAR = Path(__file__).resolve().parent / "recordings" / "detail_pages.har"
+
+FIXED_METHODS = [
+    PageMethod("wait_for_timeout", 3000),
+    PageMethod("evaluate", SCROLL_TO_MIDDLE_JS),
+    PageMethod("wait_for_timeout", 2000),
+    PageMethod("evaluate", CLICK_SERVERS_JS),
+    PageMethod("wait_for_timeout", 20000),
+    PageMethod("evaluate", REVEAL_LAZY_IFRAMES_JS),
+    PageMethod("wait_for_timeout", 3000),
+]
+
+COUNT_PLAYERS_JS = "() => document.querySelectorAll(\"iframe[src^='http']\").length"
+
+SYNTHETIC_PAGE = """<!doctype html>
+<html><head><title>Movie {n}</title></head>
+<body>
+<h1>Movie {n}</h1>
+<div id="servers"></div>
+<div id="player"></div>
+<script>
+  // Server list rendered by script, like the real site.
+  setTimeout(() => {{
+    const button = document.createElement('button');
+    button.className = 'server-item';
+    button.dataset.server = '1';
+    button.textContent = 'Server 1';
+    button.addEventListener('click', () => {{
+      if (document.querySelector('#player iframe')) return;
+      setTimeout(() => {{
+        const iframe = document.createElement('iframe');
+        iframe.src = location.origin + '/embed/{n}';
+        document.getElementById('player').appendChild(iframe);
+      }}, {delay});
+    }});
+    document.getElementById('servers').appendChild(button);
+  }}, 300);
+</script>
+</body></html>
+"""
+
+
+def apply_page_methods(page, methods):
+    # What scrapy-playwright does with playwright_page_methods.
+    async def run():
+        for pm in methods:
+            method = getattr(page, pm.method) if isinstance(pm.method, str) else pm.method
+            args = pm.args if isinstance(pm.method, str) else (page, *pm.args)
+            await method(*args, **pm.kwargs)
+            await page.wait_for_load_state()
+
+    return run()
+
+
+async def load_page(context, url, mode, stable_ms, budget_ms):
+    page = await context.new_page()
+    started = time.monotonic()
+    reason = None
+    try:
+        if mode == "fixed":
+            await page.goto(url, wait_until="networkidle", timeout=60000)
+            await apply_page_methods(page, FIXED_METHODS)
+        else:
+            # Attached before navigation, like the spider's page init callback.
+            wait = StreamWait(budget_ms=budget_ms, stable_ms=stable_ms, capture=StreamCapture())
+            await wait(page, None)
+            await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+            await apply_page_methods(page, OneFlixSpider.detail_page_methods(wait))
+            reason = wait.reason
+        players = await page.evaluate(COUNT_PLAYERS_JS)
+    finally:
+        await page.close()
+    return time.monotonic() - started, players, reason
+
+
+async def run_mode(browser, urls, mode, har, rounds, stable_ms, budget_ms):
+    context = await browser.new_context()
+    if har:
+        await context.route_from_har(str(har), not_found="abort")
+    durations, with_player, reasons = [], 0, Counter()
+    try:
+        for _ in range(rounds):
+            for url in urls:
+                seconds, players, reason = await load_page(context, url, mode, stable_ms, budget_ms)
+                durations.append(seconds)
+                with_player += bool(players)
+                if reason:
+                    reasons[reason] += 1
+    finally:
+        await context.close()
+    return durations, with_player, reasons
+
+
+async def record(browser, urls, har):
+    har.parent.mkdir(parents=True, exist_ok=True)
+    context = await browser.new_context(record_har_path=str(har), record_har_content="embed")
+    for url in urls:
+        page = await context.new_page()
+        await page.goto(url, wait_until="networkidle", timeout=60000)
+        await apply_page_methods(page, FIXED_METHODS)
+        await page.close()
+        print(f"recorded {url}")
+    # The HAR file is written when the context closes.
+    await context.close()
+    har.with_suffix(".txt").write_text("\n".join(urls) + "\n")
+    print(f"wrote {har} ({len(urls)} pages)")
+
+
+def serve_synthetic(delay_ms):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            n = self.path.rstrip("/").rsplit("/", 1)[-1]
+            if self.path.startswith("/movie/"):
+                body = SYNTHETIC_PAGE.format(n=n, delay=delay_ms)
+            elif self.path.startswith("/embed/"):
+                body = f"<!doctype html><p>player {n}</p>"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def main_async(args):
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            if args.record:
+                await record(browser, args.record, Path(args.har))
+                return
+
+            har = None
+            if args.synthetic:
+                server = serve_synthetic(args.player_delay)
+                base = f"http://127.0.0.1:{server.server_address[1]}"
+                urls = [f"{base}/movie/{i}" for i in range(args.pages)]
+            else:
+                har = Path(args.har)
+                url_file = har.with_suffix(".txt")
+                if not har.exists() or not url_file.exists():
+                    sys.exit(f"No recording at {har}; run with --record URL ... or use --synthetic")
+                urls = [line.strip() for line in url_file.read_text().splitlines() if line.strip()]
+
+            print(f"{'mode':<6} {'pages':>5} {'seconds':>8} {'p50 s':>6} {'pages/min':>10} {'with player':>12}")
+            for mode in ("fixed", "event"):
+                durations, with_player, reasons = await run_mode(
+                    browser, urls, mode, har, args.rounds, args.stable_ms, args.budget_ms
+                )
+                total = sum(durations)
+                print(
+                    f"{mode:<6} {len(durations):>5} {total:>8.1f} {statistics.median(durations):>6.1f} "
+                    f"{len(durations) / total * 60:>10.1f} {with_player:>12}"
+                )
+                if reasons:
+                    print(f"       ended by: {dict(reasons)}")
+        finally:
+            await browser.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--record", nargs="+", metavar="URL", help="record these detail pages into --har")
+    parser.add_argument("--har", default=str(DEFAULT_HAR))
+    parser.add_argument("--rounds", type=int, default=1, help="times each page is loaded per mode")
+    parser.add_argument("--synthetic", action="store_true", help="use local generated pages instead of a HAR")
+    parser.add_argument("--pages", type=int, default=5, help="synthetic pages")
+    parser.add_argument("--player-delay", type=int, default=2000, help="synthetic: ms from click to iframe")
+    parser.add_argument("--budget-ms", type=int, default=15000, help="ONEFLIX_DETAIL_WAIT_BUDGET_MS")
+    parser.add_argument("--stable-ms", type=int, default=1000, help="ONEFLIX_DETAIL_STABLE_MS")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
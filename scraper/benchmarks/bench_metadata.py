@@ -0,0 +1,179 @@
+"""Benchmark detail-page metadata extraction (parse time per page).
+
+Usage (from the scraper directory):
+    python benchmarks/bench_metadata.py [--har benchmarks/recordings/detail_pages.har] [--rounds 20]
+    python benchmarks/bench_metadata.py --corpus DIR [--rounds 20]
+    python benchmarks/bench_metadata.py --synthetic [--pages 50]
+
+Pages come from the same places as in bench_static_links.py. Each timed
+run parses the HTML (as a new response would) and extracts title, year,
+poster, synopsis and IMDb id.
+
+"oneflix" and "fawesome" are the spiders' code before scraper.metadata
+(copied below): CSS selectors per field, the year from every span/div text
+(OneFlix) or the first 19xx/20xx in the page (Fawesome), and two regex scans
+of the whole page text for the IMDb id. "metadata" is extract_metadata().
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from parsel import Selector  # noqa: E402
+
+from bench_static_links import DEFAULT_HAR, pages_from_har  # noqa: E402
+from scraper.metadata import extract_metadata  # noqa: E402
+
+
+class Page:
+    # The parts of a scrapy response the extractors use; parses on creation.
+    def __init__(self, html, url="https://example.invalid/movie/watch-title-1"):
+        self.text = html
+        self.url = url
+        self.selector = Selector(text=html)
+
+    def css(self, query):
+        return self.selector.css(query)
+
+    def urljoin(self, url):
+        return url if "://" in url else f"https://example.invalid{url}"
+
+
+def legacy_imdb_tt(response):
+    text = response.text or ""
+    m = re.search(r"imdb\.com/title/(tt\d{7,8})", text, re.IGNORECASE)
+    if m:
+        return m.group(1)
+    m = re.search(r"\b(tt\d{7,8})\b", text)
+    if m:
+        return m.group(1)
+    return None
+
+
+def legacy_oneflix(response):
+    title = (response.css("h1::text").get() or response.css("h1 *::text").get() or "").strip()
+    imdb_id = legacy_imdb_tt(response)
+    year = None
+    for text in response.css("span::text, div::text").getall():
+        text = text.strip()
+        if text.isdigit() and len(text) == 4 and 1900 <= int(text) <= 2030:
+            year = int(text)
+            break
+    poster = (
+        response.css("meta[property='og:image']::attr(content)").get()
+        or response.css("img[class*='poster']::attr(src)").get()
+        or response.css("img::attr(src)").get()
+    )
+    synopsis = (
+        response.css("meta[name='description']::attr(content)").get() or response.css("p::text").get() or ""
+    ).strip()
+    return title, year, poster, synopsis, imdb_id
+
+
+def legacy_fawesome(response):
+    imdb_id = legacy_imdb_tt(response)
+    title = (
+        response.css("h1::text").get() or response.css("meta[property='og:title']::attr(content)").get() or ""
+    ).strip()
+    year = None
+    m = re.search(r"\b(19\d{2}|20\d{2})\b", response.text or "")
+    if m:
+        year = int(m.group(1))
+    poster = response.css("meta[property='og:image']::attr(content)").get()
+    synopsis = response.css("meta[name='description']::attr(content)").get()
+    return title, year, poster, synopsis, imdb_id
+
+
+def metadata(response):
+    found = extract_metadata(response)
+    return found.title, found.year, found.poster_url, found.synopsis, found.imdb_id
+
+
+def synthetic_page(rng, n):
+    year = rng.randrange(1950, 2026)
+    title = f"Synthetic Movie {n}"
+    tt = f"tt{rng.randrange(10**6, 10**7):07d}"
+    ld = (
+        '{"@context":"https://schema.org","@type":"Movie",'
+        f'"name":"{title}","datePublished":"{year}-05-01",'
+        f'"image":"https://img.example.invalid/poster/{n}.jpg",'
+        f'"description":"A film about the number {n}.",'
+        f'"sameAs":["https://www.imdb.com/title/{tt}/"]}}'
+    )
+    cards = "".join(
+        f'<div class="card"><a href="/movie/watch-other-{i}"><img src="/img/{i}.jpg">'
+        f'<span class="title">Other movie {i}</span></a><div class="meta"><span>HD</span>'
+        f'<span>{rng.randrange(80, 180)} min</span><div>{rng.randrange(1950, 2026)}</div></div></div>'
+        for i in range(rng.randrange(60, 120))
+    )
+    vendor = "".join(f"function f{i}(a){{return a*{i}}};var v{i}='build {1900 + i}';" for i in range(600))
+    return (
+        f"<!doctype html><html><head><title>{title} | Example</title>"
+        f'<meta property="og:title" content="{title} ({year}) | Example">'
+        f'<meta property="og:site_name" content="Example">'
+        f'<meta property="og:image" content="https://img.example.invalid/og/{n}.jpg">'
+        f'<meta name="description" content="Watch {title} online.">'
+        f'<script type="application/ld+json">{ld}</script><script>{vendor}</script></head><body>'
+        f"<header><nav>{'<span>Menu</span>' * 40}</nav></header>"
+        f"<h1>{title}</h1><div class='info'><span>Year:</span> <span>{year}</span></div>"
+        f"<p>Some description of {title}.</p><section>{cards}</section>"
+        f"<footer><div>© 2025 Example</div></footer></body></html>"
+    )
+
+
+def run(label, func, html, rounds):
+    started = time.process_time()
+    for _ in range(rounds):
+        for text in html:
+            func(Page(text))
+    seconds = time.process_time() - started
+    per_page = seconds / (rounds * len(html)) * 1000
+    print(f"{label:<9} {seconds:7.2f} s CPU  {per_page:7.3f} ms/page")
+    return per_page
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--har", default=str(DEFAULT_HAR))
+    parser.add_argument("--corpus", help="directory of saved *.html detail pages")
+    parser.add_argument("--synthetic", action="store_true", help="use generated pages")
+    parser.add_argument("--pages", type=int, default=50, help="synthetic pages")
+    parser.add_argument("--rounds", type=int, default=20, help="passes over the corpus per extractor")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.corpus:
+        html = [path.read_text(errors="replace") for path in sorted(Path(args.corpus).glob("*.html"))]
+        origin = args.corpus
+    elif not args.synthetic and Path(args.har).exists():
+        html = pages_from_har(Path(args.har))
+        origin = args.har
+    else:
+        rng = random.Random(args.seed)
+        html = [synthetic_page(rng, n) for n in range(args.pages)]
+        origin = "synthetic"
+    if not html:
+        sys.exit(f"No HTML pages in {origin}")
+
+    size = sum(len(text) for text in html) / len(html) / 1024
+    print(f"{len(html)} pages from {origin}, {size:.0f} KiB average")
+    parse = run("parse", lambda page: None, html, args.rounds)
+    results = {}
+    for label, func in (("oneflix", legacy_oneflix), ("fawesome", legacy_fawesome), ("metadata", metadata)):
+        results[label] = run(label, func, html, args.rounds)
+    for label in ("oneflix", "fawesome"):
+        saved = (results[label] - results["metadata"]) / (results[label] - parse) * 100
+        print(f"metadata vs {label}: {saved:.0f}% less extraction time (parse excluded)")
+
+    print("\nfirst page:")
+    first = Page(html[0])
+    for label, func in (("oneflix", legacy_oneflix), ("fawesome", legacy_fawesome), ("metadata", metadata)):
+        print(f"  {label:<9} {func(first)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark DjangoItemPipeline write throughput (items/sec).
+
+Usage (from the scraper directory):
+    python benchmarks/bench_pipeline.py [--items 2000] [--links 3] [--batch-sizes 1,10,50,200]
+
+Writes go to a throwaway test database, never to db.sqlite3. A batch size of 1
+approximates the old one-transaction-per-item pipeline.
+"""
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import scraper.settings  # noqa: E402,F401  (sets up Django)
+from django.db import connection  # noqa: E402
+
+from scraper.pipelines import DjangoItemPipeline  # noqa: E402
+from streaming.models import Movie, StreamingLink  # noqa: E402
+
+logger = logging.getLogger("bench_pipeline")
+
+
+def make_items(count, links_per_item, run):
+    return [
+        {
+            "imdb_id": f"bench{run}-{i}",
+            "title": f"Benchmark Movie {i}",
+            "year": 2000 + i % 25,
+            "type": "movie",
+            "poster_url": None,
+            "synopsis": "",
+            "original_detail_url": f"https://example.invalid/movie/{i}",
+            "links": [
+                {"quality": "HD", "language": "EN", "source_url": f"https://cdn.example.invalid/{i}/{j}.m3u8"}
+                for j in range(links_per_item)
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--links", type=int, default=3)
+    parser.add_argument("--batch-sizes", type=str, default="1,10,50,200")
+    args = parser.parse_args()
+
+    connection.settings_dict.setdefault("TEST", {})["MIGRATE"] = False
+    old_name = connection.creation.create_test_db(verbosity=0, serialize=False)
+    try:
+        pipeline = DjangoItemPipeline()
+        for run, batch_size in enumerate(int(b) for b in args.batch_sizes.split(",")):
+            for phase in ("insert", "update"):
+                items = make_items(args.items, args.links, run)
+                started = time.perf_counter()
+                for start in range(0, len(items), batch_size):
+                    pipeline.write_batch(items[start:start + batch_size], logger)
+                elapsed = time.perf_counter() - started
+                print(f"batch_size={batch_size:<5} {phase:<6} {args.items / elapsed:10.1f} items/sec")
+        print(f"rows: movies={Movie.objects.count()} links={StreamingLink.objects.count()}")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Benchmark FawesomeSpider on-demand title matching (sitemap scan vs local index).
+
+Usage (from the scraper directory):
+    python benchmarks/bench_sitemap_index.py [--entries 50000] [--lookups 200]
+    python benchmarks/bench_sitemap_index.py --sitemap movies-pages.xml
+
+Uses a saved copy of the sitemap, or a generated video sitemap with
+--entries movies. "scan" is what every on-demand run did before
+scraper.sitemap_index: parse the whole sitemap and score each <url> (copied
+below; sitemap download time not included). "index" builds the SQLite index
+once (what a run after a sitemap change does) and then times lookups (every
+run while the sitemap answers 304). Both must pick the same URL.
+"""
+import argparse
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from parsel import Selector  # noqa: E402
+
+from scraper.sitemap_index import SitemapIndex  # noqa: E402
+from scraper.sitemap_stream import iter_sitemap  # noqa: E402
+
+SITEMAP_URL = "https://fawesome.tv/sitemaps/movies-pages.xml"
+
+WORDS = (
+    "the night last city dark love war king lost man woman house dead return river star blood "
+    "secret road summer winter island ghost legend time shadow fire gold wild heart girl boy "
+    "island storm mountain hunter dream empire kingdom moon sun ocean silent broken"
+).split()
+
+
+def legacy_normalize(s):
+    s = (s or "").lower()
+    s = re.sub(r"\(\d{4}\)", "", s)
+    s = re.sub(r"[^a-z0-9]+", " ", s)
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def legacy_score(wanted, candidate):
+    if not wanted or not candidate:
+        return 0
+    if wanted == candidate:
+        return 10
+    if wanted in candidate or candidate in wanted:
+        return 6
+    overlap = len(set(wanted.split()) & set(candidate.split()))
+    if overlap == 0:
+        return 0
+    return min(5, overlap)
+
+
+def legacy_match(xml, title, year):
+    response = Selector(text=xml, type="xml")
+    wanted = legacy_normalize(title)
+    best_url, best_score = None, -1
+    for url_node in response.xpath("//*[local-name()='url']"):
+        loc = url_node.xpath("./*[local-name()='loc']/text()").get()
+        if not loc:
+            continue
+        video_title = url_node.xpath(".//*[local-name()='video']/*[local-name()='title']/text()").get() or ""
+        score = legacy_score(wanted, legacy_normalize(video_title))
+        if score <= 0:
+            continue
+        if year and str(year) in (loc or ""):
+            score += 2
+        if score > best_score:
+            best_score, best_url = score, loc
+        if best_score >= 10:
+            break
+    return best_url, best_score
+
+
+def sitemap_entries(xml):
+    # As FawesomeSpider._sitemap_entries reads them.
+    for kind, loc, title in iter_sitemap(xml.encode()):
+        if kind == "url":
+            yield loc, title
+
+
+def make_sitemap(count, seed):
+    rng = random.Random(seed)
+    titles, parts = [], []
+    for i in range(count):
+        title = " ".join(rng.choice(WORDS).capitalize() for _ in range(rng.randrange(1, 5)))
+        year = rng.randrange(1940, 2026)
+        slug = title.lower().replace(" ", "-")
+        titles.append((f"{title} {i}", year))
+        parts.append(
+            f"<url><loc>https://fawesome.tv/movies/{10_000_000 + i}/{slug}-{i}-{year}</loc>"
+            f"<video:video><video:title>{title} {i}</video:title>"
+            f"<video:description>A movie.</video:description></video:video></url>"
+        )
+    xml = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+        'xmlns:video="http://www.google.com/schemas/sitemap-video/1.1">'
+        + "".join(parts)
+        + "</urlset>"
+    )
+    return xml, titles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sitemap", help="saved movies-pages.xml (default: generated)")
+    parser.add_argument("--entries", type=int, default=50_000, help="generated sitemap entries")
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--scans", type=int, default=5, help="timed full-sitemap scans")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    if args.sitemap:
+        xml = Path(args.sitemap).read_text()
+        titles = [(title, None) for _, title in sitemap_entries(xml) if title]
+    else:
+        xml, titles = make_sitemap(args.entries, args.seed)
+    queries = [rng.choice(titles) for _ in range(args.lookups)]
+    print(f"sitemap {len(xml) / 1024 / 1024:.1f} MiB, {len(titles)} titles")
+
+    started = time.perf_counter()
+    expected = [legacy_match(xml, title, year) for title, year in queries[: args.scans]]
+    scan_ms = (time.perf_counter() - started) / len(expected) * 1000
+    print(f"scan            {scan_ms:9.1f} ms per on-demand run")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = SitemapIndex(Path(tmp) / "index.sqlite3")
+        started = time.perf_counter()
+        entries = list(sitemap_entries(xml))
+        parse_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        index.rebuild(SITEMAP_URL, entries, etag='"bench"')
+        build_ms = (time.perf_counter() - started) * 1000
+        size = index.path.stat().st_size / 1024 / 1024
+        print(f"index build     {parse_ms + build_ms:9.1f} ms after a sitemap change "
+              f"(parse {parse_ms:.0f} + index {build_ms:.0f}), {size:.1f} MiB")
+
+        started = time.perf_counter()
+        found = [index.match(title, year) for title, year in queries]
+        lookup_ms = (time.perf_counter() - started) / len(queries) * 1000
+        print(f"index lookup    {lookup_ms:9.2f} ms per on-demand run ({scan_ms / lookup_ms:.0f}x faster)")
+        index.close()
+
+    same = sum(a[0] == b[0] for a, b in zip(expected, found))
+    print(f"same URL as scan: {same}/{len(expected)}")
+
+
+if __name__ == "__main__":
+    main()
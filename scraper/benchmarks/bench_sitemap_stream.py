@@ -0,0 +1,135 @@
+"""Benchmark sitemap parsing memory (peak RSS) and time, DOM vs streaming.
+
+Usage (from the scraper directory):
+    python benchmarks/bench_sitemap_stream.py [--size-mb 500] [--max-pages 50]
+    python benchmarks/bench_sitemap_stream.py --sitemap movies-pages.xml [--modes iterparse,iterparse-gz]
+
+Generates a video sitemap of about --size-mb MiB in a temporary directory
+(or uses --sitemap), then runs every mode in its own process and reports
+that process's peak RSS. Like the spider, each mode starts from the whole
+response body in memory.
+
+- selector: FawesomeSpider.parse_sitemap before scraper.sitemap_stream,
+  Selector over the body and //*[local-name()='url'] (copied below);
+- iterparse: iter_sitemap() over the body, all entries;
+- iterparse-gz: the same sitemap served gzipped (.xml.gz), decompressed
+  while parsing;
+- first-N: iter_sitemap() stopping after --max-pages entries, as discovery
+  mode does.
+
+A mode that fails (out of memory, or libxml2 refusing the XPath on a very
+large tree) is reported as failed, not retried.
+"""
+import argparse
+import gzip
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+MODES = ["selector", "iterparse", "iterparse-gz", "first-N"]
+
+HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+    'xmlns:video="http://www.google.com/schemas/sitemap-video/1.1">\n'
+)
+ENTRY = (
+    "<url><loc>https://fawesome.tv/movies/{id}/movie-title-{n}</loc>"
+    "<video:video><video:thumbnail_loc>https://cdn.fawesome.tv/thumbs/{id}.jpg</video:thumbnail_loc>"
+    "<video:title>Movie Title {n}</video:title>"
+    "<video:description>A feature film, entry {n} of the benchmark sitemap.</video:description>"
+    "<video:player_loc>https://fawesome.tv/player/{id}</video:player_loc>"
+    "<video:duration>{duration}</video:duration></video:video></url>\n"
+)
+
+
+def generate(path, size_mb):
+    target = size_mb * 1024 * 1024
+    written = n = 0
+    with open(path, "w") as f:
+        f.write(HEADER)
+        while written < target:
+            chunk = "".join(
+                ENTRY.format(id=10_000_000 + i, n=i, duration=3600 + i % 3600) for i in range(n, n + 10_000)
+            )
+            f.write(chunk)
+            written += len(chunk)
+            n += 10_000
+        f.write("</urlset>\n")
+    return n
+
+
+def run_child(mode, path, max_pages):
+    body = Path(path).read_bytes()
+    started = time.perf_counter()
+    count = 0
+    if mode == "selector":
+        from parsel import Selector
+
+        selector = Selector(body=body, type="xml")
+        for url_node in selector.xpath("//*[local-name()='url']"):
+            if url_node.xpath("./*[local-name()='loc']/text()").get():
+                count += 1
+    else:
+        from scraper.sitemap_stream import iter_sitemap
+
+        limit = max_pages if mode == "first-N" else None
+        for _ in iter_sitemap(body):
+            count += 1
+            if limit and count >= limit:
+                break
+    seconds = time.perf_counter() - started
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{count} {seconds:.2f} {peak_mb:.0f} {len(body) / 1024 / 1024:.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sitemap", help="existing sitemap file (default: generate one)")
+    parser.add_argument("--size-mb", type=int, default=500, help="size of the generated sitemap")
+    parser.add_argument("--max-pages", type=int, default=50, help="entries read by the first-N mode")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[1], args.max_pages)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.sitemap
+        if not path:
+            path = str(Path(tmp) / "sitemap.xml")
+            started = time.perf_counter()
+            entries = generate(path, args.size_mb)
+            print(f"generated {entries} entries in {time.perf_counter() - started:.0f} s")
+        print(f"sitemap {Path(path).stat().st_size / 1024 / 1024:.0f} MiB")
+        if "iterparse-gz" in args.modes:
+            gz_path = Path(tmp) / "sitemap.xml.gz"
+            with open(path, "rb") as src, gzip.open(gz_path, "wb", compresslevel=1) as dst:
+                shutil.copyfileobj(src, dst)
+            gz_path = str(gz_path)
+        print(f"{'mode':<13} {'entries':>9} {'seconds':>8} {'body MiB':>9} {'peak RSS MiB':>13}")
+        for mode in args.modes.split(","):
+            source = gz_path if mode == "iterparse-gz" else path
+            proc = subprocess.run(
+                [sys.executable, __file__, "--child", mode, source, "--max-pages", str(args.max_pages)],
+                capture_output=True,
+                text=True,
+            )
+            if proc.returncode != 0:
+                reason = "killed (out of memory?)" if proc.returncode < 0 else proc.stderr.strip().splitlines()[-1]
+                print(f"{mode:<13} failed: {reason}")
+                continue
+            count, seconds, peak, body_mb = proc.stdout.split()
+            print(f"{mode:<13} {count:>9} {seconds:>8} {body_mb:>9} {peak:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark cold-start import time of the Scrapy project.
+
+Usage (from the scraper directory):
+    python benchmarks/bench_spider_import.py [--runs 5]
+
+Each measurement runs in a fresh interpreter, like every `scrapy crawl` started
+by streaming.scraper_utils. "spider loader" is what Scrapy does before a crawl
+starts: load settings (which sets up Django) and import every module in
+SPIDER_MODULES. The selenium row is the cost goojara_spider used to add to
+every run at import time; it is now paid only when the goojara spider opens.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SCRAPER_DIR = Path(__file__).resolve().parent.parent
+
+TIMED = """
+import time
+started = time.perf_counter()
+{code}
+print(time.perf_counter() - started)
+"""
+
+MEASUREMENTS = [
+    ("django setup (scraper.settings)", "import scraper.settings"),
+    (
+        "spider loader (all spiders)",
+        "from scrapy.spiderloader import SpiderLoader\n"
+        "from scrapy.utils.project import get_project_settings\n"
+        "SpiderLoader.from_settings(get_project_settings())",
+    ),
+    ("scraper.spiders.example_spider", "import scraper.settings\nimport scraper.spiders.example_spider"),
+    ("scraper.spiders.fawesome_spider", "import scraper.settings\nimport scraper.spiders.fawesome_spider"),
+    ("scraper.spiders.goojara_spider", "import scraper.settings\nimport scraper.spiders.goojara_spider"),
+    (
+        "selenium + webdriver_manager",
+        "import selenium.webdriver\n"
+        "import selenium.webdriver.chrome.service\n"
+        "import webdriver_manager.chrome",
+    ),
+]
+
+
+def measure(code, runs):
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", TIMED.format(code=code)],
+            cwd=str(SCRAPER_DIR),
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            return None, result.stderr.strip().splitlines()[-1]
+        samples.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement")
+    args = parser.parse_args()
+
+    for label, code in MEASUREMENTS:
+        seconds, error = measure(code, args.runs)
+        if error:
+            print(f"{label:<36} failed: {error}")
+        else:
+            print(f"{label:<36} {seconds * 1000:8.1f} ms (median of {args.runs})")
+
+
+if __name__ == "__main__":
+    main()
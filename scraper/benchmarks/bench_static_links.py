@@ -0,0 +1,183 @@
+"""Benchmark static-HTML link extraction on detail pages (CPU per page).
+
+Usage (from the scraper directory):
+    python benchmarks/bench_static_links.py [--har benchmarks/recordings/detail_pages.har] [--rounds 20]
+    python benchmarks/bench_static_links.py --corpus DIR [--rounds 20]
+    python benchmarks/bench_static_links.py --synthetic [--pages 50]
+
+The corpus is the HTML documents of a HAR recorded with
+bench_detail_waits.py --record, every *.html file in --corpus, or generated
+detail pages (--synthetic, also used when no recording exists). Pages are
+parsed before timing, so only extraction and classification are measured.
+
+"legacy" is OneFlixSpider._extract_from_static_html as it was before
+scraper.static_links: 18 CSS selectors, then three regexes per <script>
+(copied below). "scanner" is what the spider does now: iter_static_links()
+plus the same classification, once per distinct URL.
+"""
+import argparse
+import base64
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from parsel import Selector  # noqa: E402
+
+from scraper.static_links import iter_static_links  # noqa: E402
+from scraper.url_classifier import classify  # noqa: E402
+
+DEFAULT_HAR = Path(__file__).resolve().parent / "recordings" / "detail_pages.har"
+
+LEGACY_SELECTORS = [
+    "iframe::attr(src)", "iframe::attr(data-src)", "iframe::attr(data-url)",
+    "iframe::attr(data-lazy)", "iframe::attr(data-embed)",
+    "[data-link]::attr(data-link)", "[data-server]::attr(data-server)",
+    "[data-embed]::attr(data-embed)", "[data-player]::attr(data-player)",
+    "[data-stream]::attr(data-stream)", "[data-video]::attr(data-video)",
+    "a[href*='embed']::attr(href)", "a[href*='player']::attr(href)",
+    "a[href*='stream']::attr(href)", "a[href*='/e/']::attr(href)",
+    "a[href*='/v/']::attr(href)", "a[href*='/f/']::attr(href)",
+    "a[href^='http']::attr(href)",
+]
+LEGACY_SCRIPT_PATTERNS = [
+    r'(https?://[^\s"\']+?(?:embed|player|stream|video|/e/|/v/|/f/|/d/)[^\s"\'<>]*)',
+    r'(https?://(?:streamtape|mixdrop|dood|vidoza|upstream|filemoon|voe|streamlare|mp4upload)[^\s"\'<>]+)',
+    r'(https?://[a-zA-Z0-9][a-zA-Z0-9-]*[a-zA-Z0-9]*\.[a-zA-Z]{2,}[^\s"\'<>]*)',
+]
+
+
+def is_static_candidate(url):
+    verdict = classify(url)
+    return not verdict.reject and not verdict.is_source_site
+
+
+def legacy_extract(response):
+    urls = set()
+    for selector in LEGACY_SELECTORS:
+        for url in response.css(selector).getall():
+            if url and is_static_candidate(url):
+                urls.add(url)
+    for script in response.css("script::text").getall():
+        for pattern in LEGACY_SCRIPT_PATTERNS:
+            for match in re.findall(pattern, script, re.IGNORECASE):
+                if is_static_candidate(match):
+                    urls.add(match)
+    return urls
+
+
+def scanner_extract(response):
+    return {url: source for url, source in iter_static_links(response) if is_static_candidate(url)}
+
+
+class Page:
+    # The only attribute of a response the extractors use.
+    def __init__(self, html):
+        self.selector = Selector(text=html)
+
+    def css(self, query):
+        return self.selector.css(query)
+
+
+def pages_from_har(har):
+    data = json.loads(har.read_text())
+    url_file = har.with_suffix(".txt")
+    wanted = set(url_file.read_text().split()) if url_file.exists() else None
+    pages = []
+    for entry in data["log"]["entries"]:
+        content = entry["response"].get("content", {})
+        if "html" not in content.get("mimeType", "") or not content.get("text"):
+            continue
+        if wanted is not None and entry["request"]["url"] not in wanted:
+            continue
+        text = content["text"]
+        if content.get("encoding") == "base64":
+            text = base64.b64decode(text).decode("utf-8", "replace")
+        pages.append(text)
+    return pages
+
+
+def synthetic_page(rng, n):
+    hosts = ["streamtape.com/e", "mixdrop.co/e", "dood.watch/d", "filemoon.sx/e", "voe.sx/e", "vidoza.net/v"]
+    nav = "".join(f'<li><a href="https://1flix.to/movie/title-{rng.randrange(10**5)}">Movie</a></li>' for _ in range(120))
+    social = "".join(f'<a href="https://www.{site}.com/share?u={n}">{site}</a>' for site in ("facebook", "twitter"))
+    servers = "".join(
+        f'<a class="server-item" data-link="https://{rng.choice(hosts)}/{rng.getrandbits(40):x}">Server {i}</a>'
+        for i in range(6)
+    )
+    iframe = f'<iframe src="https://{rng.choice(hosts)}/{rng.getrandbits(40):x}" allowfullscreen></iframe>'
+    vendor = "".join(
+        f'function f{i}(a){{return a.map(function(x){{return x*{i}}})}};'
+        f'var u{i}="https://cdn.jsdelivr.net/npm/lib{i}@1.0.{i}/dist/lib.min.js";'
+        for i in range(400)
+    )
+    config = json.dumps({
+        "servers": [f"https://{rng.choice(hosts)}/{rng.getrandbits(40):x}" for _ in range(4)],
+        "trailer": f"https://www.youtube.com/embed/{rng.getrandbits(40):x}",
+        "poster": f"https://img.tmdb-cdn.net/poster/{n}.jpg",
+    }).replace("/", "\\/")
+    analytics = "window.dataLayer=[];gtag('config','G-XXXX');var s='https://www.googletagmanager.com/gtag/js';"
+    return (
+        f"<!doctype html><html><head><title>Movie {n}</title><script>{vendor}</script></head><body>"
+        f"<nav><ul>{nav}</ul></nav><h1>Movie {n}</h1><div id='servers'>{servers}</div>"
+        f"<div id='player'>{iframe}</div><footer>{social}</footer>"
+        f"<script>var config={config};</script><script>{analytics}</script></body></html>"
+    )
+
+
+def run(label, func, pages, rounds):
+    found = sum(len(func(page)) for page in pages)
+    started = time.process_time()
+    for _ in range(rounds):
+        for page in pages:
+            func(page)
+    seconds = time.process_time() - started
+    per_page = seconds / (rounds * len(pages)) * 1000
+    print(f"{label:<8} {seconds:7.2f} s CPU  {per_page:7.3f} ms/page  {found:>6} URLs")
+    return per_page
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--har", default=str(DEFAULT_HAR))
+    parser.add_argument("--corpus", help="directory of saved *.html detail pages")
+    parser.add_argument("--synthetic", action="store_true", help="use generated pages")
+    parser.add_argument("--pages", type=int, default=50, help="synthetic pages")
+    parser.add_argument("--rounds", type=int, default=20, help="passes over the corpus per extractor")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.corpus:
+        html = [path.read_text(errors="replace") for path in sorted(Path(args.corpus).glob("*.html"))]
+        origin = args.corpus
+    elif not args.synthetic and Path(args.har).exists():
+        html = pages_from_har(Path(args.har))
+        origin = args.har
+    else:
+        rng = random.Random(args.seed)
+        html = [synthetic_page(rng, n) for n in range(args.pages)]
+        origin = "synthetic"
+    if not html:
+        sys.exit(f"No HTML pages in {origin}")
+
+    pages = [Page(text) for text in html]
+    size = sum(len(text) for text in html) / len(html) / 1024
+    print(f"{len(pages)} pages from {origin}, {size:.0f} KiB average")
+    legacy = run("legacy", legacy_extract, pages, args.rounds)
+    scanner = run("scanner", scanner_extract, pages, args.rounds)
+    print(f"CPU per page: {(1 - scanner / legacy) * 100:.0f}% less")
+
+    only_legacy = only_scanner = 0
+    for page in pages:
+        old, new = legacy_extract(page), set(scanner_extract(page))
+        only_legacy += len(old - new)
+        only_scanner += len(new - old)
+    print(f"URLs only legacy found: {only_legacy}, only scanner found: {only_scanner}")
+
+
+if __name__ == "__main__":
+    main()
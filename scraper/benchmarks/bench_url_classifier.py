@@ -0,0 +1,130 @@
+"""Microbenchmark scraper.url_classifier against the old substring loops.
+
+Usage (from the scraper directory):
+    python benchmarks/bench_url_classifier.py [--urls 1000000] [--seed 1]
+
+"legacy" is the filtering OneFlixSpider did before the classifier: lowercase
+the URL per check and test every REJECT_PATTERNS / VIDEO_HOSTS /
+STREAM_PATTERNS substring (lists copied below as they were). "classifier" is
+classify() with whichever automaton is available; "classifier (pure)" forces
+the pure-Python Aho-Corasick. The accepted counts differ a little because the
+classifier matches hosts by suffix instead of anywhere in the URL, and never
+accepts the source sites' own pages.
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import scraper.url_classifier as url_classifier  # noqa: E402
+
+LEGACY_REJECT_PATTERNS = [
+    'youtube.com', 'youtu.be', 'youtube-nocookie.com', 'facebook.com', 'fb.com',
+    'twitter.com', 'x.com', 'instagram.com', 'tiktok.com', 'dailymotion.com', 'vimeo.com',
+    'imdb.com', 'themoviedb.org', 'tvdb.com', 'rottentomatoes.com',
+    '111movies.com', '123movies', 'watchmovies', 'putlocker', 'gomovies', 'yesmovies',
+    'solarmovies', 'moviesjoy', 'fmovies.to', 'fmovies.se', 'fmovies.ws', 'fmovies.io',
+    'flixhq.to', 'flixhq.com', 'flixhq.ws', 'soap2day', 's2dfree', 'vidplay', 'vidplay.online',
+    'vidsrc.me', 'vidsrc.to', 'vidsrc.pro', 'vidsrc.com', 'embedsoap', 'multiembed.mov',
+    'player-cdn.com', 'vidnext.net', 'vidplay.online', 'membed.net', 'vidstream.pro',
+    'vidstream.to', 'vidstream.me', 'embed.su', 'embed.moe', 'embed.icu',
+    'google.com/recaptcha', 'www.google.com/recaptcha', 'recaptcha', 'sysmeasuring.net', 'anicrush.to',
+    'fmovies-co.net/home', 'fmovies-co.net/movie', 'fmovies-co.net/tv', 'fmovies-co.net/tv-show',
+    'fmovies-co.net/top-imdb', 'javascript:', 'mailto:', '#', 'void(0)',
+]
+LEGACY_VIDEO_HOSTS = [
+    'vidoza', 'streamtape', 'mixdrop', 'doodstream', 'dood.', 'filemoon', 'upstream',
+    'streamlare', 'streamhub', 'streamwish', 'videostr', 'voe.', 'streamvid', 'mp4upload',
+    'streamplay', 'supervideo', 'gounlimited', 'jetload', 'vidcloud', 'mystream', 'vidstream',
+    'fembed', 'streamango', 'rapidvideo', 'vidlox', 'clipwatching', 'verystream', 'streammango',
+    'netu', 'fastplay', 'powvideo', 'aparat', 'vup', 'vshare', 'tune', 'woof', 'waaw', 'hqq',
+    'thevideo', 'vidup', 'streamz', 'vidfast', 'vidoo', 'vidbam', 'vidbull', 'vidto', 'vidsrc',
+    'fmovies', 'streamtape.com', 'streamta.pe', 'stape.fun', 'mixdrop.co', 'mixdrop.to',
+    'mixdrop.sx', 'doodstream.com', 'dood.watch', 'dood.to', 'dood.so', 'vidoza.net',
+    'vidoza.co', 'upstream.to', 'filemoon.sx', 'filemoon.in', 'streamlare.com', 'voe.sx',
+]
+LEGACY_STREAM_PATTERNS = [
+    'embed', 'player', 'watch', 'stream', 'video', 'play', '/e/', '/v/', '/f/', '/d/',
+    '.m3u8', '.mp4', '.mkv', '.avi', '.webm',
+]
+
+HOSTS = [
+    "streamtape.com", "mixdrop.co", "dood.watch", "vidoza.net", "filemoon.sx", "voe.sx",
+    "www.youtube.com", "m.facebook.com", "x.com", "www.imdb.com", "vidsrc.to", "fmovies-co.net",
+    "1flix.to", "cdn.jsdelivr.net", "fonts.googleapis.com", "www.googletagmanager.com",
+    "static.cloudflareinsights.com", "img.tmdb-cdn.net", "cdn{n}.hls-edge.net", "ads{n}.adnet.io",
+    "s{n}.unknown-host.xyz", "api.player-backend.com",
+]
+PATHS = [
+    "/e/{id}", "/embed-{id}.html", "/f/{id}", "/v/{id}", "/watch?v={id}", "/movie/watch-title-{n}",
+    "/home", "/tv/show-{n}", "/hls/{id}/master.m3u8?token={id}", "/video/{id}.mp4",
+    "/static/js/app.{id}.min.js", "/img/poster-{n}.jpg", "/css/site.css", "/player/{id}",
+    "/ajax/episode/servers/{n}", "/pixel?uid={id}#frag", "/about",
+]
+
+
+def make_urls(count, seed):
+    rng = random.Random(seed)
+    urls = []
+    for _ in range(count):
+        n = rng.randrange(10000)
+        ident = "%08x" % rng.getrandbits(32)
+        host = rng.choice(HOSTS).format(n=n % 50)
+        path = rng.choice(PATHS).format(n=n, id=ident)
+        urls.append(f"https://{host}{path}")
+    return urls
+
+
+def legacy_accept(url):
+    # The spider's old helpers each lowercased the URL again.
+    if not url.startswith(('http://', 'https://')):
+        return False
+    if any(pattern in url.lower() for pattern in LEGACY_REJECT_PATTERNS):
+        return False
+    is_video_host = any(host in url.lower() for host in LEGACY_VIDEO_HOSTS)
+    has_stream_pattern = any(pattern in url.lower() for pattern in LEGACY_STREAM_PATTERNS)
+    return is_video_host or has_stream_pattern or 'fmovies-co.net' not in url.lower()
+
+
+def classifier_accept(classifier):
+    def accept(url):
+        return classifier.classify(url).is_link_candidate
+
+    return accept
+
+
+def run(label, func, urls):
+    started = time.perf_counter()
+    accepted = sum(1 for url in urls if func(url))
+    seconds = time.perf_counter() - started
+    print(
+        f"{label:<22} {seconds:7.2f} s  {len(urls) / seconds / 1000:8.1f} k URLs/s  "
+        f"{seconds / len(urls) * 1e6:6.2f} us/URL  accepted {accepted}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--urls", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    urls = make_urls(args.urls, args.seed)
+    print(f"{len(urls)} URLs, pyahocorasick {'installed' if url_classifier.ahocorasick else 'not installed'}")
+
+    run("legacy", legacy_accept, urls)
+    run("classifier", classifier_accept(url_classifier.UrlClassifier()), urls)
+    if url_classifier.ahocorasick is not None:
+        saved, url_classifier.ahocorasick = url_classifier.ahocorasick, None
+        try:
+            pure = url_classifier.UrlClassifier()
+        finally:
+            url_classifier.ahocorasick = saved
+        run("classifier (pure)", classifier_accept(pure), urls)
+
+
+if __name__ == "__main__":
+    main()
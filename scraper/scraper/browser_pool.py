@@ -0,0 +1,272 @@
+"""
+Managed Playwright context pool for scrapy-playwright.
+
+BrowserPoolMiddleware spreads Playwright requests over a fixed set of named
+browser contexts (slots) and keeps them warm between requests. A slot's
+context is retired after PLAYWRIGHT_POOL_RECYCLE_PAGES pages, or all of them
+when the browser's resident memory passes PLAYWRIGHT_POOL_MAX_RSS_MB; the
+retired context is closed once its last page closes and the slot continues
+in a fresh one.
+
+The time each request waits for a page (context semaphore + page creation)
+is recorded in the crawl stats under ``browser_pool/``.
+
+``derive_limits`` sizes PLAYWRIGHT_MAX_CONTEXTS and
+PLAYWRIGHT_MAX_PAGES_PER_CONTEXT from the memory available on the machine.
+"""
+import asyncio
+import logging
+import os
+import statistics
+import time
+
+logger = logging.getLogger(__name__)
+
+# Rough resident sizes of headless Chromium; tune with the env overrides in settings.
+BROWSER_BASE_MB = 300
+PAGE_MB = 150
+# Share of available memory the browser may plan to use.
+MEMORY_SHARE = 0.5
+
+
+def available_memory_mb():
+    """MemAvailable from /proc/meminfo, falling back to total physical memory."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return 2048
+
+
+def derive_limits(memory_mb=None, max_pages_per_context=4, max_contexts=8):
+    """Return (max_contexts, max_pages_per_context) that fit in available memory."""
+    memory_mb = available_memory_mb() if memory_mb is None else memory_mb
+    budget = memory_mb * MEMORY_SHARE - BROWSER_BASE_MB
+    pages = max(1, int(budget // PAGE_MB))
+    pages_per_context = max(1, min(max_pages_per_context, pages))
+    contexts = max(1, min(max_contexts, pages // pages_per_context))
+    return contexts, pages_per_context
+
+
+def browser_rss_mb():
+    """Resident memory of this process's child processes (the browser), in MB.
+
+    Uses psutil when installed, otherwise walks /proc (Linux only). Returns
+    None when it cannot be measured.
+    """
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+
+    if psutil is not None:
+        try:
+            children = psutil.Process().children(recursive=True)
+        except psutil.Error:
+            return None
+        total = 0
+        for child in children:
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return total // (1024 * 1024)
+
+    if not os.path.isdir("/proc"):
+        return None
+    parents = {}
+    rss_kb = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/status") as f:
+                for line in f:
+                    if line.startswith("PPid:"):
+                        parents[int(entry)] = int(line.split()[1])
+                    elif line.startswith("VmRSS:"):
+                        rss_kb[int(entry)] = int(line.split()[1])
+        except OSError:
+            continue
+    descendants = {os.getpid()}
+    changed = True
+    while changed:
+        changed = False
+        for pid, ppid in parents.items():
+            if ppid in descendants and pid not in descendants:
+                descendants.add(pid)
+                changed = True
+    descendants.discard(os.getpid())
+    return sum(rss_kb.get(pid, 0) for pid in descendants) // 1024
+
+
+class _Slot:
+    __slots__ = ("index", "generation", "in_flight", "pages_served")
+
+    def __init__(self, index):
+        self.index = index
+        self.generation = 0
+        self.in_flight = 0
+        self.pages_served = 0
+
+    @property
+    def context_name(self):
+        return f"pool-{self.index}-{self.generation}"
+
+
+class BrowserPoolMiddleware:
+    """Downloader middleware assigning Playwright requests to pooled contexts."""
+
+    def __init__(self, crawler, slots, recycle_pages, max_rss_mb, memory_check_every):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.slots = [_Slot(i) for i in range(slots)]
+        self.recycle_pages = recycle_pages
+        self.max_rss_mb = max_rss_mb
+        self.memory_check_every = memory_check_every
+        self.pages_since_memory_check = 0
+        # Per context name: requests routed to it that haven't finished, and open pages.
+        self.pending = {}
+        self.open_pages = {}
+        self.contexts = {}
+        self.retiring = set()
+        self.waits = []
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        from scrapy import signals
+
+        settings = crawler.settings
+        middleware = cls(
+            crawler,
+            slots=settings.getint("PLAYWRIGHT_MAX_CONTEXTS", 1),
+            recycle_pages=settings.getint("PLAYWRIGHT_POOL_RECYCLE_PAGES", 50),
+            max_rss_mb=settings.getint("PLAYWRIGHT_POOL_MAX_RSS_MB", 0),
+            memory_check_every=settings.getint("PLAYWRIGHT_POOL_MEMORY_CHECK_PAGES", 10),
+        )
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def process_request(self, request, spider):
+        meta = request.meta
+        if not meta.get("playwright") or "browser_pool_slot" in meta:
+            return None
+        # A context the spider chose itself is left alone. One this pool assigned
+        # earlier means a retry: _release already gave up its slot, and the old
+        # context may have been recycled since, so route it afresh.
+        if "playwright_context" in meta and "browser_pool_queued_at" not in meta:
+            return None
+        if "browser_pool_queued_at" not in meta:
+            meta["browser_pool_page_init"] = meta.get("playwright_page_init_callback")
+        slot = min(self.slots, key=lambda s: s.in_flight)
+        slot.in_flight += 1
+        self.pending[slot.context_name] = self.pending.get(slot.context_name, 0) + 1
+        meta["playwright_context"] = slot.context_name
+        meta["browser_pool_slot"] = slot.index
+        meta["browser_pool_queued_at"] = time.monotonic()
+        meta["playwright_page_init_callback"] = self._page_init_callback(meta["browser_pool_page_init"])
+        return None
+
+    def process_response(self, request, response, spider):
+        self._release(request)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        self._release(request)
+        return None
+
+    def _release(self, request):
+        index = request.meta.pop("browser_pool_slot", None)
+        if index is None:
+            return
+        self.slots[index].in_flight -= 1
+        context_name = request.meta.get("playwright_context")
+        self.pending[context_name] = self.pending.get(context_name, 1) - 1
+        self._maybe_close(context_name)
+
+    def _page_init_callback(self, previous):
+        async def page_init(page, request):
+            queued_at = request.meta.get("browser_pool_queued_at")
+            if queued_at is not None:
+                wait = time.monotonic() - queued_at
+                self.waits.append(wait)
+                self.stats.inc_value("browser_pool/acquire_count")
+                self.stats.inc_value("browser_pool/acquire_wait_seconds_total", wait)
+                self.stats.max_value("browser_pool/acquire_wait_seconds_max", wait)
+            self._track_page(page, request.meta.get("playwright_context"), request.meta.get("browser_pool_slot"))
+            if isinstance(previous, str):
+                from scrapy.utils.misc import load_object
+
+                await load_object(previous)(page, request)
+            elif previous:
+                await previous(page, request)
+
+        return page_init
+
+    def _track_page(self, page, context_name, slot_index):
+        self.open_pages[context_name] = self.open_pages.get(context_name, 0) + 1
+        self.contexts[context_name] = page.context
+        page.on("close", lambda _page: self._page_closed(context_name))
+
+        if slot_index is not None:
+            slot = self.slots[slot_index]
+            if slot.context_name == context_name:
+                slot.pages_served += 1
+                if self.recycle_pages and slot.pages_served >= self.recycle_pages:
+                    self._retire(slot, reason=f"served {slot.pages_served} pages")
+
+        self.pages_since_memory_check += 1
+        if self.max_rss_mb and self.pages_since_memory_check >= self.memory_check_every:
+            self.pages_since_memory_check = 0
+            rss = browser_rss_mb()
+            if rss is not None:
+                self.stats.max_value("browser_pool/browser_rss_mb_max", rss)
+                if rss > self.max_rss_mb:
+                    for slot in self.slots:
+                        self._retire(slot, reason=f"browser RSS {rss} MB > {self.max_rss_mb} MB")
+
+    def _retire(self, slot, reason):
+        old_name = slot.context_name
+        slot.generation += 1
+        slot.pages_served = 0
+        self.retiring.add(old_name)
+        self.stats.inc_value("browser_pool/contexts_recycled")
+        logger.info(f"Recycling browser context {old_name} ({reason})")
+
+    def _page_closed(self, context_name):
+        self.open_pages[context_name] = self.open_pages.get(context_name, 1) - 1
+        self._maybe_close(context_name)
+
+    def _maybe_close(self, context_name):
+        # Wait for both open pages and requests still queued for the context,
+        # otherwise a queued request would re-create it under the retired name.
+        if context_name not in self.retiring:
+            return
+        if self.open_pages.get(context_name, 0) > 0 or self.pending.get(context_name, 0) > 0:
+            return
+        self.retiring.discard(context_name)
+        self.open_pages.pop(context_name, None)
+        self.pending.pop(context_name, None)
+        context = self.contexts.pop(context_name, None)
+        if context is not None:
+            # scrapy-playwright drops the context (and frees its slot) on close;
+            # the slot's next request opens a fresh one.
+            asyncio.ensure_future(context.close())
+
+    def spider_closed(self, spider):
+        if not self.waits:
+            return
+        waits = sorted(self.waits)
+        p95 = waits[min(len(waits) - 1, int(len(waits) * 0.95))]
+        self.stats.set_value("browser_pool/acquire_wait_seconds_p50", statistics.median(waits))
+        self.stats.set_value("browser_pool/acquire_wait_seconds_p95", p95)
+        logger.info(
+            f"Browser pool: {len(waits)} pages, acquire wait p50 {statistics.median(waits):.2f}s "
+            f"p95 {p95:.2f}s max {waits[-1]:.2f}s"
+        )
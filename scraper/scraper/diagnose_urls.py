@@ -5,51 +5,33 @@ import subprocess
 import sys
 import re
 from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scraper.url_classifier import classify
 
 def analyze_url(url):
     """Analyze a URL to determine why it might be rejected"""
-    url_lower = url.lower()
+    verdict = classify(url)
     
     analysis = {
         'url': url,
-        'is_youtube': 'youtube' in url_lower or 'youtu.be' in url_lower,
-        'is_social': any(x in url_lower for x in ['facebook', 'twitter', 'instagram', 'tiktok']),
-        'is_movie_info': any(x in url_lower for x in ['imdb', 'themoviedb', 'tvdb']),
-        'is_navigation': '1flix.to/movie/' in url_lower or '1flix.to/tv/' in url_lower,
-        'has_embed': 'embed' in url_lower,
-        'has_player': 'player' in url_lower,
-        'has_stream': 'stream' in url_lower,
-        'has_video': 'video' in url_lower,
-        'has_slash_e': '/e/' in url_lower,
-        'is_http': url_lower.startswith('http'),
+        'is_youtube': verdict.is_youtube,
+        'is_social': 'social' in verdict.categories,
+        'is_movie_info': 'movie_info' in verdict.categories,
+        'is_navigation': verdict.is_navigation,
+        'has_embed': 'embed' in verdict.patterns,
+        'has_player': 'player' in verdict.patterns,
+        'has_stream': 'stream' in verdict.patterns,
+        'has_video': 'video' in verdict.patterns,
+        'has_slash_e': '/e/' in verdict.patterns,
+        'is_http': url.lower().startswith('http'),
+        'known_host': verdict.is_video_host,
+        'reasons': verdict.reasons,
     }
     
-    # Check against known video hosts
-    video_hosts = [
-        'vidoza', 'streamtape', 'mixdrop', 'doodstream', 'dood',
-        'filemoon', 'upstream', 'streamlare', 'voe', 'supervideo',
-        'vidcloud', 'fembed', 'mp4upload', 'streamplay', 'streamwish',
-    ]
-    analysis['known_host'] = any(host in url_lower for host in video_hosts)
-    
-    # Determine if should accept
-    should_reject = (
-        analysis['is_youtube'] or 
-        analysis['is_social'] or 
-        analysis['is_movie_info'] or 
-        analysis['is_navigation'] or 
-        not analysis['is_http']
-    )
-    
-    should_accept = (
-        analysis['known_host'] or 
-        analysis['has_embed'] or 
-        analysis['has_player'] or 
-        analysis['has_stream'] or 
-        analysis['has_slash_e']
-    )
-    
-    analysis['verdict'] = 'REJECT' if should_reject else ('ACCEPT' if should_accept else 'MAYBE REJECT')
+    analysis['verdict'] = 'REJECT' if verdict.reject else ('ACCEPT' if verdict.accept else 'MAYBE REJECT')
     
     return analysis
 
@@ -111,22 +93,8 @@ def run_diagnostic_scrape(movie_url):
                 analysis = analyze_url(url)
                 print(f"\n{analysis['verdict']}: {url[:80]}")
                 
-                reasons = []
-                if analysis['is_youtube']:
-                    reasons.append("❌ YouTube")
-                if analysis['is_social']:
-                    reasons.append("❌ Social Media")
-                if analysis['known_host']:
-                    reasons.append("✅ Known Video Host")
-                if analysis['has_embed']:
-                    reasons.append("✅ Has 'embed'")
-                if analysis['has_player']:
-                    reasons.append("✅ Has 'player'")
-                if analysis['has_stream']:
-                    reasons.append("✅ Has 'stream'")
-                    
-                if reasons:
-                    print(f"  Reasons: {', '.join(reasons)}")
+                if analysis['reasons']:
+                    print(f"  Reasons: {', '.join(analysis['reasons'])}")
             
             if len(url_list) > 5:
                 print(f"\n  ... and {len(url_list) - 5} more")
@@ -158,7 +126,7 @@ def run_diagnostic_scrape(movie_url):
                 print(f"\n📋 Unknown URLs to investigate:")
                 for url in categories['Unknown/Other'][:10]:
                     print(f"  {url[:80]}")
-                print(f"\n  Consider adding these domains to VIDEO_HOSTS if they're streaming sites")
+                print(f"\n  Consider adding these domains to url_classifier.HOST_RULES['video_host'] if they're streaming sites")
         
         if youtube_count > 0:
             print(f"\n✅ GOOD: YouTube filtering is working ({youtube_count} rejected)")
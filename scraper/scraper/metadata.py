@@ -0,0 +1,201 @@
+"""
+Title, year, poster, synopsis and IMDb id of a detail page.
+
+extract_metadata(response) works on the already parsed document: one walk
+over its meta/script tags, then precompiled XPaths for the fallbacks. Each
+field comes from the first source that has it:
+
+1. JSON-LD (``<script type="application/ld+json">``, Movie/TVSeries/... objects),
+2. OpenGraph / Twitter / ``<meta name|itemprop>`` tags,
+3. targeted selectors: ``<h1>``, a "(2024)" suffix in the title, short
+   4-digit ``<span>``/``<div>`` texts, poster images, IMDb links.
+
+Only when the document has no IMDb link at all is the raw page text
+searched for a ``tt`` id, in a single pass. Fields that stay unknown are None;
+the spiders add their site-specific last resorts on top.
+"""
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Optional
+
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+H1_XPATH = etree.XPath("normalize-space((//h1)[1])")
+YEAR_TEXT_XPATH = etree.XPath("(//span | //div)/text()[string-length(normalize-space()) = 4]")
+POSTER_XPATH = etree.XPath(
+    "(//img[contains(@class, 'poster')]/@src | //img[contains(@class, 'poster')]/@data-src)[1]"
+)
+IMDB_HREF_XPATH = etree.XPath("(//a[contains(@href, 'imdb.com/title/tt')]/@href)[1]")
+
+LD_TYPES = {"Movie", "TVSeries", "TVSeason", "TVEpisode", "VideoObject", "CreativeWork"}
+
+META_KEYS = {
+    "title": ["og:title", "twitter:title"],
+    "year": ["video:release_date", "og:video:release_date", "datepublished", "release_date"],
+    "poster_url": ["og:image", "og:image:url", "twitter:image", "twitter:image:src", "image"],
+    "synopsis": ["og:description", "description", "twitter:description"],
+}
+
+IMDB_URL_RE = re.compile(r"imdb\.com/title/(tt\d{7,8})", re.IGNORECASE)
+# An IMDb URL anywhere wins over a bare id earlier in the text.
+IMDB_TEXT_RE = re.compile(r"(?i:imdb\.com/title/)(tt\d{7,8})|\b(tt\d{7,8})\b")
+YEAR_RE = re.compile(r"\b(1[89]\d{2}|2\d{3})\b")
+TITLE_YEAR_RE = re.compile(r"^(.+?)\s*\((\d{4})\)\s*$")
+
+
+@dataclass(slots=True)
+class PageMetadata:
+    title: Optional[str] = None
+    year: Optional[int] = None
+    poster_url: Optional[str] = None
+    synopsis: Optional[str] = None
+    imdb_id: Optional[str] = None
+    # field -> where it came from ("json-ld", "meta", "html", "text")
+    sources: dict = field(default_factory=dict)
+
+    def set(self, name, value, source):
+        if value and getattr(self, name) is None:
+            setattr(self, name, value)
+            self.sources[name] = source
+
+
+def _valid_year(value):
+    m = YEAR_RE.search(str(value or ""))
+    if m and 1900 <= int(m.group(1)) <= date.today().year + 1:
+        return int(m.group(1))
+    return None
+
+
+def _text(value):
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        value = value.get("url") or value.get("@id") or value.get("name")
+    if isinstance(value, str):
+        value = " ".join(value.split())
+        return value or None
+    return None
+
+
+def _ld_objects(texts):
+    """Movie-like objects from the JSON-LD blocks, @graph and lists included."""
+    for text in texts:
+        try:
+            data = json.loads(text)
+        except ValueError:
+            logger.debug(f"Invalid JSON-LD block: {text[:80]!r}")
+            continue
+        stack = [data]
+        while stack:
+            obj = stack.pop()
+            if isinstance(obj, list):
+                stack.extend(reversed(obj))
+            elif isinstance(obj, dict):
+                if "@graph" in obj:
+                    stack.extend(reversed(obj["@graph"]))
+                types = obj.get("@type")
+                # Only string types count; some sites nest objects in @type.
+                types = types if isinstance(types, list) else [types]
+                if any(isinstance(t, str) and t in LD_TYPES for t in types):
+                    yield obj
+
+
+def _imdb_from_ld(obj):
+    for key in ("sameAs", "url", "@id"):
+        values = obj.get(key)
+        for value in values if isinstance(values, list) else [values]:
+            m = IMDB_URL_RE.search(value) if isinstance(value, str) else None
+            if m:
+                return m.group(1)
+    return None
+
+
+def _strip_site_name(title, site_name):
+    # "Movie (2024) | Site" -> "Movie (2024)"
+    if title and site_name and title.lower().endswith(site_name.lower()):
+        stripped = title[: -len(site_name)].rstrip(" |-–—:")
+        return stripped or title
+    return title
+
+
+def extract_metadata(response, search_text=True):
+    """PageMetadata for ``response``; ``search_text=False`` skips the raw-text IMDb search."""
+    root = response.selector.root
+    metadata = PageMetadata()
+
+    # JSON-LD and meta tags in one walk (lxml's tag filter is cheaper than an XPath union).
+    ld_texts, meta = [], {}
+    for node in root.iter("meta", "script"):
+        if node.tag == "script":
+            if node.get("type") == "application/ld+json" and node.text:
+                ld_texts.append(node.text)
+            continue
+        key = (node.get("property") or node.get("name") or node.get("itemprop") or "").strip().lower()
+        if key and node.get("content") is not None:
+            meta.setdefault(key, node.get("content"))
+
+    for obj in _ld_objects(ld_texts):
+        metadata.set("title", _text(obj.get("name")), "json-ld")
+        for key in ("datePublished", "dateCreated", "startDate", "copyrightYear"):
+            metadata.set("year", _valid_year(obj.get(key)), "json-ld")
+        metadata.set("poster_url", _text(obj.get("image") or obj.get("thumbnailUrl")), "json-ld")
+        metadata.set("synopsis", _text(obj.get("description")), "json-ld")
+        metadata.set("imdb_id", _imdb_from_ld(obj), "json-ld")
+
+    for name, keys in META_KEYS.items():
+        for key in keys:
+            value = meta.get(key)
+            if value is None or getattr(metadata, name) is not None:
+                continue
+            if name == "year":
+                value = _valid_year(value)
+            elif name == "title":
+                value = _strip_site_name(_text(value), meta.get("og:site_name"))
+            else:
+                value = _text(value)
+            metadata.set(name, value, "meta")
+    for value in meta.values():
+        m = IMDB_URL_RE.search(value or "")
+        if m:
+            metadata.set("imdb_id", m.group(1), "meta")
+            break
+
+    if metadata.title is None:
+        metadata.set("title", H1_XPATH(root) or None, "html")
+    if metadata.title:
+        m = TITLE_YEAR_RE.match(metadata.title)
+        if m:
+            metadata.title = m.group(1)
+            metadata.set("year", _valid_year(m.group(2)), metadata.sources["title"])
+    if metadata.year is None:
+        for text in YEAR_TEXT_XPATH(root):
+            text = text.strip()
+            if text.isdigit():
+                metadata.set("year", _valid_year(text), "html")
+                if metadata.year:
+                    break
+    if metadata.poster_url is None:
+        poster = POSTER_XPATH(root)
+        metadata.set("poster_url", poster[0].strip() if poster else None, "html")
+    if metadata.poster_url:
+        metadata.poster_url = response.urljoin(metadata.poster_url)
+
+    if metadata.imdb_id is None:
+        href = IMDB_HREF_XPATH(root)
+        m = IMDB_URL_RE.search(href[0]) if href else None
+        metadata.set("imdb_id", m.group(1) if m else None, "html")
+    if metadata.imdb_id is None and search_text:
+        bare = None
+        for m in IMDB_TEXT_RE.finditer(response.text or ""):
+            if m.group(1):
+                metadata.set("imdb_id", m.group(1), "text")
+                break
+            bare = bare or m.group(2)
+        metadata.set("imdb_id", bare, "text")
+
+    return metadata
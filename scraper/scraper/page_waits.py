@@ -0,0 +1,172 @@
+"""
+Condition-driven waits for Playwright pages.
+
+A StreamWait ends as soon as the page has what the spider reads: a player
+element (iframe/embed/video) or a stream candidate in the network traffic
+(scraper.stream_capture), followed by a short quiet period in the DOM. All
+waits of one page load share a single budget, so a page whose player never
+shows up costs at most ``budget_ms``.
+
+The wait methods are plain async functions of the page, so they work both as
+scrapy-playwright PageMethods and directly on a Playwright page (see
+benchmarks/bench_detail_waits.py). Use the StreamWait as the request's
+``playwright_page_init_callback`` so a retried request starts with the full
+budget again.
+
+Playwright is imported when a wait runs, not with this module, so spiders
+that never open a browser page don't load it.
+"""
+import asyncio
+import logging
+import time
+
+from scraper.stream_capture import STREAM_URL_PATTERN, StreamCapture
+
+logger = logging.getLogger(__name__)
+
+PLAYER_SELECTOR = ", ".join([
+    "iframe[src^='http']",
+    "iframe[data-src^='http']",
+    "embed[src]",
+    "video[src]",
+    "video source[src]",
+])
+
+# Server/episode buttons the detail page renders before a player exists.
+SERVER_SELECTOR = ", ".join([
+    "a[data-link]", "button[data-link]",
+    "[data-server]", "[data-embed]", "[data-player]",
+    ".server-item", ".server-btn", ".episode-server",
+])
+
+PLAYER_READY_JS = """
+([selector, pattern]) => {
+    if (document.querySelector(selector)) return true;
+    const re = new RegExp(pattern, 'i');
+    return performance.getEntriesByType('resource').some(r => re.test(r.name));
+}
+"""
+
+# Resolves once no nodes or link attributes changed for stableMs, or after maxMs.
+DOM_QUIET_JS = """
+([stableMs, maxMs]) => new Promise(resolve => {
+    let quiet = null;
+    let cap = null;
+    const observer = new MutationObserver(() => {
+        clearTimeout(quiet);
+        quiet = setTimeout(() => done(true), stableMs);
+    });
+    const done = (stable) => {
+        observer.disconnect();
+        clearTimeout(quiet);
+        clearTimeout(cap);
+        resolve(stable);
+    };
+    observer.observe(document.documentElement, {
+        childList: true,
+        subtree: true,
+        attributes: true,
+        attributeFilter: ['src', 'href', 'data-src', 'data-link', 'data-url'],
+    });
+    quiet = setTimeout(() => done(true), stableMs);
+    cap = setTimeout(() => done(false), maxMs);
+})
+"""
+
+
+class StreamWait:
+    """Shared wait budget for one page load.
+
+    The clock starts with the first wait (after navigation). ``reason`` says
+    what ended ``for_player``: "player", "response" or "budget". Pass the
+    request's StreamCapture so traffic from before the first wait counts.
+    """
+
+    def __init__(self, budget_ms=15000, stable_ms=1000, capture=None):
+        self.budget_ms = budget_ms
+        self.stable_ms = stable_ms
+        self.capture = capture or StreamCapture()
+        self.started = None
+        self.reason = None
+
+    async def __call__(self, page, request):
+        # playwright_page_init_callback signature. Retries copy the request's
+        # meta, so each attempt resets the clock and the capture here.
+        self.started = None
+        self.reason = None
+        await self.capture(page, request)
+
+    @property
+    def elapsed_ms(self):
+        if self.started is None:
+            return 0
+        return int((time.monotonic() - self.started) * 1000)
+
+    def remaining_ms(self):
+        if self.started is None:
+            self.started = time.monotonic()
+        return max(0, self.budget_ms - self.elapsed_ms)
+
+    async def for_selector(self, page, selector=SERVER_SELECTOR, share=0.4):
+        """Wait until ``selector`` is attached, using at most ``share`` of the budget."""
+        from playwright.async_api import Error as PlaywrightError
+
+        self.capture.attach(page)
+        timeout = int(min(self.remaining_ms(), self.budget_ms * share))
+        if timeout <= 0:
+            return False
+        try:
+            await page.wait_for_selector(selector, state="attached", timeout=timeout)
+            return True
+        except PlaywrightError as e:
+            logger.debug(f"No '{selector}' within {timeout} ms: {e}")
+            return False
+
+    async def for_player(self, page):
+        """Wait for a player element or a captured stream, whichever comes first."""
+        self.capture.attach(page)
+        remaining = self.remaining_ms()
+        if self.capture.matched >= self.capture.min_candidates:
+            self.reason = "response"
+            return self.reason
+        if remaining <= 0:
+            self.reason = "budget"
+            return self.reason
+
+        condition = asyncio.ensure_future(page.wait_for_function(
+            PLAYER_READY_JS,
+            arg=[PLAYER_SELECTOR, STREAM_URL_PATTERN],
+            polling=250,
+            timeout=remaining,
+        ))
+        response_seen = asyncio.ensure_future(self.capture.wait(remaining))
+        done, pending = await asyncio.wait(
+            {condition, response_seen},
+            timeout=remaining / 1000,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        for task in pending:
+            task.cancel()
+
+        if condition in done and condition.exception() is None:
+            self.reason = "player"
+        elif response_seen in done and response_seen.result():
+            self.reason = "response"
+        else:
+            self.reason = "budget"
+        return self.reason
+
+    async def for_dom_stable(self, page, stable_ms=None):
+        """Wait until the DOM has been quiet for ``stable_ms`` (capped by the budget)."""
+        from playwright.async_api import Error as PlaywrightError
+
+        remaining = self.remaining_ms()
+        if remaining <= 0:
+            return False
+        stable_ms = min(self.stable_ms if stable_ms is None else stable_ms, remaining)
+        try:
+            return await page.evaluate(DOM_QUIET_JS, [stable_ms, remaining])
+        except PlaywrightError as e:
+            # Usually an ad redirect replacing the execution context.
+            logger.debug(f"DOM stability wait aborted: {e}")
+            return False
@@ -1,102 +1,184 @@
 # scraper/scraper/pipelines.py
+import time
+
+from django.db import transaction
 from itemadapter import ItemAdapter
 from streaming.models import Movie, StreamingLink
-from twisted.internet import threads
+from twisted.internet import defer, task, threads
+
+MOVIE_UPDATE_FIELDS = ['title', 'year', 'type', 'synopsis', 'poster_url', 'original_detail_url', 'updated_at']
+LINK_UPDATE_FIELDS = ['quality', 'language', 'is_active']
+
 
 class DjangoItemPipeline:
+    """Buffers scraped items and writes them to Django in batched transactions.
+
+    Items are flushed when PIPELINE_BATCH_SIZE items are buffered, when
+    PIPELINE_FLUSH_INTERVAL seconds pass, and on close_spider. Each flush is one
+    transaction: movies are upserted on imdb_id and their links on
+    (movie, source_url), one bulk_create each.
+    """
+
+    def __init__(self, batch_size=50, flush_interval=5.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.last_flush = time.monotonic()
+        # Only one flush thread touches the database at a time.
+        self.lock = defer.DeferredLock()
+        self.timer = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            batch_size=crawler.settings.getint('PIPELINE_BATCH_SIZE', 50),
+            flush_interval=crawler.settings.getfloat('PIPELINE_FLUSH_INTERVAL', 5.0),
+        )
+
+    def open_spider(self, spider):
+        self.spider = spider
+        if self.flush_interval > 0:
+            self.timer = task.LoopingCall(self._flush_if_stale)
+            self.timer.start(self.flush_interval, now=False)
+
+    def close_spider(self, spider):
+        if self.timer and self.timer.running:
+            self.timer.stop()
+        return self._flush()
+
     def process_item(self, item, spider):
-        # Use Twisted's deferToThread to run Django ORM in a separate thread
-        return threads.deferToThread(self._process_item_sync, item, spider)
-    
-    def _process_item_sync(self, item, spider):
-        """Synchronous processing of item in a separate thread"""
-        adapter = ItemAdapter(item)
-
-        # Determine if this is old MovieItem or new StreamingItem format
-        if 'stream_url' in adapter.keys():
-            # OLD FORMAT from goojara spider (MovieItem)
-            return self._process_old_format(adapter, spider)
-        elif 'links' in adapter.keys():
-            # NEW FORMAT from oneflix/fawesome spiders (StreamingItem)
-            return self._process_new_format(adapter, spider)
-        else:
-            spider.logger.warning(f"Unknown item format: {adapter.keys()}")
+        self.buffer.append(ItemAdapter(item).asdict())
+        if len(self.buffer) < self.batch_size:
             return item
+        # Hold this item until its batch is written so a slow database applies backpressure.
+        d = self._flush()
+        d.addCallback(lambda _: item)
+        return d
 
-    def _process_old_format(self, adapter, spider):
-        """Process old MovieItem format (goojara spider)"""
-        # Create or update the Movie
-        movie_defaults = {
-            'title': adapter.get('title'),
-            'year': adapter.get('year'),
-            'synopsis': adapter.get('synopsis'),
-            'poster_url': adapter.get('poster_url'),
-            'type': 'movie',  # goojara only does movies
-            'original_detail_url': adapter.get('source_url'),  # Map source_url to original_detail_url
-        }
-        
-        movie, created = Movie.objects.update_or_create(
-            imdb_id=adapter.get('imdb_id'),
-            defaults=movie_defaults
-        )
+    def _flush_if_stale(self):
+        if self.buffer and time.monotonic() - self.last_flush >= self.flush_interval:
+            return self._flush()
+
+    def _flush(self):
+        batch, self.buffer = self.buffer, []
+        self.last_flush = time.monotonic()
+        if not batch:
+            return defer.succeed(None)
+        d = self.lock.run(threads.deferToThread, self.write_batch, batch, self.spider.logger)
+        d.addErrback(lambda failure: self.spider.logger.error(f'Pipeline flush failed: {failure.value}'))
+        return d
 
-        # Create or update the StreamingLink
-        if adapter.get('stream_url'):
-            link_defaults = {
-                'quality': adapter.get('quality', 'HD'),
-                'language': adapter.get('language', 'EN'),
-                'is_active': True,
-            }
-            
-            link, link_created = StreamingLink.objects.update_or_create(
-                movie=movie,
-                source_url=adapter.get('stream_url'),
-                defaults=link_defaults
+    def write_batch(self, batch, logger):
+        """Write ``batch`` (a list of item dicts) in one transaction.
+
+        If the batch fails, retry item by item so one bad item doesn't drop the rest.
+        """
+        records = self._normalize(batch, logger)
+        if not records:
+            return 0
+        try:
+            with transaction.atomic():
+                created, updated = self._write(records)
+            logger.info(
+                f'Saved {len(records)} movies ({created} new links, {updated} updated links)'
             )
-            
-            if link_created:
-                spider.logger.info(f'Created new link for {movie.title}')
+        except Exception as e:
+            logger.warning(f'Batch of {len(records)} items failed ({e}); retrying one by one')
+            for imdb_id, record in records.items():
+                try:
+                    with transaction.atomic():
+                        self._write({imdb_id: record})
+                except Exception as item_error:
+                    logger.error(f'Failed to save {imdb_id}: {item_error}')
+        return len(records)
+
+    def _normalize(self, batch, logger):
+        """Map both item formats to ``{imdb_id: (movie_fields, links)}``, merging duplicates."""
+        records = {}
+        for adapter in batch:
+            imdb_id = adapter.get('imdb_id')
+            if not imdb_id:
+                logger.warning(f"Skipping item without imdb_id: {adapter.get('title')}")
+                continue
+
+            if 'stream_url' in adapter:
+                # OLD FORMAT from goojara spider (MovieItem)
+                movie_fields = {
+                    'title': adapter.get('title') or '',
+                    'year': adapter.get('year'),
+                    'synopsis': adapter.get('synopsis'),
+                    'poster_url': adapter.get('poster_url'),
+                    'type': 'movie',  # goojara only does movies
+                    'original_detail_url': adapter.get('source_url'),
+                }
+                links = []
+                if adapter.get('stream_url'):
+                    links.append({
+                        'source_url': adapter.get('stream_url'),
+                        'quality': adapter.get('quality', 'HD'),
+                        'language': adapter.get('language', 'EN'),
+                        'is_active': True,
+                    })
+            elif 'links' in adapter:
+                # NEW FORMAT from oneflix/fawesome spiders (StreamingItem)
+                movie_fields = {
+                    'title': adapter.get('title') or '',
+                    'year': adapter.get('year'),
+                    'type': adapter.get('type', 'movie'),
+                    'synopsis': adapter.get('synopsis'),
+                    'poster_url': adapter.get('poster_url'),
+                    'original_detail_url': adapter.get('original_detail_url'),
+                }
+                links = [
+                    {
+                        'source_url': link.get('source_url'),
+                        'quality': link.get('quality', 'HD'),
+                        'language': link.get('language', 'EN'),
+                        'is_active': link.get('is_active', True),
+                    }
+                    for link in adapter.get('links') or []
+                    if link.get('source_url')
+                ]
+                if not links:
+                    logger.warning(f"No streaming links for {movie_fields['title']}")
             else:
-                spider.logger.info(f'Updated link for {movie.title}')
-        
-        return adapter.asdict()
-
-    def _process_new_format(self, adapter, spider):
-        """Process new StreamingItem format (oneflix/fawesome spiders)"""
-        # Create or update the Movie
-        movie_defaults = {
-            'title': adapter.get('title'),
-            'year': adapter.get('year'),
-            'type': adapter.get('type', 'movie'),
-            'synopsis': adapter.get('synopsis'),
-            'poster_url': adapter.get('poster_url'),
-            'original_detail_url': adapter.get('original_detail_url'),
-        }
-        
-        movie, created = Movie.objects.update_or_create(
-            imdb_id=adapter.get('imdb_id'),
-            defaults=movie_defaults
+                logger.warning(f'Unknown item format: {list(adapter.keys())}')
+                continue
+
+            if imdb_id in records:
+                previous_links = records[imdb_id][1]
+                links = previous_links + links
+            records[imdb_id] = (movie_fields, links)
+        return records
+
+    def _write(self, records):
+        Movie.objects.bulk_create(
+            [Movie(imdb_id=imdb_id, **fields) for imdb_id, (fields, _) in records.items()],
+            update_conflicts=True,
+            unique_fields=['imdb_id'],
+            update_fields=MOVIE_UPDATE_FIELDS,
         )
+        movie_ids = dict(Movie.objects.filter(imdb_id__in=records).values_list('imdb_id', 'id'))
+
+        links = {}
+        for imdb_id, (_, item_links) in records.items():
+            for link in item_links:
+                # Later duplicates of the same URL win.
+                links[(movie_ids[imdb_id], link['source_url'])] = link
 
-        # Process streaming links
-        links = adapter.get('links', [])
+        existing = set()
         if links:
-            for link_data in links:
-                link_defaults = {
-                    'quality': link_data.get('quality', 'HD'),
-                    'language': link_data.get('language', 'EN'),
-                    'is_active': link_data.get('is_active', True),
-                }
-                
-                link, link_created = StreamingLink.objects.update_or_create(
-                    movie=movie,
-                    source_url=link_data.get('source_url'),
-                    defaults=link_defaults
-                )
-                
-                if link_created:
-                    spider.logger.info(f'Created new link for {movie.title}')
-        else:
-            spider.logger.warning(f'No streaming links for {movie.title}')
-        
-        return adapter.asdict()
\ No newline at end of file
+            existing = set(
+                StreamingLink.objects.filter(
+                    movie_id__in=movie_ids.values(),
+                    source_url__in={source_url for _, source_url in links},
+                ).values_list('movie_id', 'source_url')
+            )
+            StreamingLink.objects.bulk_create(
+                [StreamingLink(movie_id=movie_id, **data) for (movie_id, _), data in links.items()],
+                update_conflicts=True,
+                unique_fields=['movie', 'source_url'],
+                update_fields=LINK_UPDATE_FIELDS,
+            )
+        updated = sum(1 for key in links if key in existing)
+        return len(links) - updated, updated
@@ -0,0 +1,160 @@
+"""
+Block unneeded subresources of Playwright pages.
+
+ResourceBlockerMiddleware adds a route to every Playwright page (through
+playwright_page_init_callback) that aborts requests:
+
+- to hosts in PLAYWRIGHT_BLOCKED_HOSTS (ads, analytics; subdomains included),
+- of a resource type in PLAYWRIGHT_BLOCKED_RESOURCE_TYPES (images, fonts),
+- whose URL matches PLAYWRIGHT_BLOCKED_URL_PATTERN (HLS/DASH media segments).
+
+"media" requests are not blocked by default: a video URL without a file
+extension is only recognised as a stream from its response Content-Type, so
+aborting it would hide it from stream capture. Segments are caught by the URL
+pattern instead.
+
+The page's own navigation and anything scraper.stream_capture recognises as a
+stream (manifests, mp4, player iframes) always go through. Everything else
+falls back to scrapy-playwright's route handler. Set ``resource_blocking`` to
+False in a request's meta to load it unfiltered.
+
+Aborted requests are never downloaded, so their size is unknown. The crawl
+stats report ``resource_blocker/bytes_saved_estimate``, based on typical sizes
+per resource type (PLAYWRIGHT_BLOCKED_BYTES_ESTIMATE).
+"""
+import logging
+import re
+from urllib.parse import urlsplit
+
+from scraper.stream_capture import classify_url
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCKED_RESOURCE_TYPES = ["image", "font"]
+
+DEFAULT_BLOCKED_HOSTS = [
+    # Ads
+    "doubleclick.net", "googlesyndication.com", "googletagservices.com",
+    "adservice.google.com", "amazon-adsystem.com", "criteo.com", "taboola.com",
+    "outbrain.com", "mgid.com", "popads.net", "popcash.net", "propellerads.com",
+    "adsterra.com", "exoclick.com", "juicyads.com",
+    # Analytics / tracking
+    "google-analytics.com", "googletagmanager.com", "facebook.net",
+    "hotjar.com", "scorecardresearch.com", "quantserve.com", "histats.com",
+    "mc.yandex.ru", "cloudflareinsights.com", "sysmeasuring.net",
+]
+
+# Segments of HLS/DASH streams; the manifests themselves stay allowed.
+DEFAULT_BLOCKED_URL_PATTERN = r"\.(ts|m4s|m4v|aac)(\?|$)"
+
+# Rough average transfer size per blocked request, in bytes.
+DEFAULT_BYTES_ESTIMATE = {
+    "image": 60_000,
+    "font": 40_000,
+    "media": 500_000,
+    "script": 40_000,
+    "stylesheet": 20_000,
+    "segment": 700_000,
+    "other": 5_000,
+}
+
+
+def host_matches(host, blocked_hosts):
+    """True if ``host`` is one of ``blocked_hosts`` or a subdomain of one."""
+    host = (host or "").lower()
+    while host:
+        if host in blocked_hosts:
+            return True
+        _, _, host = host.partition(".")
+    return False
+
+
+class ResourceBlockerMiddleware:
+    """Downloader middleware that installs the blocking route on Playwright pages."""
+
+    def __init__(self, stats, resource_types, hosts, url_pattern, bytes_estimate):
+        self.stats = stats
+        self.resource_types = set(resource_types)
+        self.hosts = {host.lower() for host in hosts}
+        self.url_re = re.compile(url_pattern, re.IGNORECASE) if url_pattern else None
+        self.bytes_estimate = bytes_estimate
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool("PLAYWRIGHT_BLOCK_RESOURCES", True):
+            from scrapy.exceptions import NotConfigured
+
+            raise NotConfigured
+        return cls(
+            crawler.stats,
+            resource_types=settings.getlist("PLAYWRIGHT_BLOCKED_RESOURCE_TYPES", DEFAULT_BLOCKED_RESOURCE_TYPES),
+            hosts=settings.getlist("PLAYWRIGHT_BLOCKED_HOSTS", DEFAULT_BLOCKED_HOSTS),
+            url_pattern=settings.get("PLAYWRIGHT_BLOCKED_URL_PATTERN", DEFAULT_BLOCKED_URL_PATTERN),
+            bytes_estimate={
+                **DEFAULT_BYTES_ESTIMATE,
+                **settings.getdict("PLAYWRIGHT_BLOCKED_BYTES_ESTIMATE"),
+            },
+        )
+
+    def process_request(self, request, spider):
+        if not request.meta.get("playwright") or request.meta.get("resource_blocking") is False:
+            return None
+        if request.meta.get("resource_blocking_installed"):
+            # Retries keep the already wrapped callback.
+            return None
+        request.meta["resource_blocking_installed"] = True
+        previous = request.meta.get("playwright_page_init_callback")
+        request.meta["playwright_page_init_callback"] = self._page_init_callback(previous)
+        return None
+
+    def _page_init_callback(self, previous):
+        async def page_init(page, request):
+            await page.route("**", self._route)
+            if previous:
+                from scrapy.utils.misc import load_object
+
+                await load_object(previous)(page, request)
+
+        return page_init
+
+    def block_reason(self, playwright_request):
+        """Why a request should be aborted ("host", a resource type, "segment"), or None."""
+        url = playwright_request.url
+        resource_type = playwright_request.resource_type
+        try:
+            in_subframe = playwright_request.frame.parent_frame is not None
+        except Exception:
+            # Service worker requests have no frame.
+            in_subframe = False
+        if playwright_request.is_navigation_request() and not in_subframe:
+            return None
+        if classify_url(url, resource_type, in_subframe):
+            return None
+        if host_matches(urlsplit(url).hostname, self.hosts):
+            return "host"
+        if resource_type in self.resource_types:
+            return resource_type
+        if self.url_re is not None and self.url_re.search(url):
+            return "segment"
+        return None
+
+    async def _route(self, route, playwright_request):
+        reason = self.block_reason(playwright_request)
+        try:
+            if reason is None:
+                await route.fallback()
+                return
+            await route.abort("blockedbyclient")
+        except Exception as e:
+            # The page was closed while the request was in flight.
+            logger.debug(f"Route for {playwright_request.url[:100]} not handled: {e}")
+            return
+
+        size_key = reason if reason in self.bytes_estimate else playwright_request.resource_type
+        self.stats.inc_value("resource_blocker/blocked")
+        self.stats.inc_value(f"resource_blocker/blocked/{reason}")
+        self.stats.inc_value(
+            "resource_blocker/bytes_saved_estimate",
+            self.bytes_estimate.get(size_key, self.bytes_estimate["other"]),
+        )
@@ -10,6 +10,8 @@ sys.path.append(str(DJANGO_PROJECT_PATH))
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "MovieBackends.settings")
 django.setup()
 
+from scraper.browser_pool import derive_limits  # noqa: E402
+
 
 BOT_NAME = "scraper"
 
@@ -27,6 +29,10 @@ DOWNLOAD_DELAY = 0.5
 ITEM_PIPELINES = {
     "scraper.pipelines.DjangoItemPipeline": 300,
 }
+# DjangoItemPipeline writes items in batches: flush after this many items or
+# this many seconds, whichever comes first (and always when the spider closes).
+PIPELINE_BATCH_SIZE = 50
+PIPELINE_FLUSH_INTERVAL = 5.0
 
 # Simple user agent; customize for your target site if required.
 DEFAULT_REQUEST_HEADERS = {
@@ -44,6 +50,47 @@ DOWNLOAD_HANDLERS = {
 }
 PLAYWRIGHT_BROWSER_TYPE = "chromium"
 PLAYWRIGHT_DEFAULT_NAVIGATION_TIMEOUT = 60000
-# Limit concurrency to reduce timeouts and avoid hitting anti-bot too hard.
-PLAYWRIGHT_MAX_CONTEXTS = 1
-PLAYWRIGHT_MAX_PAGES_PER_CONTEXT = 2
\ No newline at end of file
+# Headless on a plain Linux box; /dev/shm is often tiny in containers.
+PLAYWRIGHT_LAUNCH_OPTIONS = {
+    "headless": True,
+    "args": ["--disable-dev-shm-usage", "--disable-gpu"],
+}
+# Connect to an already running Chromium (e.g. `chromium --headless
+# --remote-debugging-port=9222`) so every crawl shares one warm browser.
+if os.environ.get("PLAYWRIGHT_CDP_URL"):
+    PLAYWRIGHT_CDP_URL = os.environ["PLAYWRIGHT_CDP_URL"]
+
+# Context/page limits sized from available memory (scraper.browser_pool);
+# the env vars override them.
+_pool_contexts, _pool_pages = derive_limits()
+PLAYWRIGHT_MAX_CONTEXTS = int(os.environ.get("PLAYWRIGHT_MAX_CONTEXTS", _pool_contexts))
+PLAYWRIGHT_MAX_PAGES_PER_CONTEXT = int(os.environ.get("PLAYWRIGHT_MAX_PAGES_PER_CONTEXT", _pool_pages))
+
+# BrowserPoolMiddleware keeps one warm context per slot and recycles it after
+# this many pages, or recycles all of them when the browser's RSS passes
+# PLAYWRIGHT_POOL_MAX_RSS_MB (0 disables the memory check).
+DOWNLOADER_MIDDLEWARES = {
+    "scraper.resource_blocking.ResourceBlockerMiddleware": 940,
+    # Close to the download handler so it sees responses/exceptions before retries.
+    "scraper.browser_pool.BrowserPoolMiddleware": 950,
+}
+PLAYWRIGHT_POOL_RECYCLE_PAGES = 50
+PLAYWRIGHT_POOL_MAX_RSS_MB = int(os.environ.get("PLAYWRIGHT_POOL_MAX_RSS_MB", 1500))
+PLAYWRIGHT_POOL_MEMORY_CHECK_PAGES = 10
+
+# OneFlixSpider detail pages: upper bound for all waits after navigation
+# (scraper.page_waits), and how long the DOM must stay quiet at the end.
+ONEFLIX_DETAIL_WAIT_BUDGET_MS = int(os.environ.get("ONEFLIX_DETAIL_WAIT_BUDGET_MS", 15000))
+ONEFLIX_DETAIL_STABLE_MS = 1000
+
+# Abort images, fonts, HLS/DASH segments and ad/analytics hosts on Playwright
+# pages (scraper.resource_blocking); manifests, mp4, player iframes and other
+# media requests always load so stream capture can see their Content-Type.
+# PLAYWRIGHT_BLOCKED_RESOURCE_TYPES / PLAYWRIGHT_BLOCKED_HOSTS replace the
+# defaults there; set ``resource_blocking: False`` in a request's meta to skip it.
+PLAYWRIGHT_BLOCK_RESOURCES = os.environ.get("PLAYWRIGHT_BLOCK_RESOURCES", "1") != "0"
+
+# FawesomeSpider on-demand runs match titles against a local index of the
+# sitemap (scraper.sitemap_index), refreshed only when the sitemap changed.
+# Empty means scraper/.cache/fawesome_sitemap.sqlite3.
+FAWESOME_SITEMAP_INDEX = os.environ.get("FAWESOME_SITEMAP_INDEX", "")
@@ -0,0 +1,181 @@
+"""
+Local title index of a video sitemap, for on-demand matching.
+
+FawesomeSpider used to download movies-pages.xml on every on-demand run and
+score every <url> entry against the wanted title. SitemapIndex keeps the
+entries in a small SQLite file instead:
+
+- entries: url, video title, normalized title and year (from a "(1999)"
+  title suffix or a year in the URL slug), in sitemap order;
+- tokens: normalized title token -> entry, the inverted index;
+- meta: the sitemap's ETag / Last-Modified, sent back as If-None-Match /
+  If-Modified-Since so an unchanged sitemap answers 304 and is not
+  downloaded or parsed again.
+
+match(title, year) only scores entries that share a token with the title
+(or have the exact normalized title), using the spider's old scoring.
+
+Concurrent crawls share the file: it runs in WAL mode so lookups don't block
+on a rebuild, and rebuilds take the write lock up front (waiting up to
+BUSY_TIMEOUT seconds) so they run one after the other.
+"""
+import logging
+import re
+import sqlite3
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = Path(__file__).resolve().parent.parent / ".cache" / "fawesome_sitemap.sqlite3"
+
+# Seconds to wait for another process's rebuild to release the write lock.
+BUSY_TIMEOUT = 30
+
+# Entries scored per lookup, most shared tokens first.
+MAX_CANDIDATES = 500
+
+TITLE_YEAR_RE = re.compile(r"\((\d{4})\)")
+URL_YEAR_RE = re.compile(r"[/-]((?:19|20)\d{2})(?=[/-]|$)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    title TEXT NOT NULL,
+    norm TEXT NOT NULL,
+    year INTEGER
+);
+CREATE INDEX IF NOT EXISTS entries_norm ON entries (norm);
+CREATE TABLE IF NOT EXISTS tokens (
+    token TEXT NOT NULL,
+    entry_id INTEGER NOT NULL,
+    PRIMARY KEY (token, entry_id)
+) WITHOUT ROWID;
+"""
+
+
+def normalize_title(s):
+    s = (s or "").lower()
+    s = re.sub(r"\(\d{4}\)", "", s)
+    s = re.sub(r"[^a-z0-9]+", " ", s)
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def match_score(wanted, candidate):
+    """10 for the same normalized title, 6 if one contains the other, else shared tokens (max 5)."""
+    if not wanted or not candidate:
+        return 0
+    if wanted == candidate:
+        return 10
+    if wanted in candidate or candidate in wanted:
+        return 6
+    overlap = len(set(wanted.split()) & set(candidate.split()))
+    if overlap == 0:
+        return 0
+    return min(5, overlap)
+
+
+def entry_year(url, title):
+    m = TITLE_YEAR_RE.search(title or "") or URL_YEAR_RE.search(url.rstrip("/"))
+    return int(m.group(1)) if m else None
+
+
+class SitemapIndex:
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def get_meta(self, key):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def conditional_headers(self, sitemap_url):
+        """If-None-Match / If-Modified-Since for ``sitemap_url``; empty if it isn't indexed."""
+        if self.get_meta("sitemap_url") != sitemap_url or not len(self):
+            return {}
+        headers = {}
+        if self.get_meta("etag"):
+            headers["If-None-Match"] = self.get_meta("etag")
+        if self.get_meta("last_modified"):
+            headers["If-Modified-Since"] = self.get_meta("last_modified")
+        return headers
+
+    def rebuild(self, sitemap_url, entries, etag=None, last_modified=None):
+        """Replace the index with ``entries`` ((url, video title) pairs) in one transaction.
+
+        An empty ``entries`` (a truncated or unexpected sitemap) leaves the old
+        index and its validators alone and returns 0.
+        """
+        entry_rows, token_rows = [], []
+        for entry_id, (url, title) in enumerate(entries, 1):
+            norm = normalize_title(title)
+            entry_rows.append((entry_id, url, title or "", norm, entry_year(url, title)))
+            token_rows.extend((token, entry_id) for token in set(norm.split()))
+
+        if not entry_rows:
+            logger.warning(f"⚠️ No entries parsed from {sitemap_url}, keeping the existing index ({len(self)} entries)")
+            return 0
+
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            self.db.execute("DELETE FROM tokens")
+            self.db.execute("DELETE FROM entries")
+            self.db.executemany("INSERT INTO entries (id, url, title, norm, year) VALUES (?, ?, ?, ?, ?)", entry_rows)
+            self.db.executemany("INSERT INTO tokens (token, entry_id) VALUES (?, ?)", sorted(token_rows))
+            self.db.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [
+                    ("sitemap_url", sitemap_url),
+                    ("etag", etag),
+                    ("last_modified", last_modified),
+                    ("built_at", str(int(time.time()))),
+                ],
+            )
+        logger.info(f"🗂️ Indexed {len(entry_rows)} sitemap entries from {sitemap_url}")
+        return len(entry_rows)
+
+    def match(self, title, year=None):
+        """(url, score) of the best entry for ``title``, or (None, -1).
+
+        A year match (stored year, or the year in the URL) adds 2; on equal
+        scores the earlier sitemap entry wins.
+        """
+        wanted = normalize_title(title)
+        if not wanted:
+            return None, -1
+        tokens = sorted(set(wanted.split()))
+        placeholders = ", ".join("?" * len(tokens))
+        rows = self.db.execute(
+            f"""
+            SELECT id, url, norm, year FROM entries WHERE norm = ?
+            UNION
+            SELECT id, url, norm, year FROM entries WHERE id IN (
+                SELECT entry_id FROM tokens WHERE token IN ({placeholders})
+                GROUP BY entry_id ORDER BY COUNT(*) DESC, entry_id LIMIT {MAX_CANDIDATES}
+            )
+            ORDER BY id
+            """,
+            (wanted, *tokens),
+        ).fetchall()
+
+        best_url, best_score = None, -1
+        for _, url, norm, stored_year in rows:
+            score = match_score(wanted, norm)
+            if score <= 0:
+                continue
+            if year and (stored_year == year or str(year) in url):
+                score += 2
+            if score > best_score:
+                best_url, best_score = url, score
+        return best_url, best_score
@@ -0,0 +1,71 @@
+"""
+Streaming sitemap parsing.
+
+iter_sitemap(source) walks a sitemap with lxml's iterparse and yields
+``(kind, loc, title)`` as each entry's closing tag is read:
+
+- ``("url", loc, video_title)`` for <url> entries of a urlset (the title is
+  the <video:title>, or "" without one),
+- ``("sitemap", loc, "")`` for the <sitemap> entries of a sitemap index.
+
+Finished entries are cleared and detached from the tree, so memory stays at
+the size of one entry plus the input buffer, whatever the number of URLs. The
+caller can stop early (e.g. after max_pages) without the rest being parsed.
+Gzipped sitemaps (.xml.gz) are decompressed on the fly.
+"""
+import gzip
+import io
+
+from lxml import etree
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def _local(tag):
+    return tag.rpartition("}")[2] if isinstance(tag, str) else ""
+
+
+def open_sitemap(body):
+    """Binary file object over a sitemap body (bytes), gunzipping it if needed."""
+    raw = io.BytesIO(body)
+    if body[:2] == GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=raw)
+    return raw
+
+
+def iter_sitemap(source):
+    """Yield ``(kind, loc, title)`` per <url>/<sitemap> of ``source`` (bytes, file object or path)."""
+    if isinstance(source, (bytes, bytearray)):
+        source = open_sitemap(bytes(source))
+    context = etree.iterparse(
+        source,
+        events=("end",),
+        tag=("{*}url", "{*}sitemap"),
+        recover=True,
+        resolve_entities=False,
+        no_network=True,
+        remove_comments=True,
+        huge_tree=True,
+    )
+    for _, elem in context:
+        loc, title = None, ""
+        for child in elem:
+            name = _local(child.tag)
+            if name == "loc":
+                loc = (child.text or "").strip()
+            elif name == "video" and not title:
+                for sub in child:
+                    if _local(sub.tag) == "title":
+                        title = sub.text or ""
+                        break
+        kind = _local(elem.tag)
+
+        elem.clear()
+        parent = elem.getparent()
+        if parent is not None:
+            # Drop the entries before this one so the root doesn't keep them.
+            while elem.getprevious() is not None:
+                del parent[0]
+
+        if loc:
+            yield kind, loc, title
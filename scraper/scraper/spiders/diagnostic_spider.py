@@ -7,6 +7,8 @@ from scrapy.http import TextResponse
 import logging
 import json
 
+from scraper.url_classifier import classify
+
 logger = logging.getLogger(__name__)
 
 
@@ -203,20 +205,17 @@ class DiagnosticSpider(scrapy.Spider):
                 logger.info(f"\n🌐 FOUND {len(all_links)} TOTAL LINKS")
                 
                 # Categorize links
-                youtube_links = [l for l in all_links if 'youtube' in l.lower() or 'youtu.be' in l.lower()]
+                youtube_links = []
                 video_host_links = []
                 other_links = []
                 
-                VIDEO_HOSTS = [
-                    'vidoza', 'streamtape', 'mixdrop', 'doodstream', 'dood',
-                    'filemoon', 'upstream', 'streamlare', 'voe', 'supervideo'
-                ]
-                
                 for link in all_links:
-                    link_lower = link.lower()
-                    if any(host in link_lower for host in VIDEO_HOSTS):
+                    verdict = classify(link)
+                    if verdict.is_video_host:
                         video_host_links.append(link)
-                    elif 'youtube' not in link_lower and 'youtu.be' not in link_lower:
+                    elif verdict.is_youtube:
+                        youtube_links.append(link)
+                    else:
                         other_links.append(link)
                 
                 logger.info(f"\n📊 LINK BREAKDOWN:")
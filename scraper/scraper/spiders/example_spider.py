@@ -1,7 +1,8 @@
 # File: scraper/scraper/spiders/example_spider.py
 # REPLACE the entire file with this improved version
 
-import re
+from collections import Counter
+
 import scrapy
 from scrapy import Request
 from scrapy.http import TextResponse
@@ -13,9 +14,109 @@ except Exception:
     UserAgent = None
 
 from scraper.items import StreamingItem
+from scraper.metadata import extract_metadata
+from scraper.page_waits import PLAYER_SELECTOR, SERVER_SELECTOR, StreamWait
+from scraper.static_links import iter_static_links
+from scraper.stream_capture import StreamCapture
+from scraper.url_classifier import classify
 
 logger = logging.getLogger(__name__)
 
+SCROLL_TO_MIDDLE_JS = """
+() => {
+    window.scrollTo(0, document.body.scrollHeight / 2);
+    return true;
+}
+"""
+
+CLICK_SERVERS_JS = """
+() => {
+    const selectors = [
+        // Server selectors
+        'a[data-link]', 'button[data-link]',
+        'a[data-server]', 'button[data-server]',
+        'a[data-embed]', 'button[data-embed]',
+        'a[data-player]', 'button[data-player]',
+        'a[data-url]', 'button[data-url]',
+        'a[data-video]', 'button[data-video]',
+        'a[data-src]', 'button[data-src]',
+
+        // Class-based selectors
+        '.server-item', '.server-btn', '.server',
+        '[class*="server"]', '[id*="server"]',
+        '.link-item', '.link-btn', '[class*="link"]',
+        '.player-item', '.player-btn', '[class*="player"]',
+        '.episode-server', '.episode-link',
+
+        // Generic buttons and links
+        'button[onclick]', 'a[onclick]',
+        'button.btn', 'a.btn',
+        'a[href*="embed"]', 'a[href*="player"]',
+        'a[href*="watch"]', 'a[href*="stream"]',
+
+        // Tab systems
+        'button[role="tab"]', 'a[role="tab"]',
+        '[data-toggle="tab"]', '[data-bs-toggle="tab"]',
+    ];
+
+    let clicked = 0;
+    const clickedElements = new Set();
+
+    // Click each selector type 5 TIMES (very aggressive)
+    for (let round = 0; round < 5; round++) {
+        selectors.forEach(selector => {
+            try {
+                const elements = Array.from(document.querySelectorAll(selector));
+                elements.forEach((el) => {
+                    // Check if visible
+                    if (el.offsetParent !== null) {
+                        try {
+                            // Scroll into view
+                            el.scrollIntoView({behavior: 'auto', block: 'center'});
+
+                            // Click in multiple ways
+                            el.click();  // Normal click
+
+                            // Dispatch event
+                            const event = new MouseEvent('click', {
+                                view: window,
+                                bubbles: true,
+                                cancelable: true
+                            });
+                            el.dispatchEvent(event);
+
+                            clicked++;
+                            clickedElements.add(el.tagName + ':' + el.className);
+                        } catch(e) {
+                            console.log('Click error:', e);
+                        }
+                    }
+                });
+            } catch(e) {
+                console.log('Selector error:', e);
+            }
+        });
+
+        // Wait between rounds
+        if (round < 4) {
+            // Short delay
+        }
+    }
+
+    console.log('Clicked', clicked, 'elements across', clickedElements.size, 'types');
+    return clicked;
+}
+"""
+
+REVEAL_LAZY_IFRAMES_JS = """
+() => {
+    window.scrollTo(0, document.body.scrollHeight);
+    window.scrollTo(0, 0);
+    window.scrollTo(0, document.body.scrollHeight / 2);
+    return true;
+}
+"""
+
 
 class OneFlixSpider(scrapy.Spider):
     """
@@ -30,73 +131,7 @@ class OneFlixSpider(scrapy.Spider):
         "https://1flix.to/home",
     ]
     
-    # CRITICAL: Patterns to REJECT
-    REJECT_PATTERNS = [
-        # Social media & trailers (NOT streaming hosts)
-        'youtube.com', 'youtu.be', 'youtube-nocookie.com',
-        'facebook.com', 'fb.com',
-        'twitter.com', 'x.com',
-        'instagram.com', 'tiktok.com',
-        'dailymotion.com', 'vimeo.com',  # Usually trailers, not full movies
-
-        # Movie info sites (not streaming)
-        'imdb.com', 'themoviedb.org', 'tvdb.com', 'rottentomatoes.com',
-
-        # AD SITES & REDIRECTS - BLOCK THESE COMPLETELY
-        '111movies.com', '123movies', 'watchmovies', 'putlocker',
-        'gomovies', 'yesmovies', 'solarmovies', 'moviesjoy',
-        'fmovies.to', 'fmovies.se', 'fmovies.ws', 'fmovies.io',
-        'flixhq.to', 'flixhq.com', 'flixhq.ws',
-        'soap2day', 's2dfree', 'vidplay', 'vidplay.online',
-        'vidsrc.me', 'vidsrc.to', 'vidsrc.pro', 'vidsrc.com',
-        'embedsoap', 'multiembed.mov', 'player-cdn.com',
-        'vidnext.net', 'vidplay.online', 'membed.net',
-        'vidstream.pro', 'vidstream.to', 'vidstream.me',
-        'embed.su', 'embed.moe', 'embed.icu',
-
-        # Known NON-streaming / anti-bot / tracking / banner domains
-        'google.com/recaptcha', 'www.google.com/recaptcha', 'recaptcha',
-        'sysmeasuring.net', 'anicrush.to',
-
-        # Site navigation (for fmovies-co.net)
-        'fmovies-co.net/home',
-        'fmovies-co.net/movie',
-        'fmovies-co.net/tv',
-        'fmovies-co.net/tv-show',
-        'fmovies-co.net/top-imdb',
-        'javascript:', 'mailto:', '#', 'void(0)',
-    ]
-    
-    # CRITICAL: Known video hosting domains
-    VIDEO_HOSTS = [
-        # Reliable streaming hosts
-        'vidoza', 'streamtape', 'mixdrop', 'doodstream', 'dood.', 
-        'filemoon', 'upstream', 'streamlare', 'streamhub', 'streamwish',
-        'videostr', 'voe.', 'streamvid', 'mp4upload', 'streamplay',
-        'supervideo', 'gounlimited', 'jetload', 'vidcloud', 'mystream',
-        'vidstream', 'fembed', 'streamango', 'rapidvideo', 'vidlox',
-        'clipwatching', 'verystream', 'streammango', 'netu', 'fastplay',
-        'powvideo', 'aparat', 'vup', 'vshare', 'tune', 'woof', 'waaw',
-        'hqq', 'thevideo', 'vidup', 'streamz', 'vidfast', 'vidoo',
-        'vidbam', 'vidbull', 'vidto', 'vidsrc', 'fmovies',
-        
-        # Additional hosts
-        'streamtape.com', 'streamta.pe', 'stape.fun',
-        'mixdrop.co', 'mixdrop.to', 'mixdrop.sx',
-        'doodstream.com', 'dood.watch', 'dood.to', 'dood.so',
-        'vidoza.net', 'vidoza.co',
-        'upstream.to',
-        'filemoon.sx', 'filemoon.in',
-        'streamlare.com',
-        'voe.sx',
-    ]
-    
-    # CRITICAL: URL patterns that indicate streaming
-    STREAM_PATTERNS = [
-        'embed', 'player', 'watch', 'stream', 'video', 'play',
-        '/e/', '/v/', '/f/', '/d/',  # Common embed paths
-        '.m3u8', '.mp4', '.mkv', '.avi', '.webm',
-    ]
+    # URL rules (reject lists, video hosts, stream patterns) live in scraper.url_classifier
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -153,127 +188,48 @@ class OneFlixSpider(scrapy.Spider):
         }
         
         if is_detail_page:
-            base_meta["playwright_page_coroutines"] = [
-                # Initial wait
-                {"coroutine": "wait_for_timeout", "args": [3000]},
-                
-                # Scroll to load lazy content
-                {
-                    "coroutine": "evaluate",
-                    "args": ["""
-                        () => {
-                            window.scrollTo(0, document.body.scrollHeight / 2);
-                            return true;
-                        }
-                    """]
-                },
-                {"coroutine": "wait_for_timeout", "args": [2000]},
-                
-                # CRITICAL: Click ALL possible server/link elements
-                {
-                    "coroutine": "evaluate",
-                    "args": ["""
-                        () => {
-                            const selectors = [
-                                // Server selectors
-                                'a[data-link]', 'button[data-link]',
-                                'a[data-server]', 'button[data-server]',
-                                'a[data-embed]', 'button[data-embed]',
-                                'a[data-player]', 'button[data-player]',
-                                'a[data-url]', 'button[data-url]',
-                                'a[data-video]', 'button[data-video]',
-                                'a[data-src]', 'button[data-src]',
-                                
-                                // Class-based selectors
-                                '.server-item', '.server-btn', '.server',
-                                '[class*="server"]', '[id*="server"]',
-                                '.link-item', '.link-btn', '[class*="link"]',
-                                '.player-item', '.player-btn', '[class*="player"]',
-                                '.episode-server', '.episode-link',
-                                
-                                // Generic buttons and links
-                                'button[onclick]', 'a[onclick]',
-                                'button.btn', 'a.btn',
-                                'a[href*="embed"]', 'a[href*="player"]',
-                                'a[href*="watch"]', 'a[href*="stream"]',
-                                
-                                // Tab systems
-                                'button[role="tab"]', 'a[role="tab"]',
-                                '[data-toggle="tab"]', '[data-bs-toggle="tab"]',
-                            ];
-                            
-                            let clicked = 0;
-                            const clickedElements = new Set();
-                            
-                            // Click each selector type 5 TIMES (very aggressive)
-                            for (let round = 0; round < 5; round++) {
-                                selectors.forEach(selector => {
-                                    try {
-                                        const elements = Array.from(document.querySelectorAll(selector));
-                                        elements.forEach((el) => {
-                                            // Check if visible
-                                            if (el.offsetParent !== null) {
-                                                try {
-                                                    // Scroll into view
-                                                    el.scrollIntoView({behavior: 'auto', block: 'center'});
-                                                    
-                                                    // Click in multiple ways
-                                                    el.click();  // Normal click
-                                                    
-                                                    // Dispatch event
-                                                    const event = new MouseEvent('click', {
-                                                        view: window,
-                                                        bubbles: true,
-                                                        cancelable: true
-                                                    });
-                                                    el.dispatchEvent(event);
-                                                    
-                                                    clicked++;
-                                                    clickedElements.add(el.tagName + ':' + el.className);
-                                                } catch(e) {
-                                                    console.log('Click error:', e);
-                                                }
-                                            }
-                                        });
-                                    } catch(e) {
-                                        console.log('Selector error:', e);
-                                    }
-                                });
-                                
-                                // Wait between rounds
-                                if (round < 4) {
-                                    // Short delay
-                                }
-                            }
-                            
-                            console.log('Clicked', clicked, 'elements across', clickedElements.size, 'types');
-                            return clicked;
-                        }
-                    """]
-                },
-                
-                # Wait LONGER for streams to load (20 seconds)
-                {"coroutine": "wait_for_timeout", "args": [20000]},
-                
-                # Final scroll to reveal any lazy-loaded iframes
-                {
-                    "coroutine": "evaluate",
-                    "args": ["""
-                        () => {
-                            window.scrollTo(0, document.body.scrollHeight);
-                            window.scrollTo(0, 0);
-                            window.scrollTo(0, document.body.scrollHeight / 2);
-                            return true;
-                        }
-                    """]
-                },
-                
-                # Final wait
-                {"coroutine": "wait_for_timeout", "args": [3000]},
-            ]
+            # Waits end on conditions (server buttons, player, quiet DOM) instead of
+            # fixed sleeps, all within one budget; networkidle is not needed first.
+            # Stream URLs are captured from the page's traffic from creation on.
+            capture = StreamCapture()
+            wait = StreamWait(
+                budget_ms=self.settings.getint("ONEFLIX_DETAIL_WAIT_BUDGET_MS", 15000),
+                stable_ms=self.settings.getint("ONEFLIX_DETAIL_STABLE_MS", 1000),
+                capture=capture,
+            )
+            base_meta["playwright_page_goto_kwargs"]["wait_until"] = "domcontentloaded"
+            # Resets the wait budget and the capture on every attempt (retries reuse this meta).
+            base_meta["playwright_page_init_callback"] = wait
+            base_meta["playwright_page_methods"] = self.detail_page_methods(wait)
+            base_meta["stream_capture"] = capture
+            base_meta["stream_wait"] = wait
         
         return base_meta
 
+    @staticmethod
+    def detail_page_methods(wait):
+        """Page methods run on a detail page before it is parsed"""
+        # Imported here so loading the spider modules doesn't pull in Playwright.
+        from scrapy_playwright.page import PageMethod
+
+        return [
+            # Server buttons (or already the player) rendered
+            PageMethod(wait.for_selector, f"{SERVER_SELECTOR}, {PLAYER_SELECTOR}"),
+            
+            # Scroll to load lazy content
+            PageMethod("evaluate", SCROLL_TO_MIDDLE_JS),
+            
+            # CRITICAL: Click ALL possible server/link elements
+            PageMethod("evaluate", CLICK_SERVERS_JS),
+            
+            # Until a player element or stream response shows up
+            PageMethod(wait.for_player),
+            
+            # Final scroll to reveal any lazy-loaded iframes, then let the DOM settle
+            PageMethod("evaluate", REVEAL_LAZY_IFRAMES_JS),
+            PageMethod(wait.for_dom_stable),
+        ]
+
     def parse_listing(self, response):
         """Parse listing page"""
         if self.on_demand_mode:
@@ -303,14 +259,13 @@ class OneFlixSpider(scrapy.Spider):
         item["movie_pk"] = self.movie_pk
         item["original_detail_url"] = response.url
         
-        # Extract title
-        title = response.css("h1::text").get() or response.css("h1 *::text").get() or ""
-        title = title.strip()
+        # Title, year, poster, synopsis and IMDb id: JSON-LD, then meta tags, then the page
+        metadata = extract_metadata(response)
+        title = metadata.title or ""
         item["title"] = title
         
-        extracted_tt = self._extract_imdb_tt(response)
-        if extracted_tt:
-            item["imdb_id"] = extracted_tt
+        if metadata.imdb_id:
+            item["imdb_id"] = metadata.imdb_id
         elif isinstance(self.forced_imdb_id, str) and self.forced_imdb_id.startswith("tt"):
             item["imdb_id"] = self.forced_imdb_id
         else:
@@ -318,15 +273,15 @@ class OneFlixSpider(scrapy.Spider):
         
         logger.info(f"📝 Title: {title} | ID: {item['imdb_id']}")
         
-        # Extract year
-        year = None
-        year_texts = response.css("span::text, div::text").getall()
-        for text in year_texts:
-            text = text.strip()
-            if text.isdigit() and len(text) == 4 and 1900 <= int(text) <= 2030:
-                year = int(text)
-                break
-        item["year"] = year
+        wait = response.meta.get("stream_wait")
+        if wait is not None:
+            stats = self.crawler.stats
+            stats.inc_value(f"oneflix/detail_wait/{wait.reason or 'none'}")
+            stats.inc_value("oneflix/detail_wait_ms_total", wait.elapsed_ms)
+            stats.max_value("oneflix/detail_wait_ms_max", wait.elapsed_ms)
+            logger.info(f"⏱️ Waited {wait.elapsed_ms} ms on page ({wait.reason or 'no player wait'})")
+        
+        item["year"] = metadata.year
         
         # Determine type
         url_lower = response.url.lower()
@@ -335,21 +290,9 @@ class OneFlixSpider(scrapy.Spider):
         else:
             item["type"] = "movie"
         
-        # Extract poster
-        poster = (
-            response.css("meta[property='og:image']::attr(content)").get() or
-            response.css("img[class*='poster']::attr(src)").get() or
-            response.css("img::attr(src)").get()
-        )
-        item["poster_url"] = poster
-        
-        # Extract synopsis
-        synopsis = (
-            response.css("meta[name='description']::attr(content)").get() or
-            response.css("p::text").get() or
-            ""
-        )
-        item["synopsis"] = synopsis.strip()
+        # Last resorts: first image, first paragraph
+        item["poster_url"] = metadata.poster_url or response.css("img::attr(src)").get()
+        item["synopsis"] = (metadata.synopsis or response.css("p::text").get() or "").strip()
         
         # Extract streaming links (FILTERED) from fmovies-co.net pages
         links = self._extract_streaming_links(response)
@@ -365,59 +308,20 @@ class OneFlixSpider(scrapy.Spider):
         
         yield item
 
-    def _extract_imdb_tt(self, response: TextResponse):
-        text = response.text or ""
-        m = re.search(r"imdb\.com/title/(tt\d{7,8})", text, re.IGNORECASE)
-        if m:
-            return m.group(1)
-        m = re.search(r"\b(tt\d{7,8})\b", text)
-        if m:
-            return m.group(1)
-        return None
-
-    def _is_youtube_url(self, url: str) -> bool:
-        """Check if URL is a YouTube link"""
-        url_lower = url.lower()
-        return 'youtube.com' in url_lower or 'youtu.be' in url_lower
-
-    def _should_reject_url(self, url: str) -> bool:
-        """Check if URL should be rejected"""
-        url_lower = url.lower()
-        
-        # Reject bad patterns
-        for pattern in self.REJECT_PATTERNS:
-            if pattern in url_lower:
-                return True
-        
-        return False
-
-    def _is_video_host_url(self, url: str) -> bool:
-        """Check if URL is from a known video hosting site"""
-        url_lower = url.lower()
-        
-        # Check against known video hosts
-        for host in self.VIDEO_HOSTS:
-            if host in url_lower:
-                return True
-        
-        return False
-
-    def _has_stream_patterns(self, url: str) -> bool:
-        """Check if URL has patterns indicating it's a streaming link"""
-        url_lower = url.lower()
-        
-        # Check for streaming patterns
-        for pattern in self.STREAM_PATTERNS:
-            if pattern in url_lower:
-                return True
-        
-        return False
-
     def _extract_streaming_links(self, response: TextResponse):
         """Extract ONLY real streaming links"""
         page = response.meta.get("playwright_page")
         all_urls = set()
         
+        # Method 0: Stream URLs seen in the page's network traffic (incl. XHR manifests)
+        capture = response.meta.get("stream_capture")
+        if capture is not None and capture.candidates:
+            all_urls.update(capture.urls)
+            counts = ", ".join(f"{kind}={n}" for kind, n in sorted(capture.counts().items()))
+            logger.info(f"📡 Network capture found {len(capture.candidates)} URLs ({counts})")
+            for kind, n in capture.counts().items():
+                self.crawler.stats.inc_value(f"oneflix/stream_capture/{kind}", n)
+        
         # Method 1: Playwright page evaluation (most reliable after clicking)
         if page:
             try:
@@ -530,7 +434,11 @@ class OneFlixSpider(scrapy.Spider):
         # Method 2: Static HTML extraction (backup)
         static_urls = self._extract_from_static_html(response)
         all_urls.update(static_urls)
-        logger.info(f"🔍 Static HTML found {len(static_urls)} additional URLs")
+        sources = Counter(static_urls.values())
+        counts = ", ".join(f"{source}={n}" for source, n in sorted(sources.items()))
+        logger.info(f"🔍 Static HTML found {len(static_urls)} additional URLs ({counts})")
+        for source, n in sources.items():
+            self.crawler.stats.inc_value(f"oneflix/static_links/{source}", n)
         
         # CRITICAL: Filter and validate all URLs - MORE PERMISSIVE
         valid_links = []
@@ -538,33 +446,22 @@ class OneFlixSpider(scrapy.Spider):
         rejected_other = 0
         
         for url in all_urls:
-            # Must be HTTP/HTTPS
-            if not url.startswith(('http://', 'https://')):
-                rejected_other += 1
-                continue
+            verdict = classify(url)
             
-            # Reject bad patterns (YouTube, social media, etc.)
-            if self._should_reject_url(url):
-                if self._is_youtube_url(url):
+            # Reject non-HTTP, bad hosts/patterns (YouTube, social media, ad sites, etc.)
+            if verdict.reject:
+                if verdict.is_youtube:
                     rejected_youtube += 1
                     logger.debug(f"❌ Rejected YouTube: {url[:80]}")
                 else:
                     rejected_other += 1
-                    logger.debug(f"❌ Rejected (bad pattern): {url[:60]}")
+                    logger.debug(f"❌ Rejected ({verdict.reject_reason}): {url[:60]}")
                 continue
             
-            # NEW: More permissive logic
-            # Accept if:
-            # 1. From known video host, OR
-            # 2. Has stream patterns, OR
-            # 3. Is external domain (not fmovies-co.net) - assume it could be a streaming host
-            
-            is_video_host = self._is_video_host_url(url)
-            has_stream_pattern = self._has_stream_patterns(url)
-            is_external_domain = 'fmovies-co.net' not in url.lower()
-            
-            # Accept if matches any criteria
-            if is_video_host or has_stream_pattern or is_external_domain:
+            # Accept any external domain - assume it could be a streaming host.
+            # The source site's own pages (/watch-movie/...) are never links,
+            # whatever keywords they contain; same rule as the static scan.
+            if verdict.is_link_candidate:
                 valid_links.append({
                     "quality": self._detect_quality(url),
                     "language": "EN",
@@ -574,7 +471,7 @@ class OneFlixSpider(scrapy.Spider):
                 logger.info(f"✅ ACCEPTED: {url[:100]}")
             else:
                 rejected_other += 1
-                logger.debug(f"❌ Rejected (not video-like): {url[:60]}")
+                logger.debug(f"❌ Rejected (source site page): {url[:60]}")
         
         logger.info(f"📊 Filtering: Accepted={len(valid_links)}, YouTube={rejected_youtube}, Other={rejected_other}")
         
@@ -596,69 +493,18 @@ class OneFlixSpider(scrapy.Spider):
         return unique_links
 
     def _extract_from_static_html(self, response: TextResponse):
-        """Extract URLs from static HTML - More aggressive"""
-        urls = set()
-        
-        # Extract from various sources
-        selectors = [
-            "iframe::attr(src)", "iframe::attr(data-src)", "iframe::attr(data-url)",
-            "iframe::attr(data-lazy)", "iframe::attr(data-embed)",
-            "[data-link]::attr(data-link)", "[data-server]::attr(data-server)",
-            "[data-embed]::attr(data-embed)", "[data-player]::attr(data-player)",
-            "[data-stream]::attr(data-stream)", "[data-video]::attr(data-video)",
-            "a[href*='embed']::attr(href)", "a[href*='player']::attr(href)",
-            "a[href*='stream']::attr(href)", "a[href*='/e/']::attr(href)",
-            "a[href*='/v/']::attr(href)", "a[href*='/f/']::attr(href)",
-            # Also get all external links
-            "a[href^='http']::attr(href)",
-        ]
-        
-        for selector in selectors:
-            found_urls = response.css(selector).getall()
-            # Filter out fmovies-co.net internal links and clearly bad domains
-            for url in found_urls:
-                if url and url.startswith('http'):
-                    url_lower = url.lower()
-                    if (
-                        'fmovies-co.net' not in url_lower
-                        and 'youtube' not in url_lower
-                        and 'facebook' not in url_lower
-                        and 'twitter' not in url_lower
-                        and 'google.com/recaptcha' not in url_lower
-                        and 'recaptcha' not in url_lower
-                        and 'sysmeasuring.net' not in url_lower
-                        and 'anicrush.to' not in url_lower
-                    ):
-                        urls.add(url)
-        
-        # Extract from script tags - more permissive
-        scripts = response.css("script::text").getall()
-        for script in scripts:
-            # Find streaming / external URLs in scripts
-            patterns = [
-                r'(https?://[^\s"\']+?(?:embed|player|stream|video|/e/|/v/|/f/|/d/)[^\s"\'<>]*)',
-                r'(https?://(?:streamtape|mixdrop|dood|vidoza|upstream|filemoon|voe|streamlare|mp4upload)[^\s"\'<>]+)',
-                # Also catch external domain URLs
-                r'(https?://[a-zA-Z0-9][a-zA-Z0-9-]*[a-zA-Z0-9]*\.[a-zA-Z]{2,}[^\s"\'<>]*)',
-            ]
-            for pattern in patterns:
-                matches = re.findall(pattern, script, re.IGNORECASE)
-                for match in matches:
-                    match_lower = match.lower()
-                    if (
-                        'fmovies-co.net' not in match_lower
-                        and 'youtube' not in match_lower
-                        and 'facebook' not in match_lower
-                        and 'twitter' not in match_lower
-                        and 'google.com/recaptcha' not in match_lower
-                        and 'recaptcha' not in match_lower
-                        and 'sysmeasuring.net' not in match_lower
-                        and 'anicrush.to' not in match_lower
-                    ):
-                        urls.add(match)
-        
+        """Extract external URLs from static HTML (iframes, data attributes, links, scripts)"""
+        urls = {}
+        for url, source in iter_static_links(response):
+            # Filter out the source site's own links and clearly bad domains
+            if self._is_static_candidate(url):
+                urls[url] = source
         return urls
 
+    def _is_static_candidate(self, url: str) -> bool:
+        """Keep external, non-rejected URLs found in the static HTML"""
+        return classify(url).is_link_candidate
+
     def _detect_quality(self, url: str) -> str:
         """Detect video quality from URL"""
         url_lower = url.lower()
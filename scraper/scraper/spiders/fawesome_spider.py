@@ -1,10 +1,10 @@
 import re
 import logging
-from typing import Optional
+import time
 
 import scrapy
 from scrapy import Request
-from scrapy.http import TextResponse
+from scrapy.http import Response, TextResponse
 
 try:
     from fake_useragent import UserAgent
@@ -12,6 +12,11 @@ except Exception:
     UserAgent = None
 
 from scraper.items import StreamingItem
+from scraper.metadata import extract_metadata
+from scraper.sitemap_index import DEFAULT_INDEX_PATH, SitemapIndex
+from scraper.sitemap_stream import iter_sitemap
+from scraper.stream_capture import MEDIA_KINDS, StreamCapture
+from scraper.url_classifier import classify
 
 logger = logging.getLogger(__name__)
 
@@ -42,32 +47,43 @@ class FawesomeSpider(scrapy.Spider):
 
         self.on_demand_mode = bool(self.imdb_id or self.title)
 
-    def start_requests(self):
+    def _sitemap_headers(self):
         ua = UserAgent().random if UserAgent else "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        headers = {
+        return {
             "User-Agent": ua,
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
             "Accept-Language": "en-US,en;q=0.5",
             "Connection": "keep-alive",
         }
 
+    def start_requests(self):
+        headers = self._sitemap_headers()
+        meta = {}
+        if self.on_demand_mode:
+            # Only download the sitemap when it changed since the local index was built.
+            self.index = SitemapIndex(self.settings.get("FAWESOME_SITEMAP_INDEX") or DEFAULT_INDEX_PATH)
+            headers.update(self.index.conditional_headers(self.sitemap_url))
+            meta["handle_httpstatus_list"] = [304]
+
         yield Request(
             self.sitemap_url,
             headers=headers,
             callback=self.parse_sitemap,
+            errback=self.sitemap_failed,
+            meta=meta,
             dont_filter=True,
         )
 
-    def parse_sitemap(self, response: TextResponse):
-        # Full discovery crawl
+    def parse_sitemap(self, response: Response):
+        # Full discovery crawl: the sitemap is parsed as it is consumed, so it
+        # stops at max_pages instead of after reading every entry.
         if not self.on_demand_mode:
-            url_nodes = response.xpath("//*[local-name()='url']")
-            logger.info(f"📄 FAWESOME sitemap urls found: {len(url_nodes)}")
-            for url_node in url_nodes:
+            for kind, loc, _ in iter_sitemap(response.body):
                 if self._seen >= self.max_pages:
                     break
-                loc = url_node.xpath("./*[local-name()='loc']/text()").get()
-                if not loc:
+                if kind == "sitemap":
+                    # Sitemap index: crawl the child sitemaps the same way
+                    yield Request(loc, headers=self._sitemap_headers(), callback=self.parse_sitemap)
                     continue
                 self._seen += 1
                 yield Request(
@@ -75,35 +91,39 @@ class FawesomeSpider(scrapy.Spider):
                     callback=self.parse_movie_page,
                     meta=self._get_playwright_meta(),
                 )
+            logger.info(f"📄 FAWESOME sitemap {response.url}: {self._seen} movie pages queued so far")
             return
 
-        # On-demand mode: match one page by title
-        wanted = self._normalize_title(self.title)
-        best_url: Optional[str] = None
-        best_score = -1
-
-        for url_node in response.xpath("//*[local-name()='url']"):
-            loc = url_node.xpath("./*[local-name()='loc']/text()").get()
-            if not loc:
-                continue
-
-            video_title = url_node.xpath(".//*[local-name()='video']/*[local-name()='title']/text()").get() or ""
-            video_title_norm = self._normalize_title(video_title)
-
-            score = self._match_score(wanted, video_title_norm)
-            if score <= 0:
+        # On-demand mode: refresh the local title index if the sitemap changed, then look up one page
+        if response.status == 304:
+            logger.info(f"📄 FAWESOME sitemap not modified, using the local index ({len(self.index)} entries)")
+        else:
+            self.index.rebuild(
+                self.sitemap_url,
+                self._sitemap_entries(response),
+                etag=response.headers.get("ETag", b"").decode("latin-1") or None,
+                last_modified=response.headers.get("Last-Modified", b"").decode("latin-1") or None,
+            )
+        yield from self._request_best_match()
+
+    def sitemap_failed(self, failure):
+        # An unreachable sitemap is not fatal in on-demand mode if an older index exists.
+        logger.warning(f"⚠️ FAWESOME sitemap request failed: {failure.value}")
+        if self.on_demand_mode and len(self.index):
+            logger.info(f"📄 FAWESOME falling back to the local index ({len(self.index)} entries)")
+            yield from self._request_best_match()
+
+    def _sitemap_entries(self, response: Response):
+        for kind, loc, video_title in iter_sitemap(response.body):
+            if kind == "sitemap":
+                logger.warning(f"⚠️ FAWESOME: nested sitemap {loc} is not indexed")
                 continue
+            yield loc, video_title
 
-            # Prefer URLs that include the year when we have one
-            if self.year and str(self.year) in (loc or ""):
-                score += 2
-
-            if score > best_score:
-                best_score = score
-                best_url = loc
-
-            if best_score >= 10:
-                break
+    def _request_best_match(self):
+        started = time.perf_counter()
+        best_url, best_score = self.index.match(self.title, self.year)
+        logger.debug(f"FAWESOME index lookup took {(time.perf_counter() - started) * 1000:.1f} ms")
 
         if not best_url:
             logger.warning(f"⚠️ FAWESOME: no match for title='{self.title}' year='{self.year}'")
@@ -117,10 +137,18 @@ class FawesomeSpider(scrapy.Spider):
             dont_filter=True,
         )
 
+    def closed(self, reason):
+        if getattr(self, "index", None) is not None:
+            self.index.close()
+
     def _get_playwright_meta(self):
+        # Listen for manifests/video from page creation; embeds don't count as found.
+        capture = StreamCapture(kinds=MEDIA_KINDS)
         return {
             "playwright": True,
             "playwright_include_page": True,
+            "playwright_page_init_callback": capture,
+            "stream_capture": capture,
             "playwright_page_goto_kwargs": {
                 "wait_until": "domcontentloaded",
                 "timeout": 60000,
@@ -132,8 +160,8 @@ class FawesomeSpider(scrapy.Spider):
 
         item = StreamingItem()
         item["movie_pk"] = self.movie_pk
-        extracted_tt = self._extract_imdb_tt(response)
-        item_imdb = extracted_tt or self.imdb_id or ""
+        metadata = extract_metadata(response)
+        item_imdb = metadata.imdb_id or self.imdb_id or ""
         if (not item_imdb) and (not self.on_demand_mode):
             # Discovery mode fallback: use fawesome numeric id to create a stable unique identifier
             # Example: https://fawesome.tv/movies/10589474/el-dorado -> fw10589474
@@ -150,40 +178,30 @@ class FawesomeSpider(scrapy.Spider):
                     pass
             return
 
-        title_from_page = (
-            response.css("h1::text").get()
-            or response.css("meta[property='og:title']::attr(content)").get()
-            or ""
-        ).strip()
-        item["title"] = self.title or title_from_page
-
-        item["year"] = self.year
-        if item["year"] is None:
-            # best-effort year extraction
-            m = re.search(r"\b(19\d{2}|20\d{2})\b", response.text or "")
-            if m:
-                try:
-                    item["year"] = int(m.group(1))
-                except Exception:
-                    item["year"] = None
+        item["title"] = self.title or metadata.title or ""
+        item["year"] = self.year or metadata.year
         item["type"] = "movie"
-        item["poster_url"] = response.css("meta[property='og:image']::attr(content)").get()
-        item["synopsis"] = response.css("meta[name='description']::attr(content)").get()
+        item["poster_url"] = metadata.poster_url
+        item["synopsis"] = metadata.synopsis
         item["original_detail_url"] = response.url
 
         links = []
         urls = set()
+        capture = response.meta.get("stream_capture") or StreamCapture(kinds=MEDIA_KINDS)
 
         try:
             if page:
-                await page.wait_for_timeout(4000)
-                # Try clicking the player if a play button exists
-                try:
-                    await page.click("text=Play", timeout=1500)
-                except Exception:
-                    pass
-
-                await page.wait_for_timeout(4000)
+                capture.attach(page)
+                # Stop waiting as soon as a manifest/video shows up in the traffic;
+                # otherwise try clicking the player if a play button exists
+                if not await capture.wait(4000):
+                    try:
+                        await page.click("text=Play", timeout=1500)
+                    except Exception:
+                        pass
+
+                    await capture.wait(4000)
+                urls.update(capture.urls)
 
                 # Collect URLs from resource timing + DOM
                 extracted = await page.evaluate(
@@ -237,12 +255,12 @@ class FawesomeSpider(scrapy.Spider):
 
         # Filter to likely playable assets
         for u in sorted(urls):
-            ul = u.lower()
-            if any(x in ul for x in ["youtube.com", "youtu.be", "facebook.com", "instagram.com", "twitter.com"]):
+            verdict = classify(u)
+            if verdict.reject:
                 continue
-            is_direct = any(ext in ul for ext in [".m3u8", ".mp4", ".mpd"])
-            is_embed_like = any(k in ul for k in ["embed", "player", "/e/", "/v/"])
-            if not (is_direct or is_embed_like):
+            # Captured by Content-Type even when the URL has no extension
+            is_direct = u in capture.candidates or verdict.is_media
+            if not (is_direct or verdict.has_embed_pattern):
                 continue
             links.append({
                 "quality": "HD",
@@ -259,33 +277,3 @@ class FawesomeSpider(scrapy.Spider):
             logger.info(f"✅ FAWESOME: extracted {len(links)} stream URLs")
 
         yield item
-
-    def _extract_imdb_tt(self, response: TextResponse) -> Optional[str]:
-        text = response.text or ""
-        m = re.search(r"imdb\.com/title/(tt\d{7,8})", text, re.IGNORECASE)
-        if m:
-            return m.group(1)
-        m = re.search(r"\b(tt\d{7,8})\b", text)
-        if m:
-            return m.group(1)
-        return None
-
-    def _normalize_title(self, s: str) -> str:
-        s = (s or "").lower()
-        s = re.sub(r"\(\d{4}\)", "", s)
-        s = re.sub(r"[^a-z0-9]+", " ", s)
-        return re.sub(r"\s+", " ", s).strip()
-
-    def _match_score(self, wanted: str, candidate: str) -> int:
-        if not wanted or not candidate:
-            return 0
-        if wanted == candidate:
-            return 10
-        if wanted in candidate or candidate in wanted:
-            return 6
-        wanted_tokens = set(wanted.split())
-        cand_tokens = set(candidate.split())
-        overlap = len(wanted_tokens & cand_tokens)
-        if overlap == 0:
-            return 0
-        return min(5, overlap)
@@ -5,25 +5,14 @@ Spider for Goojara.to - scrapes movies and streaming links using Selenium
 import scrapy
 from scrapy import signals
 from scrapy.http import HtmlResponse
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.common.exceptions import TimeoutException
 from scraper.items import MovieItem
+from scraper.metadata import extract_metadata
 import time
 import re
 
-import os
-import django
+# Django is set up once by scraper.settings before Scrapy loads spider modules.
 from streaming.models import Movie
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movie_scrape.settings')
-django.setup()
-
 class GoojaraSpider(scrapy.Spider):
     name = 'goojara'
     allowed_domains = ['goojara.to', 'ww1.goojara.to']
@@ -61,6 +50,13 @@ class GoojaraSpider(scrapy.Spider):
 
     def spider_opened(self, spider):
         """Setup Selenium WebDriver"""
+        # Imported here so every other spider run (Scrapy imports all spider
+        # modules at startup) doesn't pay for selenium and webdriver_manager.
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+        from webdriver_manager.chrome import ChromeDriverManager
+
         self.logger.info('Initializing Selenium WebDriver...')
         
         chrome_options = Options()
@@ -368,34 +364,18 @@ class GoojaraSpider(scrapy.Spider):
             movie_id = response.url.split('/')[-1]
             item['imdb_id'] = f'goojara_{movie_id}'
             
-            # Title - from h1
-            title_text = sel_response.css('h1::text').get()
-            if title_text:
-                # Extract title and year from "Movie Name (2025)"
-                title_match = re.match(r'(.+?)\s*\((\d{4})\)', title_text.strip())
-                if title_match:
-                    item['title'] = title_match.group(1).strip()
-                    item['year'] = int(title_match.group(2))
-                else:
-                    item['title'] = title_text.strip()
-                    item['year'] = None
-            else:
-                item['title'] = 'Unknown'
-                item['year'] = None
+            # Title/year ("Movie Name (2025)"), synopsis and poster: structured data first
+            metadata = extract_metadata(sel_response, search_text=False)
+            item['title'] = metadata.title or 'Unknown'
+            item['year'] = metadata.year
             
-            # Synopsis - from description paragraph
-            synopsis = sel_response.xpath('//h1/following-sibling::text()').get()
-            if synopsis:
-                item['synopsis'] = synopsis.strip()
-            else:
-                item['synopsis'] = ''
+            # Synopsis - else the description text after the h1
+            synopsis = metadata.synopsis or sel_response.xpath('//h1/following-sibling::text()').get()
+            item['synopsis'] = synopsis.strip() if synopsis else ''
             
-            # Poster - try to find image
-            poster = sel_response.css('img::attr(src)').get()
-            if poster:
-                item['poster_url'] = response.urljoin(poster)
-            else:
-                item['poster_url'] = ''
+            # Poster - else the first image
+            poster = metadata.poster_url or sel_response.css('img::attr(src)').get()
+            item['poster_url'] = response.urljoin(poster) if poster else ''
             
             # Extract streaming links from "Direct Links" section
             stream_links = sel_response.css('a[href*="/go.php"]')
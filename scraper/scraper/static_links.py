@@ -0,0 +1,71 @@
+"""
+Candidate stream URLs from a page's static HTML.
+
+iter_static_links(response) walks the document once with a precompiled XPath
+that selects, in document order:
+
+- player attributes of iframes (src, data-src, ...)        -> "iframe"
+- data-link/data-server/... attributes on any element      -> "data"
+- <a href> links                                           -> "link"
+- the text of inline scripts                               -> "script"
+
+Only absolute http(s) attribute values are kept. The script texts are joined
+and scanned once with SCRIPT_URL_RE, which also picks up JSON-escaped URLs
+(``https:\\/\\/host\\/path``). Every URL is yielded once, with the first source
+it was found in; classifying them is left to the caller.
+"""
+import re
+
+from lxml import etree
+
+IFRAME_ATTRS = ["src", "data-src", "data-url", "data-lazy", "data-embed"]
+DATA_ATTRS = ["data-link", "data-server", "data-embed", "data-player", "data-stream", "data-video"]
+
+LINKS_XPATH = etree.XPath(" | ".join(
+    [f"//iframe/@{attr}" for attr in IFRAME_ATTRS]
+    + [f"//@{attr}" for attr in DATA_ATTRS]
+    + ["//a/@href", "//script/text()"]
+))
+
+# Up to whitespace, a quote, <, > or a backslash that isn't an escaped
+# slash or \\uXXXX.
+SCRIPT_URL_RE = re.compile(r"""https?:(?://|\\/\\/)(?:[^\s"'<>\\]|\\/|\\u[0-9a-fA-F]{4})+""", re.IGNORECASE)
+JS_ESCAPE_RE = re.compile(r"\\(?:/|u([0-9a-fA-F]{4}))")
+
+
+def _unescape(url):
+    if "\\" not in url:
+        return url
+    return JS_ESCAPE_RE.sub(lambda m: chr(int(m.group(1), 16)) if m.group(1) else "/", url)
+
+
+def _source(node):
+    if node.is_text:
+        return "script"
+    if node.attrname == "href":
+        return "link"
+    if node.getparent().tag == "iframe":
+        return "iframe"
+    return "data"
+
+
+def iter_static_links(response):
+    """Yield ``(url, source)`` for each distinct absolute URL in the page's static HTML."""
+    seen = set()
+    scripts = []
+    for node in LINKS_XPATH(response.selector.root):
+        source = _source(node)
+        if source == "script":
+            scripts.append(node)
+            continue
+        url = node.strip()
+        if url[:8].lower().startswith(("http://", "https://")) and url not in seen:
+            seen.add(url)
+            yield url, source
+
+    # The newline between two scripts ends any URL, so one scan covers them all.
+    for match in SCRIPT_URL_RE.finditer("\n".join(scripts)):
+        url = _unescape(match.group())
+        if url not in seen:
+            seen.add(url)
+            yield url, "script"
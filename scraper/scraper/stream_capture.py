@@ -0,0 +1,146 @@
+"""
+Capture stream URLs from a Playwright page's network traffic.
+
+A StreamCapture subscribes to the page's request/response events and
+classifies what goes by as it arrives:
+
+- "hls" / "dash" / "mp4": manifests and progressive video, by URL extension
+  or (for responses) by Content-Type, so XHR-loaded manifests without a
+  telling URL are caught too;
+- "embed": a document loaded into an iframe whose URL looks like a player.
+
+Pass the capture as ``playwright_page_init_callback`` to start listening when
+scrapy-playwright creates the page, and ``await capture.wait()`` to continue
+as soon as enough candidates have been seen. A retried request gets a new
+page, and the callback starts over with no candidates.
+"""
+import asyncio
+import logging
+import re
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE_KINDS = {
+    "application/vnd.apple.mpegurl": "hls",
+    "application/x-mpegurl": "hls",
+    "audio/mpegurl": "hls",
+    "audio/x-mpegurl": "hls",
+    "application/dash+xml": "dash",
+    "video/mp4": "mp4",
+}
+
+URL_KINDS = [
+    (re.compile(r"\.m3u8(\?|#|$)", re.IGNORECASE), "hls"),
+    (re.compile(r"\.mpd(\?|#|$)", re.IGNORECASE), "dash"),
+    (re.compile(r"\.mp4(\?|#|$)", re.IGNORECASE), "mp4"),
+]
+
+EMBED_URL_RE = re.compile(r"/embed[/-]|/e/[A-Za-z0-9]|/v/[A-Za-z0-9]|player", re.IGNORECASE)
+
+# Same test in JavaScript-compatible form, for checks that run in the page.
+STREAM_URL_PATTERN = r"\.(m3u8|mpd|mp4)(\?|#|$)|/embed[/-]|/e/[A-Za-z0-9]"
+
+MEDIA_KINDS = ("hls", "dash", "mp4")
+
+
+def classify_url(url, resource_type=None, in_subframe=False):
+    """Kind of stream ``url`` points to, or None."""
+    if not url.startswith(("http://", "https://")):
+        return None
+    for pattern, kind in URL_KINDS:
+        if pattern.search(url):
+            return kind
+    if resource_type == "document" and in_subframe and EMBED_URL_RE.search(url):
+        return "embed"
+    return None
+
+
+def classify_content_type(content_type):
+    media_type = (content_type or "").split(";", 1)[0].strip().lower()
+    return CONTENT_TYPE_KINDS.get(media_type)
+
+
+class StreamCapture:
+    """Stream candidates seen in one page's traffic, in arrival order.
+
+    ``kinds`` limits what counts towards ``min_candidates`` (everything is
+    still recorded in ``candidates``).
+    """
+
+    def __init__(self, min_candidates=1, kinds=None):
+        self.min_candidates = min_candidates
+        self.kinds = set(kinds) if kinds else None
+        self.reset()
+
+    async def __call__(self, page, request):
+        # playwright_page_init_callback signature; runs once per attempt.
+        self.reset()
+        self.attach(page)
+
+    def reset(self):
+        """Forget the candidates and page of a previous attempt."""
+        self.candidates = {}
+        self.page = None
+        self._enough = asyncio.Event()
+
+    def attach(self, page):
+        if self.page is page:
+            return
+        self.page = page
+        page.on("request", self._on_request)
+        page.on("response", self._on_response)
+
+    @property
+    def urls(self):
+        return list(self.candidates)
+
+    def counts(self):
+        return Counter(self.candidates.values())
+
+    @property
+    def matched(self):
+        if self.kinds is None:
+            return len(self.candidates)
+        return sum(1 for kind in self.candidates.values() if kind in self.kinds)
+
+    async def wait(self, timeout_ms):
+        """True once ``min_candidates`` have been captured, False on timeout."""
+        if self._enough.is_set():
+            return True
+        try:
+            await asyncio.wait_for(self._enough.wait(), timeout_ms / 1000)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def _add(self, url, kind, source):
+        if url in self.candidates:
+            return
+        self.candidates[url] = kind
+        logger.debug(f"Captured {kind} ({source}): {url[:100]}")
+        if self.matched >= self.min_candidates:
+            self._enough.set()
+
+    def _on_request(self, request):
+        kind = classify_url(request.url, request.resource_type, self._in_subframe(request))
+        if kind:
+            self._add(request.url, kind, "request")
+
+    def _on_response(self, response):
+        if response.url in self.candidates:
+            return
+        kind = classify_content_type(response.headers.get("content-type"))
+        if kind is None:
+            request = response.request
+            kind = classify_url(response.url, request.resource_type, self._in_subframe(request))
+        if kind:
+            self._add(response.url, kind, "response")
+
+    def _in_subframe(self, request):
+        try:
+            frame = request.frame
+        except Exception:
+            # Service worker requests have no frame.
+            return False
+        return frame.parent_frame is not None
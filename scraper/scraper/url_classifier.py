@@ -0,0 +1,305 @@
+"""
+URL classification shared by the spiders and the diagnostic scripts.
+
+classify(url) lowercases the URL and slices out the host once, then:
+
+- looks the host up in a host-suffix trie (most specific rule wins, so
+  ``m.youtube.com`` matches ``youtube.com``), and
+- runs one Aho-Corasick pass over the URL for the keyword rules, each scoped
+  to the host, the path (everything after the host) or the whole URL.
+
+The result is a Verdict with the matched categories, the reject reason (if
+any) and human-readable reasons. The rule lists below are the only copy;
+add new hosts and patterns here.
+
+The keyword automaton uses pyahocorasick when it is installed and a
+pure-Python implementation otherwise; both give the same matches.
+"""
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Host suffix -> category. Subdomains match too.
+HOST_RULES = {
+    # Trailers and social media (NOT streaming hosts)
+    "youtube": ["youtube.com", "youtu.be", "youtube-nocookie.com"],
+    "social": ["facebook.com", "fb.com", "twitter.com", "x.com", "instagram.com", "tiktok.com"],
+    "trailer": ["dailymotion.com", "vimeo.com"],  # Usually trailers, not full movies
+    # Movie info sites (not streaming)
+    "movie_info": ["imdb.com", "themoviedb.org", "tvdb.com", "thetvdb.com", "rottentomatoes.com"],
+    # Ad sites & redirects
+    "ad_site": [
+        "111movies.com", "fmovies.to", "fmovies.se", "fmovies.ws", "fmovies.io",
+        "flixhq.to", "flixhq.com", "flixhq.ws", "vidplay.online",
+        "vidsrc.me", "vidsrc.to", "vidsrc.pro", "vidsrc.com",
+        "multiembed.mov", "player-cdn.com", "vidnext.net", "membed.net",
+        "vidstream.pro", "vidstream.to", "vidstream.me",
+        "embed.su", "embed.moe", "embed.icu",
+    ],
+    # Anti-bot / tracking / banner domains
+    "non_streaming": ["sysmeasuring.net", "anicrush.to"],
+    # The sites we scrape; their own pages are never streaming links
+    "source_site": ["1flix.to", "fmovies-co.net"],
+    # Known video hosts
+    "video_host": [
+        "streamtape.com", "streamta.pe", "stape.fun",
+        "mixdrop.co", "mixdrop.to", "mixdrop.sx",
+        "doodstream.com", "dood.watch", "dood.to", "dood.so",
+        "vidoza.net", "vidoza.co", "upstream.to",
+        "filemoon.sx", "filemoon.in", "streamlare.com", "voe.sx",
+    ],
+}
+
+HOST_REJECT_CATEGORIES = frozenset(["youtube", "social", "trailer", "movie_info", "ad_site", "non_streaming"])
+
+# (category, scope) -> keywords. Scope is "host", "path" or "url".
+KEYWORD_RULES = {
+    # Piracy/ad networks that come under many domains
+    ("reject_keyword", "url"): [
+        "123movies", "watchmovies", "putlocker", "gomovies", "yesmovies",
+        "solarmovies", "moviesjoy", "soap2day", "s2dfree", "vidplay", "embedsoap",
+        "recaptcha",
+    ],
+    # Video host names, whatever the TLD
+    ("video_host", "host"): [
+        "vidoza", "streamtape", "mixdrop", "doodstream", "dood.",
+        "filemoon", "upstream", "streamlare", "streamhub", "streamwish",
+        "videostr", "voe.", "streamvid", "mp4upload", "streamplay",
+        "supervideo", "gounlimited", "jetload", "vidcloud", "mystream",
+        "vidstream", "fembed", "streamango", "rapidvideo", "vidlox",
+        "clipwatching", "verystream", "streammango", "netu", "fastplay",
+        "powvideo", "aparat", "vup", "vshare", "tune", "woof", "waaw",
+        "hqq", "thevideo", "vidup", "streamz", "vidfast", "vidoo",
+        "vidbam", "vidbull", "vidto", "vidsrc", "fmovies",
+    ],
+    # Player/embed URLs
+    ("embed", "url"): ["embed", "player", "/e/", "/v/"],
+    ("stream", "url"): ["watch", "stream", "video", "play", "/f/", "/d/"],
+    # Direct media files and manifests
+    ("media", "path"): [".m3u8", ".mpd", ".mp4", ".mkv", ".avi", ".webm"],
+}
+
+# Path prefixes of the source sites' own navigation pages.
+SOURCE_NAV_PREFIXES = ("/home", "/movie", "/tv", "/tv-show", "/top-imdb")
+
+_TERMINAL = None
+
+
+@dataclass(slots=True)
+class Verdict:
+    url: str
+    host: str
+    host_rule: Optional[str]
+    categories: frozenset
+    patterns: frozenset
+    reject_reason: Optional[str]
+
+    @property
+    def reject(self):
+        return self.reject_reason is not None
+
+    @property
+    def accept(self):
+        """Not rejected, and a known video host or a stream/media URL."""
+        return not self.reject and (self.is_video_host or self.has_stream_pattern)
+
+    @property
+    def is_link_candidate(self):
+        """Not rejected and not a page of a site we scrape: kept as a possible streaming link."""
+        return not self.reject and not self.is_source_site
+
+    @property
+    def is_youtube(self):
+        return "youtube" in self.categories
+
+    @property
+    def is_video_host(self):
+        return "video_host" in self.categories and "source_site" not in self.categories
+
+    @property
+    def has_embed_pattern(self):
+        return "embed" in self.categories
+
+    @property
+    def has_stream_pattern(self):
+        return bool(self.categories & {"embed", "stream", "media"})
+
+    @property
+    def is_media(self):
+        return "media" in self.categories
+
+    @property
+    def is_source_site(self):
+        return "source_site" in self.categories
+
+    @property
+    def is_navigation(self):
+        return "navigation" in self.categories
+
+    @property
+    def reasons(self):
+        reasons = []
+        if self.reject_reason:
+            reasons.append(f"rejected: {self.reject_reason}")
+        if self.host_rule:
+            reasons.append(f"host {self.host_rule}")
+        reasons.extend(f"'{pattern}'" for pattern in sorted(self.patterns))
+        return reasons
+
+
+class HostSuffixTrie:
+    """Host suffixes keyed by reversed labels; lookups return the longest match."""
+
+    def __init__(self):
+        self._root = {}
+
+    def add(self, suffix, value):
+        node = self._root
+        for label in reversed(suffix.lower().split(".")):
+            node = node.setdefault(label, {})
+        node[_TERMINAL] = (suffix, value)
+
+    def lookup(self, host):
+        """(suffix, value) of the most specific rule covering ``host``, or None."""
+        node = self._root
+        found = None
+        for label in reversed(host.split(".")):
+            node = node.get(label)
+            if node is None:
+                break
+            found = node.get(_TERMINAL, found)
+        return found
+
+
+class _Automaton:
+    """Pure-Python Aho-Corasick with the pyahocorasick methods used here."""
+
+    def __init__(self):
+        self._goto = [{}]
+        self._out = [()]
+        self._delta = None
+
+    def add_word(self, word, value):
+        state = 0
+        for ch in word:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._out.append(())
+                self._goto[state][ch] = nxt
+            state = nxt
+        self._out[state] = (value,)
+
+    def make_automaton(self):
+        goto, out = self._goto, self._out
+        fail = [0] * len(goto)
+        order = []
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            order.append(state)
+            for ch, nxt in goto[state].items():
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] = out[nxt] + out[fail[nxt]]
+                queue.append(nxt)
+        # Full transition table, so matching never follows failure links.
+        delta = [None] * len(goto)
+        delta[0] = dict(goto[0])
+        for state in order:
+            delta[state] = {**delta[fail[state]], **goto[state]}
+        self._delta = delta
+
+    def iter(self, text):
+        delta, out = self._delta, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            for value in out[state]:
+                yield i, value
+
+
+# Scheme, optional userinfo, then the host (group 1); the port is left out.
+HOST_RE = re.compile(r"[a-z][a-z0-9+.-]*://(?:[^/?#@]*@)?(\[[^\]/?#]*\]|[^/?#:]*)")
+
+
+class UrlClassifier:
+    """Host trie and keyword automaton compiled once from the rule tables."""
+
+    def __init__(self, host_rules=HOST_RULES, keyword_rules=KEYWORD_RULES):
+        self.hosts = HostSuffixTrie()
+        for category, suffixes in host_rules.items():
+            for suffix in suffixes:
+                self.hosts.add(suffix, category)
+
+        scoped = {}
+        for (category, scope), keywords in keyword_rules.items():
+            for keyword in keywords:
+                scoped.setdefault(keyword.lower(), {"url": [], "host": [], "path": []})[scope].append(category)
+        self.reject_keywords = frozenset(
+            keyword for keyword, scopes in scoped.items() if "reject_keyword" in scopes["url"]
+        )
+        self.keywords = ahocorasick.Automaton() if ahocorasick is not None else _Automaton()
+        for keyword, scopes in scoped.items():
+            self.keywords.add_word(
+                keyword,
+                (keyword, len(keyword) - 1, tuple(scopes["url"]), tuple(scopes["host"]), tuple(scopes["path"])),
+            )
+        self.keywords.make_automaton()
+
+    def classify(self, url):
+        url_lower = url.lower()
+        m = HOST_RE.match(url_lower)
+        host_start, host_end = m.span(1) if m else (0, 0)
+        host = url_lower[host_start:host_end]
+        categories = set()
+        patterns = set()
+
+        host_rule = host_category = None
+        match = self.hosts.lookup(host) if host else None
+        if match:
+            host_rule, host_category = match
+            categories.add(host_category)
+
+        for end, (keyword, offset, url_cats, host_cats, path_cats) in self.keywords.iter(url_lower):
+            matched = url_cats
+            if host_cats and host_start <= end - offset and end < host_end:
+                matched = matched + host_cats
+            if path_cats and end - offset >= host_end:
+                matched = matched + path_cats
+            if matched:
+                categories.update(matched)
+                patterns.add(keyword)
+
+        if "source_site" in categories and url_lower.startswith(SOURCE_NAV_PREFIXES, host_end):
+            categories.add("navigation")
+
+        if not url_lower.startswith(("http://", "https://")):
+            reject_reason = "not http(s)"
+        elif host_category in HOST_REJECT_CATEGORIES:
+            reject_reason = host_category
+        elif "reject_keyword" in categories:
+            reject_reason = f"keyword '{min(patterns & self.reject_keywords)}'"
+        elif "navigation" in categories:
+            reject_reason = "source site navigation"
+        else:
+            reject_reason = None
+
+        return Verdict(url, host, host_rule, frozenset(categories), frozenset(patterns), reject_reason)
+
+
+_default = UrlClassifier()
+
+
+def classify(url):
+    """Verdict for ``url`` using the shared rules."""
+    return _default.classify(url)
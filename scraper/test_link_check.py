@@ -10,11 +10,7 @@ import sys
 import requests
 from requests.exceptions import RequestException
 
-VALID_VIDEO_HOSTS = [
-    "vidoza", "streamtape", "mixdrop", "doodstream", "dood", 
-    "filemoon", "upstream", "streamlare", "streamhub", "streamwish",
-    "videostr", "voe", "streamvid", "mp4upload", "streamplay",
-]
+from scraper.url_classifier import classify
 
 
 def is_link_working(url: str) -> bool:
@@ -44,7 +40,7 @@ def is_link_working(url: str) -> bool:
             print("  -> Streaming indicators found in HTML")
             return True
 
-        if any(host in url.lower() for host in VALID_VIDEO_HOSTS):
+        if classify(url).is_video_host:
             print("  -> Known video host domain (permissive)")
             return True
 
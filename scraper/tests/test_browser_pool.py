@@ -0,0 +1,160 @@
+"""Tests for scraper.browser_pool with stub requests, pages and contexts.
+
+Run from the scraper directory: python -m unittest discover tests
+"""
+import asyncio
+import unittest
+from unittest import mock
+
+from scraper.browser_pool import BrowserPoolMiddleware, derive_limits
+
+
+class FakeRequest:
+    def __init__(self, **meta):
+        self.meta = {"playwright": True, **meta}
+
+    def copy(self):
+        # What RetryMiddleware does: a new request with a copy of the meta.
+        return FakeRequest(**self.meta)
+
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakePage:
+    def __init__(self, context):
+        self.context = context
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def close(self):
+        self.handlers["close"](self)
+
+
+def make_pool(slots=2, recycle_pages=0):
+    return BrowserPoolMiddleware(
+        crawler=mock.Mock(), slots=slots, recycle_pages=recycle_pages, max_rss_mb=0, memory_check_every=10
+    )
+
+
+class BrowserPoolTests(unittest.TestCase):
+    def setUp(self):
+        self.contexts = {}
+
+    def open_page(self, pool, request):
+        """Run the request's page init like scrapy-playwright does and return the page."""
+        name = request.meta["playwright_context"]
+        page = FakePage(self.contexts.setdefault(name, FakeContext()))
+        asyncio.run(request.meta["playwright_page_init_callback"](page, request))
+        return page
+
+    def test_least_busy_slot_is_chosen(self):
+        pool = make_pool(slots=2)
+        first, second, third = FakeRequest(), FakeRequest(), FakeRequest()
+        for request in (first, second):
+            pool.process_request(request, None)
+        self.assertEqual(
+            [first.meta["playwright_context"], second.meta["playwright_context"]], ["pool-0-0", "pool-1-0"]
+        )
+
+        pool.process_response(first, None, None)
+        pool.process_request(third, None)
+
+        self.assertEqual(third.meta["playwright_context"], "pool-0-0")
+        self.assertEqual([slot.in_flight for slot in pool.slots], [1, 1])
+
+    def test_requests_without_pool_routing_are_untouched(self):
+        pool = make_pool()
+        plain = FakeRequest(playwright=False)
+        chosen = FakeRequest(playwright_context="login")
+        for request in (plain, chosen):
+            pool.process_request(request, None)
+
+        self.assertNotIn("playwright_context", plain.meta)
+        self.assertEqual(chosen.meta["playwright_context"], "login")
+        self.assertNotIn("browser_pool_slot", chosen.meta)
+        self.assertEqual([slot.in_flight for slot in pool.slots], [0, 0])
+
+    def test_release_on_exception(self):
+        pool = make_pool(slots=1)
+        request = FakeRequest()
+        pool.process_request(request, None)
+
+        self.assertIsNone(pool.process_exception(request, TimeoutError(), None))
+        # A second call (e.g. response after exception handling) must not release twice.
+        pool.process_response(request, None, None)
+
+        self.assertEqual(pool.slots[0].in_flight, 0)
+        self.assertEqual(pool.pending["pool-0-0"], 0)
+
+    def test_recycle_after_n_pages(self):
+        pool = make_pool(slots=1, recycle_pages=2)
+
+        async def crawl():
+            pages = []
+            for _ in range(2):
+                request = FakeRequest()
+                pool.process_request(request, None)
+                name = request.meta["playwright_context"]
+                page = FakePage(self.contexts.setdefault(name, FakeContext()))
+                await request.meta["playwright_page_init_callback"](page, request)
+                pages.append((request, page))
+            self.assertEqual(pool.slots[0].context_name, "pool-0-1")
+            for request, page in pages:
+                pool.process_response(request, None, None)
+                page.close()
+            await asyncio.sleep(0)  # let the scheduled context.close() run
+
+        asyncio.run(crawl())
+
+        self.assertTrue(self.contexts["pool-0-0"].closed)
+        self.assertNotIn("pool-0-0", pool.retiring)
+        self.assertEqual(pool.stats.inc_value.call_args_list.count(mock.call("browser_pool/contexts_recycled")), 1)
+        request = FakeRequest()
+        pool.process_request(request, None)
+        self.assertEqual(request.meta["playwright_context"], "pool-0-1")
+
+    def test_retry_is_routed_again(self):
+        pool = make_pool(slots=1, recycle_pages=1)
+        original_init = mock.AsyncMock()
+        request = FakeRequest(playwright_page_init_callback=original_init)
+        pool.process_request(request, None)
+        self.open_page(pool, request)  # the only page allowed: the context is retired
+        queued_at = request.meta["browser_pool_queued_at"]
+
+        pool.process_exception(request, TimeoutError(), None)
+        retry = request.copy()
+        pool.process_request(retry, None)
+
+        self.assertEqual(retry.meta["playwright_context"], "pool-0-1")
+        self.assertEqual(retry.meta["browser_pool_slot"], 0)
+        self.assertGreater(retry.meta["browser_pool_queued_at"], queued_at)
+        self.assertEqual(pool.slots[0].in_flight, 1)
+        self.assertEqual(pool.pending, {"pool-0-0": 0, "pool-0-1": 1})
+
+        # The page init is wrapped once, not around the first attempt's wrapper.
+        self.open_page(pool, retry)
+        self.assertEqual(original_init.await_count, 2)
+        self.assertEqual(pool.open_pages["pool-0-1"], 1)
+
+        pool.process_response(retry, None, None)
+        self.assertEqual(pool.slots[0].in_flight, 0)
+
+
+class DeriveLimitsTests(unittest.TestCase):
+    def test_small_machine_gets_one_page(self):
+        self.assertEqual(derive_limits(memory_mb=512), (1, 1))
+
+    def test_limits_are_capped(self):
+        self.assertEqual(derive_limits(memory_mb=64 * 1024), (8, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""Tests for scraper.metadata on fixture HTML.
+
+Run from the scraper directory: python -m unittest discover tests
+"""
+import json
+import unittest
+from urllib.parse import urljoin
+
+from parsel import Selector
+
+from scraper.metadata import extract_metadata
+
+PAGE_URL = "https://example.com/movie/the-general"
+
+
+class FakeResponse:
+    """The parts of a Scrapy HtmlResponse that extract_metadata uses."""
+
+    def __init__(self, html, url=PAGE_URL):
+        self.text = html
+        self.url = url
+        self.selector = Selector(text=html)
+
+    def urljoin(self, url):
+        return urljoin(self.url, url)
+
+
+def page(head="", body=""):
+    return f"<html><head>{head}</head><body>{body}</body></html>"
+
+
+def ld(obj):
+    return f'<script type="application/ld+json">{json.dumps(obj)}</script>'
+
+
+OG_TAGS = (
+    '<meta property="og:title" content="OG Title">'
+    '<meta property="og:image" content="/og.jpg">'
+    '<meta property="og:description" content="OG synopsis">'
+)
+
+
+class ExtractMetadataTests(unittest.TestCase):
+    def extract(self, html, **kwargs):
+        return extract_metadata(FakeResponse(html), **kwargs)
+
+    def test_og_title_before_h1(self):
+        metadata = self.extract(page(OG_TAGS, "<h1>Heading Title</h1>"))
+        self.assertEqual(metadata.title, "OG Title")
+        self.assertEqual(metadata.sources["title"], "meta")
+
+        metadata = self.extract(page(body="<h1> Heading   Title </h1>"))
+        self.assertEqual((metadata.title, metadata.sources["title"]), ("Heading Title", "html"))
+
+    def test_json_ld_before_og_and_meta(self):
+        movie = {
+            "@context": "https://schema.org",
+            "@type": "Movie",
+            "name": "The General",
+            "image": {"@type": "ImageObject", "url": "https://cdn.example.com/general.jpg"},
+            "description": "A  train   engineer chases his locomotive.",
+            "datePublished": "1926-12-31",
+            "sameAs": ["https://www.imdb.com/title/tt0017925/"],
+        }
+        metadata = self.extract(page(OG_TAGS + ld(movie), "<h1>Heading</h1>"))
+
+        self.assertEqual(metadata.title, "The General")
+        self.assertEqual(metadata.poster_url, "https://cdn.example.com/general.jpg")
+        self.assertEqual(metadata.synopsis, "A train engineer chases his locomotive.")
+        self.assertEqual(metadata.year, 1926)
+        self.assertEqual(metadata.imdb_id, "tt0017925")
+        self.assertEqual(set(metadata.sources.values()), {"json-ld"})
+
+    def test_meta_fills_what_json_ld_lacks(self):
+        metadata = self.extract(page(OG_TAGS + ld({"@type": "Movie", "name": "The General"})))
+
+        self.assertEqual((metadata.title, metadata.sources["title"]), ("The General", "json-ld"))
+        self.assertEqual(metadata.poster_url, "https://example.com/og.jpg")
+        self.assertEqual((metadata.synopsis, metadata.sources["synopsis"]), ("OG synopsis", "meta"))
+
+    def test_title_year_suffix_is_split(self):
+        metadata = self.extract(page('<meta property="og:title" content="His Girl Friday (1940)">'))
+        self.assertEqual((metadata.title, metadata.year), ("His Girl Friday", 1940))
+        self.assertEqual(metadata.sources["year"], "meta")
+
+        metadata = self.extract(page(body="<h1>Nosferatu (1922)</h1>"))
+        self.assertEqual((metadata.title, metadata.year), ("Nosferatu", 1922))
+        self.assertEqual(metadata.sources["year"], "html")
+
+    def test_explicit_year_wins_over_title_suffix(self):
+        metadata = self.extract(page(ld({"@type": "Movie", "name": "Remake (2024)", "datePublished": "2023-05-01"})))
+        self.assertEqual((metadata.title, metadata.year), ("Remake", 2023))
+
+    def test_non_string_types_are_ignored(self):
+        blocks = [
+            {"@type": {"@id": "schema:Movie"}, "name": "Dict type"},
+            {"@type": [{"@id": "schema:Movie"}, "Person"], "name": "List with dicts"},
+            {"@type": [{"@id": "schema:Thing"}, "Movie"], "name": "Mixed list"},
+        ]
+        metadata = self.extract(page("".join(ld(block) for block in blocks)))
+
+        self.assertEqual((metadata.title, metadata.sources["title"]), ("Mixed list", "json-ld"))
+
+    def test_graph_and_invalid_blocks(self):
+        graph = {"@graph": [{"@type": "WebPage", "name": "Site"}, {"@type": ["Movie"], "name": "In graph"}]}
+        metadata = self.extract(page('<script type="application/ld+json">{not json</script>' + ld(graph)))
+        self.assertEqual(metadata.title, "In graph")
+
+
+if __name__ == "__main__":
+    unittest.main()
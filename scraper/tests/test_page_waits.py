@@ -0,0 +1,41 @@
+"""Tests for scraper.page_waits that need no browser.
+
+Run from the scraper directory: python -m unittest discover tests
+"""
+import asyncio
+import sys
+import time
+import unittest
+
+from scraper.page_waits import StreamWait
+
+
+class FakePage:
+    def on(self, event, handler):
+        pass
+
+
+class StreamWaitRetryTests(unittest.TestCase):
+    def test_import_does_not_load_playwright(self):
+        self.assertNotIn("playwright", sys.modules)
+
+    def test_each_attempt_gets_the_full_budget(self):
+        wait = StreamWait(budget_ms=5000)
+        asyncio.run(wait(FakePage(), None))
+        wait.remaining_ms()
+        # A first attempt that used up the budget and captured a stream.
+        wait.started = time.monotonic() - 10
+        wait.reason = "budget"
+        wait.capture._add("https://cdn.example.com/master.m3u8", "hls", "response")
+
+        # The retry's new page runs the init callback again.
+        asyncio.run(wait(FakePage(), None))
+
+        self.assertIsNone(wait.reason)
+        self.assertEqual(wait.elapsed_ms, 0)
+        self.assertGreater(wait.remaining_ms(), 4000)
+        self.assertEqual(wait.capture.matched, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+"""Tests for scraper.resource_blocking with stub Playwright requests.
+
+Run from the scraper directory: python -m unittest discover tests
+"""
+import asyncio
+import unittest
+from unittest import mock
+
+from scraper.resource_blocking import (
+    DEFAULT_BLOCKED_HOSTS,
+    DEFAULT_BLOCKED_RESOURCE_TYPES,
+    DEFAULT_BLOCKED_URL_PATTERN,
+    DEFAULT_BYTES_ESTIMATE,
+    ResourceBlockerMiddleware,
+    host_matches,
+)
+
+
+class FakeFrame:
+    def __init__(self, parent_frame=None):
+        self.parent_frame = parent_frame
+
+
+class FakePlaywrightRequest:
+    def __init__(self, url, resource_type="other", navigation=False, subframe=False, frame=True):
+        self.url = url
+        self.resource_type = resource_type
+        self.navigation = navigation
+        self._frame = FakeFrame(FakeFrame() if subframe else None) if frame else None
+
+    @property
+    def frame(self):
+        if self._frame is None:
+            raise RuntimeError("Service Worker requests do not have an associated frame.")
+        return self._frame
+
+    def is_navigation_request(self):
+        return self.navigation
+
+
+def make_blocker():
+    return ResourceBlockerMiddleware(
+        mock.Mock(),
+        resource_types=DEFAULT_BLOCKED_RESOURCE_TYPES,
+        hosts=DEFAULT_BLOCKED_HOSTS,
+        url_pattern=DEFAULT_BLOCKED_URL_PATTERN,
+        bytes_estimate=DEFAULT_BYTES_ESTIMATE,
+    )
+
+
+class HostMatchesTests(unittest.TestCase):
+    def test_subdomains_match(self):
+        hosts = {"doubleclick.net", "mc.yandex.ru"}
+        self.assertTrue(host_matches("doubleclick.net", hosts))
+        self.assertTrue(host_matches("stats.g.DoubleClick.net", hosts))
+        self.assertTrue(host_matches("mc.yandex.ru", hosts))
+
+    def test_other_hosts_do_not_match(self):
+        hosts = {"doubleclick.net", "mc.yandex.ru"}
+        self.assertFalse(host_matches("notdoubleclick.net", hosts))
+        self.assertFalse(host_matches("doubleclick.net.example.com", hosts))
+        # A parent of a blocked host is not blocked.
+        self.assertFalse(host_matches("yandex.ru", hosts))
+        self.assertFalse(host_matches(None, hosts))
+        self.assertFalse(host_matches("", hosts))
+
+
+class BlockReasonTests(unittest.TestCase):
+    def setUp(self):
+        self.blocker = make_blocker()
+
+    def reason(self, *args, **kwargs):
+        return self.blocker.block_reason(FakePlaywrightRequest(*args, **kwargs))
+
+    def test_top_level_navigation_passes(self):
+        # Even a blocked host or resource type, when it's the page itself.
+        self.assertIsNone(self.reason("https://ads.doubleclick.net/landing", "document", navigation=True))
+        self.assertIsNone(self.reason("https://example.com/poster.jpg", "image", navigation=True))
+
+    def test_subframe_navigation_is_filtered(self):
+        self.assertEqual(
+            self.reason("https://ad.doubleclick.net/frame", "document", navigation=True, subframe=True), "host"
+        )
+
+    def test_player_iframes_pass(self):
+        for url in ("https://ad.doubleclick.net/embed/abc", "https://vidhost.example/e/Xy12", "https://cdn.example/player"):
+            with self.subTest(url=url):
+                self.assertIsNone(self.reason(url, "document", navigation=True, subframe=True))
+
+    def test_stream_capture_urls_pass(self):
+        # Manifests and mp4 go through even from blocked hosts or as "media".
+        self.assertIsNone(self.reason("https://cdn.doubleclick.net/master.m3u8", "xhr"))
+        self.assertIsNone(self.reason("https://cdn.example.com/manifest.mpd?token=1", "fetch"))
+        self.assertIsNone(self.reason("https://cdn.example.com/movie.mp4", "media"))
+
+    def test_blocked_hosts_and_types(self):
+        self.assertEqual(self.reason("https://www.google-analytics.com/collect", "xhr"), "host")
+        self.assertEqual(self.reason("https://example.com/poster.jpg", "image"), "image")
+        self.assertEqual(self.reason("https://fonts.example.com/a.woff2", "font"), "font")
+        self.assertIsNone(self.reason("https://example.com/app.js", "script"))
+        self.assertIsNone(self.reason("https://example.com/stream", "media"))
+
+    def test_segments_blocked_but_not_manifests(self):
+        self.assertEqual(self.reason("https://cdn.example.com/seg-00001.ts", "xhr"), "segment")
+        self.assertEqual(self.reason("https://cdn.example.com/chunk-1.m4s?sig=abc", "fetch"), "segment")
+        self.assertIsNone(self.reason("https://cdn.example.com/index.m3u8", "xhr"))
+        self.assertIsNone(self.reason("https://cdn.example.com/tsconfig.json", "xhr"))
+
+    def test_service_worker_requests_without_frame(self):
+        self.assertEqual(self.reason("https://example.com/icon.png", "image", frame=False), "image")
+
+
+class RouteTests(unittest.TestCase):
+    def test_abort_counts_blocked_bytes(self):
+        blocker = make_blocker()
+        route = mock.AsyncMock()
+
+        asyncio.run(blocker._route(route, FakePlaywrightRequest("https://cdn.example.com/seg-1.ts", "xhr")))
+        asyncio.run(blocker._route(route, FakePlaywrightRequest("https://example.com/app.js", "script")))
+
+        route.abort.assert_awaited_once_with("blockedbyclient")
+        route.fallback.assert_awaited_once_with()
+        blocker.stats.inc_value.assert_any_call("resource_blocker/blocked/segment")
+        blocker.stats.inc_value.assert_any_call(
+            "resource_blocker/bytes_saved_estimate", DEFAULT_BYTES_ESTIMATE["segment"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""Tests for scraper.sitemap_index.
+
+Run from the scraper directory: python -m unittest discover tests
+"""
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from scraper.sitemap_index import SitemapIndex, normalize_title
+
+SITEMAP_URL = "https://fawesome.tv/sitemaps/movies-pages.xml"
+
+ENTRIES = [
+    ("https://fawesome.tv/movies/night-of-the-living-dead-1968", "Night of the Living Dead (1968)"),
+    ("https://fawesome.tv/movies/night-of-the-living-dead-1990", "Night of the Living Dead"),
+    ("https://fawesome.tv/movies/the-general", "The General"),
+    ("https://fawesome.tv/movies/general-idi-amin-dada", "General Idi Amin Dada: A Self Portrait"),
+    ("https://fawesome.tv/movies/his-girl-friday", "His Girl Friday (1940)"),
+]
+
+
+class NormalizeTitleTests(unittest.TestCase):
+    def test_normalize(self):
+        self.assertEqual(normalize_title("His Girl Friday (1940)"), "his girl friday")
+        self.assertEqual(normalize_title("  Dr. Strangelove: or How I Learned…  "), "dr strangelove or how i learned")
+        self.assertEqual(normalize_title("WALL·E"), "wall e")
+        self.assertEqual(normalize_title(None), "")
+
+
+class SitemapIndexTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "cache" / "sitemap.sqlite3"
+        self.index = SitemapIndex(self.path)
+        self.addCleanup(self.index.close)
+
+    def test_exact_title_wins(self):
+        self.index.rebuild(SITEMAP_URL, ENTRIES)
+        self.assertEqual(self.index.match("The General"), ("https://fawesome.tv/movies/the-general", 10))
+        self.assertEqual(self.index.match("his girl friday")[0], "https://fawesome.tv/movies/his-girl-friday")
+
+    def test_year_breaks_ties(self):
+        self.index.rebuild(SITEMAP_URL, ENTRIES)
+        # Without a year the earlier sitemap entry wins.
+        self.assertEqual(self.index.match("Night of the Living Dead")[0], ENTRIES[0][0])
+        # The year comes from the title suffix or the URL slug.
+        self.assertEqual(self.index.match("Night of the Living Dead", 1990), (ENTRIES[1][0], 12))
+        self.assertEqual(self.index.match("Night of the Living Dead", 1968), (ENTRIES[0][0], 12))
+
+    def test_partial_and_missing_matches(self):
+        self.index.rebuild(SITEMAP_URL, ENTRIES)
+        self.assertEqual(self.index.match("Idi Amin Dada"), (ENTRIES[3][0], 6))
+        self.assertEqual(self.index.match("Casablanca"), (None, -1))
+        self.assertEqual(self.index.match("(1999)"), (None, -1))
+
+    def test_conditional_headers(self):
+        self.assertEqual(self.index.conditional_headers(SITEMAP_URL), {})
+
+        self.index.rebuild(SITEMAP_URL, ENTRIES, etag='"abc"', last_modified="Tue, 01 Oct 2024 10:00:00 GMT")
+
+        self.assertEqual(
+            self.index.conditional_headers(SITEMAP_URL),
+            {"If-None-Match": '"abc"', "If-Modified-Since": "Tue, 01 Oct 2024 10:00:00 GMT"},
+        )
+        self.assertEqual(self.index.conditional_headers("https://fawesome.tv/sitemaps/other.xml"), {})
+
+    def test_empty_parse_keeps_the_old_index(self):
+        self.index.rebuild(SITEMAP_URL, ENTRIES, etag='"abc"')
+
+        self.assertEqual(self.index.rebuild(SITEMAP_URL, iter([]), etag='"broken"'), 0)
+
+        self.assertEqual(len(self.index), len(ENTRIES))
+        self.assertEqual(self.index.conditional_headers(SITEMAP_URL), {"If-None-Match": '"abc"'})
+        self.assertEqual(self.index.match("The General")[1], 10)
+
+    def test_rebuild_replaces_entries(self):
+        self.index.rebuild(SITEMAP_URL, ENTRIES)
+        self.index.rebuild(SITEMAP_URL, ENTRIES[2:3])
+
+        self.assertEqual(len(self.index), 1)
+        self.assertEqual(self.index.match("Living Dead"), (None, -1))
+
+    def test_rebuild_waits_for_another_writer(self):
+        other = SitemapIndex(self.path)
+        self.addCleanup(other.close)
+        other.db.execute("BEGIN IMMEDIATE")
+        self.index.db.execute("PRAGMA busy_timeout = 50")
+
+        with self.assertRaises(sqlite3.OperationalError):
+            self.index.rebuild(SITEMAP_URL, ENTRIES)
+        # Lookups still read the last committed index meanwhile.
+        self.assertEqual(self.index.match("The General"), (None, -1))
+
+        other.db.rollback()
+        self.assertEqual(self.index.rebuild(SITEMAP_URL, ENTRIES), len(ENTRIES))
+
+
+if __name__ == "__main__":
+    unittest.main()
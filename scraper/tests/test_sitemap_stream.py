@@ -0,0 +1,106 @@
+"""Tests for scraper.sitemap_stream.
+
+Run from the scraper directory: python -m unittest discover tests
+"""
+import gzip
+import io
+import tempfile
+import unittest
+from itertools import islice
+from pathlib import Path
+
+from scraper.sitemap_stream import iter_sitemap
+
+URLSET = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
+        xmlns:video="http://www.google.com/schemas/sitemap-video/1.1">
+  <url>
+    <loc> https://fawesome.tv/movies/the-general </loc>
+    <video:video>
+      <video:thumbnail_loc>https://cdn.fawesome.tv/general.jpg</video:thumbnail_loc>
+      <video:title>The General (1926)</video:title>
+    </video:video>
+  </url>
+  <!-- a comment between entries -->
+  <url>
+    <loc>https://fawesome.tv/movies/his-girl-friday</loc>
+    <lastmod>2024-10-01</lastmod>
+  </url>
+  <url>
+    <lastmod>2024-10-01</lastmod>
+  </url>
+</urlset>
+"""
+
+SITEMAP_INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://fawesome.tv/sitemaps/movies-pages-1.xml</loc></sitemap>
+  <sitemap><loc>https://fawesome.tv/sitemaps/movies-pages-2.xml.gz</loc><lastmod>2024-10-01</lastmod></sitemap>
+</sitemapindex>
+"""
+
+
+def big_urlset(count):
+    entries = b"".join(
+        b"<url><loc>https://fawesome.tv/movies/%d</loc></url>\n" % i for i in range(count)
+    )
+    return b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n' + entries + b"</urlset>\n"
+
+
+class CountingReader(io.BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+class IterSitemapTests(unittest.TestCase):
+    def test_urlset_with_and_without_video_title(self):
+        self.assertEqual(
+            list(iter_sitemap(URLSET)),
+            [
+                ("url", "https://fawesome.tv/movies/the-general", "The General (1926)"),
+                # No <video:title>: empty title. The <url> without a <loc> is skipped.
+                ("url", "https://fawesome.tv/movies/his-girl-friday", ""),
+            ],
+        )
+
+    def test_sitemap_index_entries(self):
+        self.assertEqual(
+            list(iter_sitemap(SITEMAP_INDEX)),
+            [
+                ("sitemap", "https://fawesome.tv/sitemaps/movies-pages-1.xml", ""),
+                ("sitemap", "https://fawesome.tv/sitemaps/movies-pages-2.xml.gz", ""),
+            ],
+        )
+
+    def test_gzipped_body(self):
+        self.assertEqual(list(iter_sitemap(gzip.compress(URLSET))), list(iter_sitemap(URLSET)))
+
+    def test_path_source(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "sitemap.xml"
+            path.write_bytes(SITEMAP_INDEX)
+            self.assertEqual(len(list(iter_sitemap(str(path)))), 2)
+
+    def test_early_stop_reads_only_the_start(self):
+        body = big_urlset(50000)
+        reader = CountingReader(body)
+
+        first = list(islice(iter_sitemap(reader), 3))
+
+        self.assertEqual([loc for _, loc, _ in first], [f"https://fawesome.tv/movies/{i}" for i in range(3)])
+        self.assertLess(reader.bytes_read, len(body) // 10)
+
+    def test_all_entries_of_a_large_sitemap(self):
+        entries = list(iter_sitemap(big_urlset(5000)))
+        self.assertEqual(len(entries), 5000)
+        self.assertEqual(entries[-1], ("url", "https://fawesome.tv/movies/4999", ""))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+"""Tests for scraper.url_classifier; no Scrapy or Playwright needed.
+
+Run from the scraper directory: python -m unittest discover tests
+"""
+import unittest
+
+from scraper.url_classifier import classify
+
+
+class LinkCandidateTests(unittest.TestCase):
+    def test_source_site_watch_page_is_not_a_candidate(self):
+        verdict = classify("https://1flix.to/watch-movie/watch-the-matrix-19724.5349786")
+        self.assertTrue(verdict.is_source_site)
+        # The "watch" keyword makes it look like a stream, but it is the site's own page.
+        self.assertTrue(verdict.has_stream_pattern)
+        self.assertFalse(verdict.is_link_candidate)
+
+    def test_source_site_subdomain_is_not_a_candidate(self):
+        self.assertFalse(classify("https://www.fmovies-co.net/movie/watch-title-1").is_link_candidate)
+
+    def test_external_hosts_are_candidates(self):
+        for url in (
+            "https://streamtape.com/e/abc123",
+            "https://cdn3.hls-edge.net/hls/abc/master.m3u8",
+            "https://s7.unknown-host.xyz/player/abc",
+        ):
+            with self.subTest(url=url):
+                self.assertTrue(classify(url).is_link_candidate)
+
+    def test_rejected_hosts_are_not_candidates(self):
+        for url in ("https://www.youtube.com/watch?v=abc", "https://vidsrc.to/embed/movie/1", "ftp://example.com/a"):
+            with self.subTest(url=url):
+                verdict = classify(url)
+                self.assertTrue(verdict.reject)
+                self.assertFalse(verdict.is_link_candidate)
+
+
+if __name__ == "__main__":
+    unittest.main()
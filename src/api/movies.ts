@@ -1,10 +1,14 @@
 import { apiGet, apiPost, apiPatch } from "./client";
-import { Movie, StreamingMovie, UserMovieState } from "@/types/api";
+import { HomeRails, Movie, StreamingMovie, UserMovieState } from "@/types/api";
 
 export async function fetchMovies(): Promise<Movie[]> {
   return apiGet<Movie[]>("/movies/");
 }
 
+export async function fetchHome(): Promise<HomeRails> {
+  return apiGet<HomeRails>("/home/");
+}
+
 export async function fetchMovie(id: string | number): Promise<Movie> {
   return apiGet<Movie>(`/movies/${id}/`);
 }
@@ -21,6 +25,12 @@ export async function updateUserMovieState(id: number, payload: Partial<UserMovi
   return apiPatch<UserMovieState>(`/user-states/${id}/`, payload);
 }
 
+export async function batchUpsertUserMovieStates(
+  operations: Array<Partial<UserMovieState> & { movie_id: number }>,
+): Promise<Array<UserMovieState & { movie_id: number }>> {
+  return apiPost<Array<UserMovieState & { movie_id: number }>>("/user-states/batch/", { operations });
+}
+
 export async function clearHistory(): Promise<{ detail: string; count: number }> {
   return apiPost("/user-states/clear_history/", {});
 }
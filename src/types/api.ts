@@ -48,3 +48,11 @@ export interface StreamingMovie {
   links: StreamingLink[];
 }
 
+
+export interface HomeRails {
+  trending: Movie[];
+  new: Movie[];
+  continue_watching: Movie[];
+  my_list: Movie[];
+  streaming: StreamingMovie[];
+}